@@ -0,0 +1,107 @@
+"""
+Firestore Data Access
+Runs the synchronous Firestore client on a bounded thread pool so a slow
+read or write never stalls the event loop serving other requests
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from app.db.user_store import UserStore
+
+# Maximum Firestore calls in flight per worker; further calls queue up
+FIRESTORE_MAX_CONCURRENCY = int(os.getenv("FIRESTORE_MAX_CONCURRENCY", "32"))
+
+# Firestore caps batched reads/writes per call
+FIRESTORE_BATCH_LIMIT = 500
+
+
+def default_firestore_client() -> Any:
+    """Initialize Firebase Admin on first use and return a Firestore client"""
+    # Imported here: the SDK is slow to import and needs credentials to start
+    import firebase_admin
+    from firebase_admin import firestore
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app()
+    return firestore.client()
+
+
+class FirestoreUserStore(UserStore):
+    """
+    Async access to the `users` collection
+    Every client call is offloaded to a dedicated, bounded thread pool.
+    Without an explicit client, one is created by client_factory on first use
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        max_concurrency: int = FIRESTORE_MAX_CONCURRENCY,
+        collection: str = "users",
+        client_factory: Callable[[], Any] = default_firestore_client
+    ):
+        super().__init__(max_concurrency, thread_name_prefix="firestore")
+        self._client = client
+        self._client_factory = client_factory
+        self._client_lock = threading.Lock()
+        self.collection = collection
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._client_factory()
+        return self._client
+
+    @property
+    def connected(self) -> bool:
+        return self._client is not None
+
+    async def connect(self) -> None:
+        """Create the client off the event loop, ahead of the first request"""
+        await self.run(lambda: self.client)
+
+    def _ref(self, email: str):
+        return self.client.collection(self.collection).document(email)
+
+    async def get_user(self, email: str) -> Optional[Dict]:
+        """Fetch a user document, or None if it doesn't exist"""
+        # References resolve on the pool too: the first one creates the client
+        doc = await self.run(lambda: self._ref(email).get())
+        return doc.to_dict() if doc.exists else None
+
+    async def create_user(self, email: str, data: Dict) -> None:
+        """Create or overwrite a user document"""
+        await self.run(lambda: self._ref(email).set(data))
+
+    async def update_user(self, email: str, data: Dict) -> None:
+        """Update fields on an existing user document"""
+        await self.run(lambda: self._ref(email).update(data))
+
+    async def get_users(self, emails: List[str]) -> Dict[str, Dict]:
+        """Fetch many user documents with chunked get_all calls"""
+        return await self.run(self._get_users_sync, emails)
+
+    def _get_users_sync(self, emails: List[str]) -> Dict[str, Dict]:
+        refs = [self._ref(email) for email in emails]
+        users = {}
+        for i in range(0, len(refs), FIRESTORE_BATCH_LIMIT):
+            for doc in self.client.get_all(refs[i:i + FIRESTORE_BATCH_LIMIT]):
+                if doc.exists:
+                    users[doc.id] = doc.to_dict()
+        return users
+
+    async def update_users(self, updates: Dict[str, Dict]) -> None:
+        """Apply field updates to many user documents in batched commits"""
+        await self.run(self._update_users_sync, updates)
+
+    def _update_users_sync(self, updates: Dict[str, Dict]) -> None:
+        items = list(updates.items())
+        for i in range(0, len(items), FIRESTORE_BATCH_LIMIT):
+            batch = self.client.batch()
+            for email, data in items[i:i + FIRESTORE_BATCH_LIMIT]:
+                batch.update(self._ref(email), data)
+            batch.commit()
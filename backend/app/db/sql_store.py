@@ -0,0 +1,296 @@
+"""
+SQL User Storage
+User documents stored across the users, transcript_courses and
+verification_results tables through SQLAlchemy, for on-prem deployments
+and as a local stand-in for Firestore
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, joinedload, selectinload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import DATABASE_URL, DB_MAX_OVERFLOW, DB_POOL_SIZE, make_engine
+from app.db.user_store import UserStore
+from app.models.models import Base, TranscriptCourse, User, VerificationResult
+
+# Bound on emails per IN (...) query
+SQL_IN_CHUNK = 500
+
+# Document fields stored directly on the users row
+PROFILE_FIELDS = (
+    "name", "major", "community_college", "target_uc", "target_major",
+    "verification_key", "verification_state",
+)
+
+COURSE_FIELDS = ("course_code", "course_name", "units", "grade", "semester")
+# Optional course fields, left out of documents when unset
+OPTIONAL_COURSE_FIELDS = ("college",)
+# Optional verification result fields, left out of results when unset
+OPTIONAL_RESULT_FIELDS = ("course_suggestions",)
+
+# Built once. A single user loads in one joined round trip; many users use
+# selectinload, which avoids repeating each user's columns per child row
+LOAD_USER = (
+    select(User)
+    .where(User.email == bindparam("email"))
+    .options(
+        joinedload(User.transcript_courses),
+        joinedload(User.verification_results),
+    )
+)
+
+LOAD_USERS = (
+    select(User)
+    .where(User.email.in_(bindparam("emails", expanding=True)))
+    .options(
+        selectinload(User.transcript_courses),
+        selectinload(User.verification_results),
+    )
+)
+
+
+class SQLUserStore(UserStore):
+    """
+    UserStore backed by the SQLAlchemy models
+
+    Reads load a user's transcript and latest verification result with
+    selectinload, so fetching any number of users costs three queries per
+    chunk of emails. The thread pool is sized to the connection pool so
+    threads never queue for a connection.
+    """
+
+    def __init__(
+        self,
+        engine: Optional[Engine] = None,
+        max_concurrency: Optional[int] = None,
+        create_tables: bool = True
+    ):
+        self.engine = engine or make_engine(DATABASE_URL)
+        if max_concurrency is None:
+            # A StaticPool has one shared connection; use it from one thread
+            single = isinstance(self.engine.pool, StaticPool)
+            max_concurrency = 1 if single else DB_POOL_SIZE + DB_MAX_OVERFLOW
+        super().__init__(max_concurrency, thread_name_prefix="sql")
+        self.create_tables = create_tables
+        self._sessions = sessionmaker(bind=self.engine, expire_on_commit=False)
+        self._connected = False
+
+    @classmethod
+    def in_memory(cls) -> "SQLUserStore":
+        """Throwaway SQLite store for tests and local benchmarks"""
+        return cls(make_engine("sqlite://"))
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    async def connect(self) -> None:
+        """
+        Check out a connection (and create tables) off the event loop
+        Operations connect on first use if this hasn't run yet
+        """
+        await self.run(self._connect_sync)
+
+    def _connect_sync(self) -> None:
+        if self._connected:
+            return
+        if self.create_tables:
+            Base.metadata.create_all(self.engine)
+        with self.engine.connect():
+            pass
+        self._connected = True
+
+    # ===================== READS =====================
+
+    def _load(self, session: Session, emails: Iterable[str]) -> List[User]:
+        users = []
+        emails = list(emails)
+        for i in range(0, len(emails), SQL_IN_CHUNK):
+            users.extend(session.scalars(LOAD_USERS, {"emails": emails[i:i + SQL_IN_CHUNK]}))
+        return users
+
+    async def get_user(self, email: str) -> Optional[Dict]:
+        """Fetch a user document, or None if it doesn't exist"""
+        return await self.run(self._get_user_sync, email)
+
+    def _get_user_sync(self, email: str) -> Optional[Dict]:
+        self._connect_sync()
+        with self._sessions() as session:
+            user = session.scalars(LOAD_USER, {"email": email}).unique().first()
+            return _to_document(user) if user is not None else None
+
+    async def get_users(self, emails: List[str]) -> Dict[str, Dict]:
+        """Fetch many user documents with chunked, eagerly loaded queries"""
+        return await self.run(self._get_users_sync, emails)
+
+    def _get_users_sync(self, emails: List[str]) -> Dict[str, Dict]:
+        self._connect_sync()
+        with self._sessions() as session:
+            return {user.email: _to_document(user) for user in self._load(session, emails)}
+
+    # ===================== WRITES =====================
+
+    async def create_user(self, email: str, data: Dict) -> None:
+        """Create or overwrite a user document"""
+        await self.run(self._create_user_sync, email, data)
+
+    def _create_user_sync(self, email: str, data: Dict) -> None:
+        self._connect_sync()
+        with self._sessions.begin() as session:
+            existing = session.scalar(select(User).where(User.email == email))
+            if existing is not None:
+                for model in (TranscriptCourse, VerificationResult):
+                    session.execute(delete(model).where(model.user_id == existing.id))
+                session.delete(existing)
+                session.flush()
+            user = User(email=email)
+            writes = _ChildWrites()
+            _apply(user, data, writes)
+            session.add(user)
+            session.flush()
+            writes.flush(session)
+
+    async def update_user(self, email: str, data: Dict) -> None:
+        """Update fields on an existing user document"""
+        await self.run(self._update_users_sync, {email: data}, True)
+
+    async def update_users(self, updates: Dict[str, Dict]) -> None:
+        """Apply field updates to many user documents in one transaction"""
+        await self.run(self._update_users_sync, updates)
+
+    def _update_users_sync(self, updates: Dict[str, Dict], strict: bool = False) -> None:
+        self._connect_sync()
+        emails = list(updates)
+        with self._sessions.begin() as session:
+            users = {}
+            for i in range(0, len(emails), SQL_IN_CHUNK):
+                for user in session.scalars(
+                    select(User).where(User.email.in_(emails[i:i + SQL_IN_CHUNK]))
+                ):
+                    users[user.email] = user
+            writes = _ChildWrites()
+            for email, data in updates.items():
+                if email not in users:
+                    if strict:
+                        raise KeyError(f"User not found: {email}")
+                    continue
+                _apply(users[email], data, writes)
+            session.flush()
+            writes.flush(session)
+
+
+# ===================== MAPPING =====================
+
+class _ChildWrites:
+    """
+    Transcript and verification rows replaced within one transaction
+    Collected across users so each child table costs one DELETE ... IN and
+    one executemany INSERT, however many users are written
+    """
+
+    def __init__(self):
+        self.pending: Dict[Any, List[Tuple[User, List[Dict]]]] = {
+            TranscriptCourse: [], VerificationResult: []
+        }
+
+    def replace(self, model: Any, user: User, rows: List[Dict]) -> None:
+        self.pending[model].append((user, rows))
+
+    def flush(self, session: Session) -> None:
+        """Write queued rows; users must have been flushed so ids are set"""
+        for model, pending in self.pending.items():
+            user_ids = [user.id for user, _ in pending]
+            for i in range(0, len(user_ids), SQL_IN_CHUNK):
+                session.execute(delete(model).where(model.user_id.in_(user_ids[i:i + SQL_IN_CHUNK])))
+            rows = [{"user_id": user.id, **row} for user, user_rows in pending for row in user_rows]
+            if rows:
+                session.execute(insert(model), rows)
+
+
+def _apply(user: User, data: Dict, writes: _ChildWrites) -> None:
+    """Write document fields onto a user row and queue its child rows"""
+    for field, value in data.items():
+        if field in PROFILE_FIELDS:
+            setattr(user, field, value)
+        elif field == "created_at":
+            user.created_at = datetime.fromisoformat(value) if value else datetime.utcnow()
+        elif field == "transcript":
+            writes.replace(TranscriptCourse, user, [
+                {name: course.get(name) for name in COURSE_FIELDS + OPTIONAL_COURSE_FIELDS}
+                for course in value or []
+            ])
+        elif field == "verification_results":
+            # Only the latest result is kept, matching the document model
+            writes.replace(VerificationResult, user, [{
+                "eligibility_status": value["eligibility_status"],
+                "eligibility_message": value["eligibility_message"],
+                "summary_data": value["summary"],
+                "major_requirements": value["major_requirements"],
+                "igetc_status": value["igetc_status"],
+                "risks": value["risks"],
+                "notes": value.get("notes"),
+                "sources": value["sources"],
+                "disclaimer": value.get("disclaimer"),
+                **{name: value.get(name) for name in OPTIONAL_RESULT_FIELDS},
+            }] if value else [])
+        elif field != "email":
+            raise ValueError(f"Unsupported user field: {field}")
+
+
+def course_document(course: TranscriptCourse) -> Dict:
+    """A transcript_courses row as a transcript course dict"""
+    document = {name: getattr(course, name) for name in COURSE_FIELDS}
+    for name in OPTIONAL_COURSE_FIELDS:
+        if getattr(course, name) is not None:
+            document[name] = getattr(course, name)
+    return document
+
+
+def result_document(result: VerificationResult) -> Dict:
+    """A verification_results row in the API's result shape"""
+    document = {
+        "eligibility_status": result.eligibility_status,
+        "eligibility_message": result.eligibility_message,
+        "summary": result.summary_data,
+        "major_requirements": result.major_requirements,
+        "igetc_status": result.igetc_status,
+        "risks": result.risks,
+        "notes": result.notes,
+        "sources": result.sources,
+        "disclaimer": result.disclaimer,
+    }
+    for name in OPTIONAL_RESULT_FIELDS:
+        if getattr(result, name) is not None:
+            document[name] = getattr(result, name)
+    return document
+
+
+def _to_document(user: User) -> Dict[str, Any]:
+    """Rebuild the user document the API expects from a loaded user row"""
+    document = {
+        "email": user.email,
+        "name": user.name,
+        "major": user.major,
+        "community_college": user.community_college,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "transcript": [
+            course_document(course)
+            for course in sorted(user.transcript_courses, key=lambda course: course.id)
+        ],
+        "target_uc": user.target_uc,
+        "target_major": user.target_major,
+        "verification_results": None,
+    }
+    if user.verification_results:
+        document["verification_results"] = result_document(
+            max(user.verification_results, key=lambda row: row.id)
+        )
+    if user.verification_key is not None:
+        document["verification_key"] = user.verification_key
+    if user.verification_state is not None:
+        document["verification_state"] = user.verification_state
+    return document
@@ -0,0 +1,85 @@
+"""
+User Storage
+Backend-neutral async interface to user documents, with Firestore and SQL
+implementations selected by configuration
+"""
+
+import asyncio
+import functools
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+# Storage backend: "firestore" (default) or "sql" (DATABASE_URL)
+USER_STORE_BACKEND = os.getenv("USER_STORE", "firestore")
+
+
+class UserStore(ABC):
+    """
+    Async access to user documents
+
+    A user document is the dict the API works with: profile fields, the
+    target campus and major, 'transcript' (a list of course dicts) and the
+    latest verification results, key and accumulated state. Backends wrap
+    a blocking client, so every call runs on a bounded thread pool and a
+    slow read or write never stalls the event loop.
+    """
+
+    def __init__(self, max_concurrency: int, thread_name_prefix: str):
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix=thread_name_prefix,
+        )
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking client call on the store's thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    @property
+    @abstractmethod
+    def connected(self) -> bool:
+        """Whether the backend client has been created"""
+
+    @abstractmethod
+    async def connect(self) -> None:
+        """Create the backend client ahead of the first request"""
+
+    @abstractmethod
+    async def get_user(self, email: str) -> Optional[Dict]:
+        """Fetch a user document, or None if it doesn't exist"""
+
+    @abstractmethod
+    async def create_user(self, email: str, data: Dict) -> None:
+        """Create or overwrite a user document"""
+
+    @abstractmethod
+    async def update_user(self, email: str, data: Dict) -> None:
+        """Update fields on an existing user document"""
+
+    @abstractmethod
+    async def get_users(self, emails: List[str]) -> Dict[str, Dict]:
+        """Fetch many user documents, keyed by email; missing users are omitted"""
+
+    @abstractmethod
+    async def update_users(self, updates: Dict[str, Dict]) -> None:
+        """Apply field updates to many existing user documents"""
+
+    def shutdown(self) -> None:
+        """Release the store's thread pool"""
+        self._executor.shutdown(wait=False)
+
+
+def create_user_store(backend: str = USER_STORE_BACKEND) -> UserStore:
+    """Build the configured store; backend modules are imported on demand"""
+    if backend == "firestore":
+        from app.db.firestore_store import FirestoreUserStore
+        return FirestoreUserStore()
+    if backend == "sql":
+        from app.db.sql_store import SQLUserStore
+        return SQLUserStore()
+    raise ValueError(f"Unknown USER_STORE backend: {backend}")
@@ -3,28 +3,120 @@ UC Transfer Path Verifier - Main FastAPI Application
 A tool to help California community college students verify their UC transfer eligibility
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List, Dict, Any
+from contextlib import asynccontextmanager
 from datetime import datetime
+from functools import lru_cache
+import asyncio
 import json
+import logging
+import os
+import time
+
+from app.db.user_store import create_user_store
+from app.services.autocomplete import ENTRY_TYPES, AutocompleteIndex
+from app.services.cache import VerificationCache
+from app.services.course_planner import PLAN_TERM_UNITS, CoursePlanner, plan_for_state
+from app.services.explanations import ExplanationService, sse_events
+from app.services.incremental import TranscriptAccumulator
+from app.services.llm import create_llm_client
+from app.services.http_cache import (
+    REFERENCE_CACHE_CONTROL,
+    EncodedJSON,
+    PrecompressedJSON,
+    conditional_json,
+)
+from app.services.major_fit import MajorFitIndex
+from app.services.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    REGISTRY as METRICS,
+    MetricsMiddleware,
+    Samples,
+    stage_clock,
+    timed_operation,
+)
+from app.services.reference_data import (
+    CATALOG_FILES,
+    CatalogFilterError,
+    UnknownCampusError,
+    filter_catalog,
+)
+from app.services.requirement_index import CampusRequirements
+from app.services.requirements_data import ASSIST_EQUIVALENCIES, UC_CAMPUSES, UC_REQUIREMENTS
+from app.services.snapshot import REFERENCE_SNAPSHOT, open_snapshot
+from app.services.transcript_import import (
+    TranscriptImportError,
+    UploadTooLarge,
+    read_transcript_upload,
+)
+from app.services.verification import (
+    BatchVerifier,
+    VerificationError,
+    render_verification,
+    resolve_target,
+    user_verification_key,
+    verify_all_campuses,
+)
 
-import firebase_admin
-from firebase_admin import credentials, firestore
-
-# Initialize Firebase Admin if not already done
-if not firebase_admin._apps:
-    firebase_admin.initialize_app()
-
-db = firestore.client()
-
+logger = logging.getLogger(__name__)
+
+# Non-blocking access to user documents (USER_STORE=firestore or sql). The
+# backend client is created on first use, so importing the app stays cheap
+store = create_user_store()
+
+# Seconds between storage connection attempts while not ready
+STORAGE_RETRY_SECONDS = float(os.getenv("STORAGE_RETRY_SECONDS", "5"))
+
+# Startup progress, reported by the readiness probe
+readiness: Dict[str, Any] = {"reference_data": False, "storage": False, "error": None}
+
+
+async def warm_up():
+    """Compile reference data, then connect storage, recording readiness"""
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(warm_reference_data)
+    except Exception as e:
+        readiness["error"] = f"reference data: {e}"
+        logger.exception("Failed to load reference data")
+        return
+    readiness["reference_data"] = True
+
+    while not store.connected:
+        try:
+            await store.connect()
+        except Exception as e:
+            readiness["error"] = f"storage: {e}"
+            logger.warning("Storage not available, retrying: %s", e)
+            await asyncio.sleep(STORAGE_RETRY_SECONDS)
+    readiness["storage"] = True
+    readiness["error"] = None
+    logger.info("Ready after %.0f ms", (time.perf_counter() - started) * 1000)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so the liveness probe answers immediately;
+    # the readiness probe holds traffic back until warm-up completes
+    warmup = asyncio.create_task(warm_up())
+    yield
+    warmup.cancel()
+    if get_batch_verifier.cache_info().currsize:
+        get_batch_verifier().shutdown()
+    if get_explanation_service.cache_info().currsize:
+        await get_explanation_service().close()
+    store.shutdown()
 
 
 app = FastAPI(
     title="UC Transfer Path Verifier",
     description="Verify your UC transfer eligibility using official sources",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware for React frontend
@@ -36,6 +128,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so request latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
+
 # In-memory sessions (for demo, not used for persistent user data)
 sessions_db: Dict[str, str] = {}
 
@@ -63,6 +158,7 @@ class TranscriptCourse(BaseModel):
     units: float
     grade: str
     semester: str
+    college: Optional[str] = None  # when taken at another community college
 
 
 class TranscriptUpload(BaseModel):
@@ -70,138 +166,189 @@ class TranscriptUpload(BaseModel):
     courses: List[TranscriptCourse]
 
 
+class InlineTranscript(BaseModel):
+    id: str
+    community_college: str
+    target_major: str
+    target_uc: str = "UCSC"
+    courses: List[TranscriptCourse]
+
+
+class BatchVerifyRequest(BaseModel):
+    emails: List[str] = []
+    transcripts: List[InlineTranscript] = []
+
+
 class UCSelection(BaseModel):
     user_email: str
     target_uc: str  # For demo, only "UCSC"
     target_major: str
 
 
-# ===================== UCSC TRANSFER REQUIREMENTS DATA =====================
-# This is mock data based on real UCSC requirements - in production, fetch from official sources
-
-UCSC_REQUIREMENTS = {
-    "Computer Science": {
-        "required_courses": [
-            {"name": "Calculus I", "equivalent_codes": ["MATH 1A", "MATH 3A", "MATH 181"]},
-            {"name": "Calculus II", "equivalent_codes": ["MATH 1B", "MATH 3B", "MATH 182"]},
-            {"name": "Linear Algebra", "equivalent_codes": ["MATH 21", "MATH 6", "MATH 250"]},
-            {"name": "Introduction to Programming", "equivalent_codes": ["CS 1A", "CIS 22A", "COMSC 110"]},
-            {"name": "Data Structures", "equivalent_codes": ["CS 1B", "CIS 22B", "COMSC 165"]},
-            {"name": "Discrete Mathematics", "equivalent_codes": ["CS 18", "CIS 18", "MATH 55"]},
-            {"name": "Physics I (Mechanics)", "equivalent_codes": ["PHYS 4A", "PHYS 1A", "PHYSIC 4A"]},
-        ],
-        "igetc_areas": {
-            "1A": {"name": "English Composition", "required": True},
-            "1B": {"name": "Critical Thinking", "required": True},
-            "2": {"name": "Mathematical Concepts", "required": True},
-            "3A": {"name": "Arts", "required": True},
-            "3B": {"name": "Humanities", "required": True},
-            "4": {"name": "Social Sciences", "required": True, "courses_needed": 3},
-            "5A": {"name": "Physical Science", "required": True},
-            "5B": {"name": "Biological Science", "required": True},
-            "5C": {"name": "Lab Science", "required": True},
-            "6A": {"name": "Language Other Than English", "required": True},
-        },
-        "min_gpa": 3.0,
-        "min_units": 60,
-        "max_units": 90,
-        "notes": [
-            "Selection to the major is highly competitive",
-            "A GPA above 3.4 is recommended for competitive applicants",
-            "All major prep courses should be completed with C or better",
-        ],
-        "source_url": "https://admissions.ucsc.edu/transfer/requirements"
-    },
-    "Biology": {
-        "required_courses": [
-            {"name": "General Chemistry I", "equivalent_codes": ["CHEM 1A", "CHEM 101"]},
-            {"name": "General Chemistry II", "equivalent_codes": ["CHEM 1B", "CHEM 102"]},
-            {"name": "Organic Chemistry I", "equivalent_codes": ["CHEM 12A", "CHEM 201"]},
-            {"name": "Biology I", "equivalent_codes": ["BIOL 1A", "BIO 101", "BIOSCI 101"]},
-            {"name": "Biology II", "equivalent_codes": ["BIOL 1B", "BIO 102", "BIOSCI 102"]},
-            {"name": "Calculus I", "equivalent_codes": ["MATH 1A", "MATH 3A", "MATH 181"]},
-            {"name": "Physics I", "equivalent_codes": ["PHYS 4A", "PHYS 1A", "PHYSIC 4A"]},
-        ],
-        "igetc_areas": {
-            "1A": {"name": "English Composition", "required": True},
-            "1B": {"name": "Critical Thinking", "required": True},
-            "2": {"name": "Mathematical Concepts", "required": True},
-            "3A": {"name": "Arts", "required": True},
-            "3B": {"name": "Humanities", "required": True},
-            "4": {"name": "Social Sciences", "required": True, "courses_needed": 3},
-            "5A": {"name": "Physical Science", "required": True},
-            "5B": {"name": "Biological Science", "required": True},
-            "5C": {"name": "Lab Science", "required": True},
-            "6A": {"name": "Language Other Than English", "required": True},
-        },
-        "min_gpa": 2.8,
-        "min_units": 60,
-        "max_units": 90,
-        "notes": [
-            "Strong performance in science courses is expected",
-            "Research experience is recommended but not required",
-        ],
-        "source_url": "https://admissions.ucsc.edu/transfer/requirements"
-    },
-    "Psychology": {
-        "required_courses": [
-            {"name": "Introduction to Psychology", "equivalent_codes": ["PSYCH 1", "PSYCH 101", "PSY 1A"]},
-            {"name": "Statistics", "equivalent_codes": ["STAT 1", "MATH 10", "PSYCH 7"]},
-            {"name": "Research Methods", "equivalent_codes": ["PSYCH 2", "PSY 2"]},
-        ],
-        "igetc_areas": {
-            "1A": {"name": "English Composition", "required": True},
-            "1B": {"name": "Critical Thinking", "required": True},
-            "2": {"name": "Mathematical Concepts", "required": True},
-            "3A": {"name": "Arts", "required": True},
-            "3B": {"name": "Humanities", "required": True},
-            "4": {"name": "Social Sciences", "required": True, "courses_needed": 3},
-            "5A": {"name": "Physical Science", "required": True},
-            "5B": {"name": "Biological Science", "required": True},
-            "5C": {"name": "Lab Science", "required": True},
-            "6A": {"name": "Language Other Than English", "required": True},
-        },
-        "min_gpa": 2.5,
-        "min_units": 60,
-        "max_units": 90,
-        "notes": [
-            "Biology courses are recommended as preparation",
-        ],
-        "source_url": "https://admissions.ucsc.edu/transfer/requirements"
-    }
-}
-
-# Sample course equivalencies (mock Assist.org data)
-ASSIST_EQUIVALENCIES = {
-    "De Anza College": {
-        "MATH 1A": {"uc_equivalent": "MATH 19A", "units": 5, "igetc": ["2", "5A"]},
-        "MATH 1B": {"uc_equivalent": "MATH 19B", "units": 5, "igetc": ["2"]},
-        "MATH 21": {"uc_equivalent": "MATH 21", "units": 5, "igetc": []},
-        "CIS 22A": {"uc_equivalent": "CSE 20", "units": 4.5, "igetc": []},
-        "CIS 22B": {"uc_equivalent": "CSE 30", "units": 4.5, "igetc": []},
-        "PHYS 4A": {"uc_equivalent": "PHYS 6A", "units": 5, "igetc": ["5A", "5C"]},
-        "EWRT 1A": {"uc_equivalent": "Writing 1", "units": 5, "igetc": ["1A"]},
-        "EWRT 2": {"uc_equivalent": "Writing 2", "units": 5, "igetc": ["1B"]},
-        "BIOL 6A": {"uc_equivalent": "BIOE 20A", "units": 5, "igetc": ["5B", "5C"]},
-        "CHEM 1A": {"uc_equivalent": "CHEM 1A", "units": 5, "igetc": ["5A", "5C"]},
-        "CHEM 1B": {"uc_equivalent": "CHEM 1B", "units": 5, "igetc": ["5A"]},
-    },
-    "Foothill College": {
-        "MATH 1A": {"uc_equivalent": "MATH 19A", "units": 5, "igetc": ["2", "5A"]},
-        "MATH 1B": {"uc_equivalent": "MATH 19B", "units": 5, "igetc": ["2"]},
-        "CS 1A": {"uc_equivalent": "CSE 20", "units": 4.5, "igetc": []},
-        "CS 1B": {"uc_equivalent": "CSE 30", "units": 4.5, "igetc": []},
-        "ENGL 1A": {"uc_equivalent": "Writing 1", "units": 5, "igetc": ["1A"]},
-        "PSYC 1": {"uc_equivalent": "PSYC 1", "units": 5, "igetc": ["4"]},
-    },
-    "Mission College": {
-        "MATH 3A": {"uc_equivalent": "MATH 19A", "units": 5, "igetc": ["2", "5A"]},
-        "MATH 3B": {"uc_equivalent": "MATH 19B", "units": 5, "igetc": ["2"]},
-        "COMSC 110": {"uc_equivalent": "CSE 20", "units": 4, "igetc": []},
-        "COMSC 165": {"uc_equivalent": "CSE 30", "units": 4, "igetc": []},
-        "ENGL 1A": {"uc_equivalent": "Writing 1", "units": 4, "igetc": ["1A"]},
-    }
-}
+# ===================== REFERENCE DATA =====================
+
+# Built on first use and warmed at startup, before the readiness probe passes
+
+@lru_cache(maxsize=None)
+def get_campus_requirements():
+    """
+    Inverted requirement indexes per campus: mapped from the compiled
+    snapshot when REFERENCE_SNAPSHOT is set, otherwise compiled from the
+    bundled data
+    """
+    if REFERENCE_SNAPSHOT:
+        return open_snapshot(REFERENCE_SNAPSHOT).campus_requirements()
+    return CampusRequirements(
+        UC_REQUIREMENTS,
+        ASSIST_EQUIVALENCIES,
+        {campus["id"]: campus["name"] for campus in UC_CAMPUSES},
+    )
+
+
+@lru_cache(maxsize=None)
+def get_major_fit_index() -> MajorFitIndex:
+    """Shared requirement nodes for ranking every UC/CSU major"""
+    return MajorFitIndex.from_reference_data(get_campus_requirements().requirements["ucsc"])
+
+
+@lru_cache(maxsize=None)
+def get_autocomplete_index() -> AutocompleteIndex:
+    """Prefix index over major and college names for search suggestions"""
+    return AutocompleteIndex.from_reference_data()
+
+
+@lru_cache(maxsize=None)
+def get_explanation_service() -> ExplanationService:
+    """LLM explanations of stored results (LLM_BACKEND, stub by default)"""
+    return ExplanationService(create_llm_client())
+
+
+@lru_cache(maxsize=None)
+def get_batch_verifier() -> BatchVerifier:
+    """Cohort verification pool (worker processes start on first large batch)"""
+    return BatchVerifier(get_campus_requirements())
+
+
+PLANNER_CACHE_SIZE = int(os.getenv("PLANNER_CACHE_SIZE", "1024"))
+
+
+@lru_cache(maxsize=PLANNER_CACHE_SIZE)
+def get_course_planner(campus: str, major: str, college: str) -> CoursePlanner:
+    """Planning tables for a campus major and the courses a college offers"""
+    campuses = get_campus_requirements()
+    return CoursePlanner(
+        campuses.requirements[campus][major],
+        campuses.indexes[campus].plans[major],
+        campuses.college_courses(college),
+    )
+
+
+@lru_cache(maxsize=None)
+def reference_body(name: str) -> PrecompressedJSON:
+    """Encoded, compressed body of a static reference endpoint, built once per process"""
+    if name == "colleges":
+        return PrecompressedJSON({"colleges": COMMUNITY_COLLEGES})
+    campuses = get_campus_requirements()
+    if name == "majors":
+        return PrecompressedJSON({"majors": list(campuses.requirements["ucsc"].keys())})
+    return PrecompressedJSON({
+        "campuses": [
+            {**campus, "available": campus["id"] in campuses.requirements}
+            for campus in UC_CAMPUSES
+        ]
+    })
+
+
+def warm_reference_data() -> None:
+    get_campus_requirements().course_codes
+    get_major_fit_index()
+    get_autocomplete_index()
+    get_batch_verifier()
+    for name in ("colleges", "majors", "uc-campuses"):
+        reference_body(name)
+    for name in CATALOG_FILES:
+        catalog_body(name, None, None)
+
+
+def catalog_key(name: str, campus: Optional[str], category: Optional[str]) -> str:
+    return json.dumps([name, campus, category])
+
+
+def catalog_body(
+    name: str,
+    campus: Optional[str],
+    category: Optional[str]
+) -> PrecompressedJSON:
+    """Encoded, compressed body of a (filtered) catalog, cached by filter"""
+    key = catalog_key(name, campus, category)
+    body = catalog_bodies.get(key)
+    if body is None:
+        body = PrecompressedJSON(filter_catalog(name, campus, category))
+        catalog_bodies.put(key, body)
+    return body
+
+
+MAX_BATCH_VERIFY = 10000
+
+COMMUNITY_COLLEGES = [
+    "De Anza College",
+    "Foothill College",
+    "Mission College",
+    "West Valley College",
+    "Ohlone College",
+    "San Jose City College",
+    "Evergreen Valley College",
+]
+
+# Content-addressed cache of verification results
+verification_cache = VerificationCache()
+
+# Encoded search responses; suggestion queries repeat across users
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "8192"))
+SEARCH_MAX_LIMIT = 50
+
+
+@lru_cache(maxsize=SEARCH_CACHE_SIZE)
+def search_body(
+    query: str,
+    types: Optional[tuple],
+    campus: Optional[str],
+    category: Optional[str],
+    limit: int
+) -> EncodedJSON:
+    return EncodedJSON(get_autocomplete_index().search(query, types, campus, category, limit))
+
+# Encoded catalog responses by filter; full catalogs are built at warm-up
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "512"))
+catalog_bodies = VerificationCache(max_entries=CATALOG_CACHE_SIZE, ttl_seconds=float("inf"))
+
+
+def cache_metrics():
+    """Hit, miss and size counters of the response and result caches, read at scrape time"""
+    stats = {"verification": verification_cache.stats(), "catalog": catalog_bodies.stats()}
+    if get_explanation_service.cache_info().currsize:
+        stats["explanation"] = get_explanation_service().cache.stats()
+    for name, cached in (("search", search_body), ("course_planner", get_course_planner)):
+        info = cached.cache_info()
+        lookups = info.hits + info.misses
+        stats[name] = {
+            "size": info.currsize,
+            "hits": info.hits,
+            "misses": info.misses,
+            "hit_rate": info.hits / lookups if lookups else 0.0,
+        }
+
+    def samples(field: str) -> Samples:
+        return [({"cache": name}, cache[field]) for name, cache in stats.items() if field in cache]
+
+    yield "cache_hits_total", "counter", "Cache lookups that found an entry", samples("hits")
+    yield "cache_misses_total", "counter", "Cache lookups that found no entry", samples("misses")
+    yield "cache_evictions_total", "counter", "Entries evicted to make room", samples("evictions")
+    yield "cache_entries", "gauge", "Entries currently cached", samples("size")
+    yield "cache_hit_ratio", "gauge", "Hits over lookups since start", samples("hit_rate")
+
+
+METRICS.collector(cache_metrics)
 
 
 # ===================== API ENDPOINTS =====================
@@ -211,12 +358,30 @@ async def root():
     return {"message": "UC Transfer Path Verifier API", "status": "online"}
 
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is serving requests"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness_probe():
+    """Readiness probe: reference data is warm and storage is connected"""
+    if not (readiness["reference_data"] and readiness["storage"]):
+        raise HTTPException(status_code=503, detail=readiness)
+    return {"status": "ready", **readiness}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: request latency, in-flight requests, stage timings, caches"""
+    return Response(METRICS.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.post("/api/auth/register")
 async def register_user(user: UserCreate):
     """Register a new user after Google OAuth"""
-    user_ref = db.collection("users").document(user.email)
-    doc = user_ref.get()
-    if doc.exists:
+    if await store.get_user(user.email) is not None:
         raise HTTPException(status_code=400, detail="User already exists")
     user_data = {
         "email": user.email,
@@ -229,90 +394,140 @@ async def register_user(user: UserCreate):
         "target_major": user.major,
         "verification_results": None
     }
-    user_ref.set(user_data)
+    await store.create_user(user.email, user_data)
     return {"success": True, "user": user_data}
 
 
 @app.get("/api/auth/user/{email}")
 async def get_user(email: str):
     """Get user profile by email"""
-    user_ref = db.collection("users").document(email)
-    doc = user_ref.get()
-    if not doc.exists:
+    user_data = await store.get_user(email)
+    if user_data is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return doc.to_dict()
+    return user_data
 
 
 @app.put("/api/auth/user/{email}")
 async def update_user(email: str, user: UserCreate):
     """Update user profile"""
-    user_ref = db.collection("users").document(email)
-    doc = user_ref.get()
-    if not doc.exists:
+    if await store.get_user(email) is None:
         raise HTTPException(status_code=404, detail="User not found")
     update_data = {
         "name": user.name,
         "major": user.major,
         "community_college": user.community_college,
     }
-    user_ref.update(update_data)
+    await store.update_user(email, update_data)
     # Return updated user
-    updated_doc = user_ref.get()
-    return updated_doc.to_dict()
+    return await store.get_user(email)
 
 
 @app.get("/api/colleges")
-async def get_community_colleges():
+async def get_community_colleges(request: Request):
     """Get list of supported community colleges"""
-    return {
-        "colleges": [
-            "De Anza College",
-            "Foothill College", 
-            "Mission College",
-            "West Valley College",
-            "Ohlone College",
-            "San Jose City College",
-            "Evergreen Valley College",
-        ]
-    }
+    return conditional_json(request, reference_body("colleges"), REFERENCE_CACHE_CONTROL)
 
 
 @app.get("/api/majors")
-async def get_supported_majors():
+async def get_supported_majors(request: Request):
     """Get list of supported majors for UCSC"""
-    return {
-        "majors": list(UCSC_REQUIREMENTS.keys())
-    }
+    return conditional_json(request, reference_body("majors"), REFERENCE_CACHE_CONTROL)
+
+
+@app.get("/api/catalogs/{name}")
+async def get_catalog(
+    name: str,
+    request: Request,
+    campus: Optional[str] = None,
+    category: Optional[str] = None
+):
+    """
+    Get a reference catalog (community-colleges, cc-majors, uc-campuses,
+    uc-majors, csu-campuses, csu-majors), optionally filtered by campus
+    and/or category. Bodies are encoded and compressed once, then reused
+    """
+    name = name.replace("-", "_")
+    if name not in CATALOG_FILES:
+        raise HTTPException(status_code=404, detail=f"Unknown catalog: {name}")
+    campus = campus.strip().lower() if campus else None
+    category = category.strip().lower() if category else None
+    try:
+        body = catalog_bodies.get(catalog_key(name, campus, category))
+        if body is None:
+            # Filtering and compressing a new variant is too slow for the event loop
+            body = await asyncio.to_thread(catalog_body, name, campus, category)
+    except CatalogFilterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UnknownCampusError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return conditional_json(request, body, REFERENCE_CACHE_CONTROL)
+
+
+@app.get("/api/search")
+async def search_reference(
+    request: Request,
+    q: str = "",
+    type: Optional[str] = None,
+    campus: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = 10
+):
+    """
+    Autocomplete over UC/CSU/ADT majors and community colleges
+    type is a comma-separated subset of uc_major, csu_major, cc_major and
+    college; campus and category narrow the matches. Returns ranked
+    results plus type, category and campus facet counts
+    """
+    types = None
+    if type:
+        types = tuple(sorted({value.strip().replace("-", "_") for value in type.split(",") if value.strip()}))
+        unknown = [value for value in types if value not in ENTRY_TYPES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown type: {', '.join(unknown)}")
+    body = search_body(
+        q.strip().lower()[:100],
+        types,
+        campus.strip().lower() if campus else None,
+        category.strip().lower() if category else None,
+        min(max(limit, 0), SEARCH_MAX_LIMIT),
+    )
+    return conditional_json(request, body, REFERENCE_CACHE_CONTROL)
+
+
+@app.get("/api/majors/rank/{email}")
+async def rank_majors(email: str, system: Optional[str] = None, limit: int = 50):
+    """Rank UC and CSU majors by how close the user's transcript is to their prep"""
+    if system is not None and system.upper() not in ("UC", "CSU"):
+        raise HTTPException(status_code=400, detail="system must be 'uc' or 'csu'")
+    user = await store.get_user(email)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    ranked = get_major_fit_index().rank(
+        user.get("transcript") or [],
+        system=system.upper() if system else None,
+        limit=max(0, limit),
+    )
+    return {"majors": ranked}
 
 
 @app.get("/api/uc-campuses")
-async def get_uc_campuses():
-    """Get list of UC campuses (demo: only UCSC)"""
-    return {
-        "campuses": [
-            {"id": "ucsc", "name": "UC Santa Cruz", "available": True},
-            {"id": "ucb", "name": "UC Berkeley", "available": False},
-            {"id": "ucla", "name": "UCLA", "available": False},
-            {"id": "ucsd", "name": "UC San Diego", "available": False},
-            {"id": "ucd", "name": "UC Davis", "available": False},
-            {"id": "uci", "name": "UC Irvine", "available": False},
-            {"id": "ucr", "name": "UC Riverside", "available": False},
-            {"id": "ucsb", "name": "UC Santa Barbara", "available": False},
-            {"id": "ucm", "name": "UC Merced", "available": False},
-        ]
-    }
+async def get_uc_campuses(request: Request):
+    """Get list of UC campuses and whether requirements data is available"""
+    return conditional_json(request, reference_body("uc-campuses"), REFERENCE_CACHE_CONTROL)
 
 
 @app.post("/api/select-uc")
 async def select_target_uc(selection: UCSelection):
     """Select target UC campus"""
-    user_ref = db.collection("users").document(selection.user_email)
-    doc = user_ref.get()
-    if not doc.exists:
+    campuses = get_campus_requirements()
+    if await store.get_user(selection.user_email) is None:
         raise HTTPException(status_code=404, detail="User not found")
-    if selection.target_uc.lower() != "ucsc":
-        raise HTTPException(status_code=400, detail="Only UCSC is available in demo")
-    user_ref.update({
+    if selection.target_uc.lower() not in campuses.requirements:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{campuses.name(selection.target_uc.lower())} is not available yet"
+        )
+    await store.update_user(selection.user_email, {
         "target_uc": selection.target_uc,
         "target_major": selection.target_major
     })
@@ -320,227 +535,312 @@ async def select_target_uc(selection: UCSelection):
 
 
 @app.post("/api/transcript/upload")
+@timed_operation("upload")
 async def upload_transcript(transcript: TranscriptUpload):
     """Upload/enter transcript courses"""
-    user_ref = db.collection("users").document(transcript.user_email)
-    doc = user_ref.get()
-    if not doc.exists:
-        raise HTTPException(status_code=404, detail="User not found")
-    user_ref.update({
-        "transcript": [course.dict() for course in transcript.courses]
-    })
+    await save_transcript(transcript.user_email, [course.dict(exclude_none=True) for course in transcript.courses])
     return {"success": True, "courses_count": len(transcript.courses)}
 
 
-@app.get("/api/transcript/{email}")
-async def get_transcript(email: str):
-    """Get user's transcript"""
-    user_ref = db.collection("users").document(email)
-    doc = user_ref.get()
-    if not doc.exists:
-        raise HTTPException(status_code=404, detail="User not found")
-    user_data = doc.to_dict()
-    return {"courses": user_data.get("transcript", [])}
-
-
-@app.post("/api/verify/{email}")
-async def verify_transfer_eligibility(email: str):
+@app.post("/api/transcript/upload-file")
+@timed_operation("upload")
+async def upload_transcript_file(request: Request, user_email: Optional[str] = None):
     """
-    Main verification endpoint - checks transcript against requirements
-    Uses mock Assist.org data and UCSC requirements
+    Upload a transcript file (CSV or a text export) as multipart form data
+    The file part is named 'file'; user_email is a form field or query
+    parameter. Rows are parsed as the upload streams in, and rows that
+    fail validation are skipped and reported with their line numbers
     """
-    user_ref = db.collection("users").document(email)
-    doc = user_ref.get()
-    if not doc.exists:
-        raise HTTPException(status_code=404, detail="User not found")
-    user = doc.to_dict()
+    try:
+        upload = await read_transcript_upload(
+            request.headers.get("content-type", ""), request.stream()
+        )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except TranscriptImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    email = upload.fields.get("user_email") or user_email
+    if not email:
+        raise HTTPException(status_code=400, detail="user_email is required")
+    if not upload.courses:
+        raise HTTPException(status_code=422, detail={
+            "message": "No valid courses found in the uploaded file",
+            "errors": upload.errors,
+        })
 
-    if not user.get("target_uc"):
-        raise HTTPException(status_code=400, detail="Please select a target UC first")
+    await save_transcript(email, upload.courses)
+    return {
+        "success": True,
+        "courses_count": len(upload.courses),
+        "rows": upload.rows,
+        "skipped": upload.skipped,
+        "errors": upload.errors,
+    }
 
-    if not user.get("transcript"):
-        raise HTTPException(status_code=400, detail="Please upload your transcript first")
 
-    major = user.get("target_major", user.get("major", "Computer Science"))
-    if major not in UCSC_REQUIREMENTS:
-        raise HTTPException(status_code=400, detail=f"Major '{major}' not supported in demo")
+async def save_transcript(email: str, courses: List[Dict]) -> None:
+    """Store a transcript, keeping the persisted verification state in step"""
+    clock = stage_clock()
+    campuses = get_campus_requirements()
+    user = await store.get_user(email)
+    clock.lap("storage_read")
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    old_courses = user.get("transcript") or []
+    user["transcript"] = courses
+    update = {"transcript": user["transcript"]}
+
+    # Apply only the changed courses to the persisted verification state
+    try:
+        campus, major = resolve_target(user, campuses)
+    except VerificationError:
+        campus = None
+    if campus is None:
+        # The state no longer follows the transcript; the next run rebuilds it
+        update["verification_state"] = None
+        update["verification_key"] = None
+    else:
+        college = user["community_college"]
+        index = campuses.indexes[campus]
+        state = TranscriptAccumulator.load(
+            user.get("verification_state"), index, college, major, old_courses
+        )
+        if state is None:
+            state = TranscriptAccumulator.from_transcript(
+                user["transcript"], index, college, major
+            )
+        else:
+            state.apply(old_courses, user["transcript"])
+        update["verification_state"] = state.to_dict(user["transcript"])
+        clock.lap("state_save")
+
+        # Keep an existing verification live as the student edits courses
+        if user.get("verification_results"):
+            key = user_verification_key(user, campuses.version)
+            result = render_verification(
+                state, campuses.requirements[campus][major], campuses.name(campus),
+                campuses.course_codes
+            )
+            verification_cache.put(key, result)
+            update["verification_results"] = result
+            update["verification_key"] = key
+
+    await store.update_user(email, update)
+    clock.lap("storage_write")
 
-    requirements = UCSC_REQUIREMENTS[major]
-    college = user["community_college"]
-    transcript = user["transcript"]
-
-    # Get course equivalencies for the college
-    equivalencies = ASSIST_EQUIVALENCIES.get(college, {})
-
-    # Analyze completed courses
-    completed_codes = [c["course_code"].upper() for c in transcript]
-    total_units = sum(c["units"] for c in transcript)
-
-    # Calculate GPA
-    grade_points = {"A": 4.0, "A-": 3.7, "B+": 3.3, "B": 3.0, "B-": 2.7,
-                   "C+": 2.3, "C": 2.0, "C-": 1.7, "D+": 1.3, "D": 1.0, "F": 0.0}
-
-    total_grade_points = 0
-    graded_units = 0
-    for course in transcript:
-        grade = course["grade"].upper()
-        if grade in grade_points:
-            total_grade_points += grade_points[grade] * course["units"]
-            graded_units += course["units"]
-
-    gpa = total_grade_points / graded_units if graded_units > 0 else 0.0
-
-    # Check major requirements
-    major_requirements_status = []
-    for req in requirements["required_courses"]:
-        completed = False
-        matched_course = None
-
-        for code in req["equivalent_codes"]:
-            if code.upper() in completed_codes:
-                completed = True
-                matched_course = code
-                break
-
-        major_requirements_status.append({
-            "requirement": req["name"],
-            "completed": completed,
-            "matched_course": matched_course,
-            "acceptable_courses": req["equivalent_codes"],
-        })
 
-    # Check IGETC areas
-    igetc_status = {}
-    completed_igetc = set()
+@app.get("/api/transcript/{email}")
+async def get_transcript(email: str, request: Request):
+    """Get user's transcript (304 when If-None-Match matches its ETag)"""
+    user_data = await store.get_user(email)
+    if user_data is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return conditional_json(request, {"courses": user_data.get("transcript", [])})
 
-    for code in completed_codes:
-        if code in equivalencies:
-            for area in equivalencies[code].get("igetc", []):
-                completed_igetc.add(area)
 
-    for area, info in requirements["igetc_areas"].items():
-        igetc_status[area] = {
-            "name": info["name"],
-            "completed": area in completed_igetc,
-            "required": info["required"],
+@app.post("/api/verify/batch")
+async def verify_batch(request: BatchVerifyRequest):
+    """
+    Verify a cohort in one call - stored users by email and/or inline transcripts
+    User documents are fetched in bulk, verified on a worker pool, and
+    results for stored users are written back in batched commits
+    """
+    campuses = get_campus_requirements()
+    emails = list(dict.fromkeys(request.emails))
+    if len(emails) + len(request.transcripts) > MAX_BATCH_VERIFY:
+        raise HTTPException(status_code=400, detail=f"Batch is limited to {MAX_BATCH_VERIFY} students")
+
+    stored = await store.get_users(emails)
+    documents = [stored.get(email) for email in emails]
+    documents += [
+        {
+            "community_college": t.community_college,
+            "target_uc": t.target_uc,
+            "target_major": t.target_major,
+            "transcript": [course.dict(exclude_none=True) for course in t.courses],
         }
+        for t in request.transcripts
+    ]
+    ids = emails + [t.id for t in request.transcripts]
+
+    # Serve unchanged transcripts from stored results or the cache
+    keys = [
+        user_verification_key(doc, campuses.version) if doc else None
+        for doc in documents
+    ]
+    outcomes = [None] * len(documents)
+    pending = []
+    for i, (doc, key) in enumerate(zip(documents, keys)):
+        if doc and doc.get("verification_key") == key and doc.get("verification_results"):
+            outcomes[i] = (True, doc["verification_results"])
+            keys[i] = None  # already persisted
+            continue
+        cached = verification_cache.get(key) if key else None
+        if cached is not None:
+            outcomes[i] = (True, cached)
+        else:
+            pending.append(i)
+
+    computed = await get_batch_verifier().verify_many([documents[i] for i in pending])
+    for i, outcome in zip(pending, computed):
+        outcomes[i] = outcome
+        if outcome[0]:
+            verification_cache.put(keys[i], outcome[1])
+
+    # Persist new results for stored users only; inline transcripts are ephemeral
+    await store.update_users({
+        email: {"verification_results": payload, "verification_key": key}
+        for email, key, (ok, payload) in zip(emails, keys, outcomes)
+        if ok and key
+    })
 
-    # Identify risks and warnings
-    risks = []
+    results = [
+        {"id": id_, "success": True, "result": payload} if ok
+        else {"id": id_, "success": False, "detail": payload}
+        for id_, (ok, payload) in zip(ids, outcomes)
+    ]
+    verified = sum(1 for ok, _ in outcomes if ok)
+    return {"verified": verified, "failed": len(outcomes) - verified, "results": results}
 
-    if gpa < requirements["min_gpa"]:
-        risks.append({
-            "type": "GPA",
-            "severity": "high",
-            "message": f"Your GPA ({gpa:.2f}) is below the minimum requirement ({requirements['min_gpa']})",
-            "source": requirements["source_url"]
-        })
-    elif gpa < requirements["min_gpa"] + 0.3:
-        risks.append({
-            "type": "GPA",
-            "severity": "medium",
-            "message": f"Your GPA ({gpa:.2f}) is close to the minimum. A higher GPA improves your chances.",
-            "source": requirements["source_url"]
-        })
 
-    if total_units < requirements["min_units"]:
-        risks.append({
-            "type": "Units",
-            "severity": "high",
-            "message": f"You have {total_units} units but need at least {requirements['min_units']} to transfer",
-            "source": requirements["source_url"]
-        })
+@app.post("/api/verify/{email}")
+@timed_operation("verify")
+async def verify_transfer_eligibility(email: str):
+    """
+    Main verification endpoint - checks transcript against requirements
+    Uses mock Assist.org data and UCSC requirements
+    Stages (storage, cache, matching, rendering) are timed for /metrics
+    """
+    clock = stage_clock()
+    campuses = get_campus_requirements()
+    user = await store.get_user(email)
+    clock.lap("storage_read")
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    if total_units > requirements["max_units"]:
-        risks.append({
-            "type": "Units",
-            "severity": "medium",
-            "message": f"You have {total_units} units which exceeds the {requirements['max_units']} unit cap. Some units may not transfer.",
-            "source": requirements["source_url"]
-        })
+    # Unchanged since the last run: the stored result is still current
+    key = user_verification_key(user, campuses.version)
+    if user.get("verification_key") == key and user.get("verification_results"):
+        clock.lap("cache_lookup")
+        return user["verification_results"]
+
+    update = {"verification_key": key}
+    result = verification_cache.get(key)
+    clock.lap("cache_lookup")
+    if result is None:
+        try:
+            campus, major = resolve_target(user, campuses)
+        except VerificationError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # Uploads keep the accumulated state current; rebuild only if stale
+        college = user["community_college"]
+        index = campuses.indexes[campus]
+        state = TranscriptAccumulator.load(
+            user.get("verification_state"), index, college, major, user["transcript"]
+        )
+        if state is None:
+            state = TranscriptAccumulator.from_transcript(
+                user["transcript"], index, college, major
+            )
+            update["verification_state"] = state.to_dict(user["transcript"])
+            clock.lap("state_save")
+        else:
+            clock.lap("transcript_state")
+        result = render_verification(
+            state, campuses.requirements[campus][major], campuses.name(campus),
+            campuses.course_codes
+        )
+        verification_cache.put(key, result)
+
+    # Store results with the user
+    update["verification_results"] = result
+    await store.update_user(email, update)
+    clock.lap("storage_write")
+    return result
 
-    # Missing major prep courses
-    missing_major_prep = [r for r in major_requirements_status if not r["completed"]]
-    if missing_major_prep:
-        risks.append({
-            "type": "Major Prep",
-            "severity": "high",
-            "message": f"You are missing {len(missing_major_prep)} required major preparation course(s)",
-            "source": "https://assist.org"
-        })
 
-    # Missing IGETC areas
-    missing_igetc = [area for area, info in igetc_status.items()
-                    if info["required"] and not info["completed"]]
-    if missing_igetc:
-        risks.append({
-            "type": "IGETC",
-            "severity": "medium",
-            "message": f"IGETC areas not yet satisfied: {', '.join(missing_igetc)}",
-            "source": "https://assist.org/transfer/institution/113/115"
-        })
+@app.post("/api/verify/{email}/campuses")
+async def verify_all_uc_campuses(email: str):
+    """
+    Verify the user's transcript against every campus offering their major
+    Results are returned per campus and not stored
+    """
+    campuses = get_campus_requirements()
+    user = await store.get_user(email)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    try:
+        return verify_all_campuses(user, campuses)
+    except VerificationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # Overall eligibility determination
-    major_prep_complete = len(missing_major_prep) == 0
-    units_ok = requirements["min_units"] <= total_units <= requirements["max_units"]
-    gpa_ok = gpa >= requirements["min_gpa"]
-
-    if major_prep_complete and units_ok and gpa_ok:
-        eligibility_status = "likely_eligible"
-        eligibility_message = "Based on official requirements, you appear to meet the basic transfer eligibility criteria."
-    elif gpa_ok and units_ok:
-        eligibility_status = "conditional"
-        eligibility_message = "You meet some requirements but have missing coursework. Complete the missing courses before applying."
-    else:
-        eligibility_status = "not_yet_eligible"
-        eligibility_message = "You do not yet meet the transfer requirements. See the issues below."
-
-    # Build the result
-    result = {
-        "eligibility_status": eligibility_status,
-        "eligibility_message": eligibility_message,
-        "summary": {
-            "total_units": total_units,
-            "gpa": round(gpa, 2),
-            "min_gpa_required": requirements["min_gpa"],
-            "units_range": f"{requirements['min_units']}-{requirements['max_units']}",
-            "major": major,
-            "target_uc": "UC Santa Cruz",
-        },
-        "major_requirements": {
-            "completed": [r for r in major_requirements_status if r["completed"]],
-            "missing": missing_major_prep,
-        },
-        "igetc_status": igetc_status,
-        "risks": risks,
-        "notes": requirements["notes"],
-        "sources": {
-            "ucsc_transfer": requirements["source_url"],
-            "assist_org": f"https://assist.org/transfer/institution/113/115",
-            "igetc": "https://assist.org/transfer/igetc",
-        },
-        "disclaimer": "This is a verification tool using official sources. It is NOT official advice. Always confirm with an academic counselor before making decisions."
-    }
 
-    # Store results in Firestore
-    user_ref.update({"verification_results": result})
+@app.get("/api/plan/{email}")
+async def plan_courses(email: str, max_units: float = PLAN_TERM_UNITS):
+    """
+    Plan the fewest courses at the user's college that close their missing
+    major prep and IGETC areas, scheduled into terms of at most max_units
+    """
+    if not 0 < max_units <= 30:
+        raise HTTPException(status_code=400, detail="max_units must be between 0 and 30")
+    campuses = get_campus_requirements()
+    user = await store.get_user(email)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    try:
+        campus, major = resolve_target(user, campuses)
+    except VerificationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    college = user["community_college"]
+    index = campuses.indexes[campus]
+    state = TranscriptAccumulator.load(
+        user.get("verification_state"), index, college, major, user["transcript"]
+    ) or TranscriptAccumulator.from_transcript(user["transcript"], index, college, major)
+    # The search is CPU-bound for up to PLAN_SEARCH_MS, so it runs off the loop
+    result = await asyncio.to_thread(
+        plan_for_state, state, get_course_planner(campus, major, college), max_units
+    )
+    result["target_uc"] = campuses.name(campus)
     return result
 
 
 @app.get("/api/results/{email}")
-async def get_verification_results(email: str):
-    """Get stored verification results"""
-    user_ref = db.collection("users").document(email)
-    doc = user_ref.get()
-    if not doc.exists:
+async def get_verification_results(email: str, request: Request):
+    """Get stored verification results (304 when If-None-Match matches its ETag)"""
+    user = await store.get_user(email)
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user = doc.to_dict()
     results = user.get("verification_results")
     if not results:
         raise HTTPException(status_code=404, detail="No verification results found. Run verification first.")
-    return results
+    return conditional_json(request, results)
+
 
 
+@app.get("/api/explain/{email}")
+async def explain_results(email: str):
+    """
+    Stream an explanation of the user's stored verification results as
+    server-sent events: 'token' events with text, then 'done' with its
+    source (model, cache, fallback or partial). Runs separately from
+    /api/verify, so model latency never delays a verification
+    """
+    user = await store.get_user(email)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    results = user.get("verification_results")
+    if not results:
+        raise HTTPException(status_code=404, detail="No verification results found. Run verification first.")
+    generation = get_explanation_service().explain(user, results)
+    return StreamingResponse(
+        sse_events(generation),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
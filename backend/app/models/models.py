@@ -3,7 +3,7 @@ Database Models for UC Transfer Verifier
 Using SQLAlchemy ORM
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Boolean, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -21,6 +21,9 @@ class User(Base):
     major = Column(String, nullable=False)
     community_college = Column(String, nullable=False)
     target_uc = Column(String, nullable=True)
+    target_major = Column(String, nullable=True)
+    verification_key = Column(String, nullable=True)
+    verification_state = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -40,6 +43,7 @@ class TranscriptCourse(Base):
     units = Column(Float, nullable=False)
     grade = Column(String, nullable=False)
     semester = Column(String, nullable=False)
+    college = Column(String, nullable=True)  # set when taken at another college
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationship
@@ -58,7 +62,10 @@ class VerificationResult(Base):
     major_requirements = Column(JSON, nullable=False)
     igetc_status = Column(JSON, nullable=False)
     risks = Column(JSON, nullable=False)
+    notes = Column(JSON, nullable=True)
     sources = Column(JSON, nullable=False)
+    disclaimer = Column(String, nullable=True)
+    course_suggestions = Column(JSON, nullable=True)  # set when some codes match no known course
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationship
@@ -68,6 +75,10 @@ class VerificationResult(Base):
 class CourseEquivalency(Base):
     """Model for caching Assist.org course equivalencies"""
     __tablename__ = "course_equivalencies"
+    __table_args__ = (
+        # Natural key used by articulation ingestion upserts
+        UniqueConstraint("community_college", "cc_course_code", "uc_campus", "uc_course_code"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     community_college = Column(String, nullable=False, index=True)
@@ -85,6 +96,9 @@ class CourseEquivalency(Base):
 class UCRequirement(Base):
     """Model for storing UC transfer requirements by major"""
     __tablename__ = "uc_requirements"
+    __table_args__ = (
+        UniqueConstraint("uc_campus", "major", "requirement_type"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     uc_campus = Column(String, nullable=False, index=True)
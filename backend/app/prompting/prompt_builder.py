@@ -1,4 +1,6 @@
-from prompting.prompts import USER_PROMPT_TEMPLATE
+from typing import Dict
+
+from app.prompting.prompts import EXPLANATION_PROMPT_TEMPLATE, USER_PROMPT_TEMPLATE
 
 def build_user_prompt(user_data: dict) -> str:
     """
@@ -9,3 +11,32 @@ def build_user_prompt(user_data: dict) -> str:
         user_data.setdefault(key, "N/A")
 
     return USER_PROMPT_TEMPLATE.substitute(**user_data)
+
+
+def build_explanation_prompt(user_data: Dict, result: Dict) -> str:
+    """
+    Prompt for explaining a stored verification result
+    Only facts from the result are included, so the prompt (and its cache
+    key) is the same whenever the result is
+    """
+    summary = result.get("summary", {})
+    requirements = result.get("major_requirements", {})
+    incomplete_igetc = [
+        area for area, info in result.get("igetc_status", {}).items()
+        if info.get("required") and not info.get("completed")
+    ]
+    return EXPLANATION_PROMPT_TEMPLATE.substitute(
+        name=user_data.get("name") or "N/A",
+        community_college=user_data.get("community_college") or "N/A",
+        target_uc=summary.get("target_uc") or user_data.get("target_uc") or "N/A",
+        major=summary.get("major") or user_data.get("major") or "N/A",
+        eligibility_status=result.get("eligibility_status", "unknown"),
+        gpa=summary.get("gpa", "N/A"),
+        min_gpa=summary.get("min_gpa_required", "N/A"),
+        units=summary.get("total_units", "N/A"),
+        units_range=summary.get("units_range", "N/A"),
+        completed=", ".join(r["requirement"] for r in requirements.get("completed", [])) or "none",
+        missing=", ".join(r["requirement"] for r in requirements.get("missing", [])) or "none",
+        igetc=", ".join(incomplete_igetc) or "none",
+        risks="; ".join(r.get("message", "") for r in result.get("risks", [])) or "none",
+    )
@@ -1,15 +1,112 @@
-from app.db import get_db
-from app.models import User
-from sqlalchemy.orm import Session
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-def get_user_dict(user_email: str, db: Session):
-    user = db.query(User).filter(User.email == user_email).first()
-    if not user:
-        return None
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.orm import Session, selectinload
+
+from app.db.sql_store import SQL_IN_CHUNK, course_document, result_document
+from app.models.models import User, VerificationResult
+from app.prompting.prompt_builder import build_explanation_prompt, build_user_prompt
+
+# Built once. Per chunk of emails: the users, their transcripts (one
+# selectin query) and only each user's latest verification result
+LOAD_PROMPT_USERS = (
+    select(User)
+    .where(User.email.in_(bindparam("emails", expanding=True)))
+    .options(selectinload(User.transcript_courses))
+)
 
+LOAD_LATEST_RESULTS = select(VerificationResult).where(
+    VerificationResult.id.in_(
+        select(func.max(VerificationResult.id))
+        .where(VerificationResult.user_id.in_(bindparam("user_ids", expanding=True)))
+        .group_by(VerificationResult.user_id)
+    )
+)
+
+
+def _user_dict(user: User) -> Dict:
     return {
         "name": user.name,
         "community_college": user.community_college,
         "target_uc": user.target_uc or "Not specified",
-        "major": user.major
+        "major": user.major,
     }
+
+
+def get_user_dict(user_email: str, db: Session):
+    user = db.scalars(select(User).where(User.email == user_email)).first()
+    if not user:
+        return None
+
+    return _user_dict(user)
+
+
+def iter_prompt_data(
+    emails: Iterable[str],
+    db: Session,
+    chunk_size: int = SQL_IN_CHUNK
+) -> Iterator[Dict]:
+    """
+    Prompt data for many users in a constant number of queries per chunk
+    Yields, in email order, the user fields plus 'email', 'transcript' and
+    the latest 'verification_results' (or None); unknown emails are
+    skipped. Rows are released after each chunk, so memory is bounded by
+    the chunk size rather than the cohort
+    """
+    chunk: List[str] = []
+    for email in emails:
+        chunk.append(email)
+        if len(chunk) >= chunk_size:
+            yield from _load_chunk(chunk, db)
+            chunk = []
+    if chunk:
+        yield from _load_chunk(chunk, db)
+
+
+def _load_chunk(emails: List[str], db: Session) -> Iterator[Dict]:
+    # Rows the caller already holds stay attached; only this chunk's are released
+    held = set(db.identity_map.keys())
+    users = {user.email: user for user in db.scalars(LOAD_PROMPT_USERS, {"emails": emails})}
+    results = {
+        result.user_id: result
+        for result in db.scalars(LOAD_LATEST_RESULTS, {"user_ids": [user.id for user in users.values()]})
+    } if users else {}
+
+    records = []
+    for email in emails:
+        user = users.get(email)
+        if user is None:
+            continue
+        record = _user_dict(user)
+        record["email"] = email
+        record["transcript"] = [
+            course_document(course)
+            for course in sorted(user.transcript_courses, key=lambda course: course.id)
+        ]
+        result = results.get(user.id)
+        record["verification_results"] = result_document(result) if result is not None else None
+        records.append(record)
+    for key in set(db.identity_map.keys()) - held:
+        row = db.identity_map.get(key)
+        if row is not None:
+            db.expunge(row)
+    yield from records
+
+
+def iter_prompts(
+    emails: Iterable[str],
+    db: Session,
+    chunk_size: int = SQL_IN_CHUNK
+) -> Iterator[Tuple[str, str]]:
+    """
+    (email, prompt) for many users, generated lazily chunk by chunk
+    Users with a verification result get the explanation prompt; the rest
+    get the profile summary prompt
+    """
+    for record in iter_prompt_data(emails, db, chunk_size):
+        result: Optional[Dict] = record["verification_results"]
+        if result:
+            prompt = build_explanation_prompt(record, result)
+        else:
+            prompt = build_user_prompt(dict(record))
+        yield record["email"], prompt
@@ -16,3 +16,22 @@ Student Information:
 
 Prompt: Summarize the details of this user and provide feedback.
 """)
+
+EXPLANATION_PROMPT_TEMPLATE = Template("""
+Student Information:
+- Name: $name
+- Current Community College: $community_college
+- Target University: $target_uc
+- Target Major: $major
+
+Verification Result:
+- Eligibility: $eligibility_status
+- GPA: $gpa (minimum $min_gpa)
+- Transferable units: $units (range $units_range)
+- Completed major preparation: $completed
+- Missing major preparation: $missing
+- Incomplete IGETC areas: $igetc
+- Risks: $risks
+
+Prompt: Explain this verification result to the student and list the next steps.
+""")
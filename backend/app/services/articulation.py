@@ -0,0 +1,287 @@
+"""
+Articulation Ingestion
+Streams Assist-style articulation exports (JSON Lines or CSV, optionally
+gzipped) into the course_equivalencies and uc_requirements tables
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+
+from app.models.models import CourseEquivalency, UCRequirement
+from app.services.requirement_index import normalize_course_code
+
+# Rows per transaction; a batch is held in memory until it is written
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "5000"))
+
+MAX_ERROR_SAMPLES = 20
+
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+class IngestError(Exception):
+    """Raised when an export or database cannot be ingested at all"""
+
+
+class RecordError(ValueError):
+    """Raised when a single export record fails validation"""
+
+
+@dataclass
+class IngestStats:
+    """Counters for one ingestion run"""
+    read: int = 0
+    upserted: int = 0
+    skipped: int = 0
+    duplicates: int = 0
+    batches: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def record_error(self, line: int, message: str) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_ERROR_SAMPLES:
+            self.errors.append(f"line {line}: {message}")
+
+
+# ===================== READERS =====================
+
+def _open_text(path: str) -> TextIO:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def read_records(path: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+    """
+    Yield (line number, record) from a .jsonl/.ndjson or .csv export
+    Records are read one at a time; unparsable lines yield None
+    """
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith((".jsonl", ".ndjson")):
+        with _open_text(path) as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    record = None
+                yield line_number, record if isinstance(record, dict) else None
+    elif name.endswith(".csv"):
+        with _open_text(path) as f:
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+    else:
+        raise IngestError(f"Unsupported export format: {path} (expected .jsonl, .ndjson or .csv)")
+
+
+# ===================== VALIDATION =====================
+
+def _text(record: Dict, name: str, required: bool = True) -> Optional[str]:
+    value = record.get(name)
+    value = str(value).strip() if value is not None else ""
+    if not value:
+        if required:
+            raise RecordError(f"missing {name}")
+        return None
+    return value
+
+
+def _list(value: Any) -> List[str]:
+    """Lists pass through; CSV cells may hold a JSON list or 'a;b' / 'a|b'"""
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    text = str(value).strip()
+    if text.startswith("["):
+        return _list(json.loads(text))
+    return [item.strip() for item in text.replace("|", ";").split(";") if item.strip()]
+
+
+def _json(value: Any, name: str) -> Any:
+    if isinstance(value, str):
+        try:
+            return json.loads(value) if value.strip() else None
+        except json.JSONDecodeError:
+            raise RecordError(f"{name} is not valid JSON")
+    return value
+
+
+def parse_equivalency(record: Dict, now: datetime) -> Dict[str, Any]:
+    """Validate one articulation record into a course_equivalencies row"""
+    try:
+        units = float(record.get("units"))
+    except (TypeError, ValueError):
+        raise RecordError("units must be a number")
+    if not 0 <= units <= 30:
+        raise RecordError(f"units out of range: {units}")
+    try:
+        igetc_areas = _list(record.get("igetc_areas", record.get("igetc")))
+    except json.JSONDecodeError:
+        raise RecordError("igetc_areas is not a valid list")
+    return {
+        "community_college": _text(record, "community_college"),
+        "cc_course_code": normalize_course_code(_text(record, "cc_course_code")),
+        "cc_course_name": _text(record, "cc_course_name", required=False),
+        "uc_campus": _text(record, "uc_campus").lower(),
+        "uc_course_code": normalize_course_code(_text(record, "uc_course_code")),
+        "uc_course_name": _text(record, "uc_course_name", required=False),
+        "units": units,
+        "igetc_areas": igetc_areas,
+        "source_url": _text(record, "source_url", required=False),
+        "last_updated": now,
+    }
+
+
+def parse_requirement(record: Dict, now: datetime) -> Dict[str, Any]:
+    """Validate one requirement record into a uc_requirements row"""
+    requirement_data = _json(record.get("requirement_data"), "requirement_data")
+    if requirement_data is None:
+        raise RecordError("missing requirement_data")
+    notes = _json(record.get("notes"), "notes")
+    return {
+        "uc_campus": _text(record, "uc_campus").lower(),
+        "major": _text(record, "major"),
+        "requirement_type": _text(record, "requirement_type"),
+        "requirement_data": requirement_data,
+        "notes": notes,
+        "source_url": _text(record, "source_url", required=False),
+        "last_updated": now,
+    }
+
+
+@dataclass
+class IngestTarget:
+    """A table that exports can be ingested into"""
+    model: Any
+    parse: Callable[[Dict, datetime], Dict[str, Any]]
+    key_columns: Tuple[str, ...]
+
+
+TARGETS = {
+    "equivalencies": IngestTarget(
+        CourseEquivalency, parse_equivalency,
+        ("community_college", "cc_course_code", "uc_campus", "uc_course_code"),
+    ),
+    "requirements": IngestTarget(
+        UCRequirement, parse_requirement,
+        ("uc_campus", "major", "requirement_type"),
+    ),
+}
+
+
+# ===================== INGESTION =====================
+
+class ArticulationIngestor:
+    """
+    Upserts validated export records in fixed-size batches
+
+    Each batch is de-duplicated on the natural key (last record wins) and
+    written in one transaction by executing a single compiled INSERT ...
+    ON CONFLICT DO UPDATE over all of its rows; SQLAlchemy sends that as
+    multi-row VALUES pages where the driver supports it. Memory stays
+    bounded by the batch size and re-running an export is idempotent.
+    Every written row gets the run's last_updated timestamp.
+    """
+
+    def __init__(self, engine: Engine, batch_size: int = INGEST_BATCH_SIZE):
+        dialect = engine.dialect.name
+        if dialect not in UPSERT_INSERTS:
+            raise IngestError(f"Upserts are not supported for the {dialect} dialect")
+        self.engine = engine
+        self.batch_size = max(1, batch_size)
+        self._insert = UPSERT_INSERTS[dialect]
+        self._statements: Dict[str, Any] = {}
+
+    def ingest_file(self, kind: str, path: str) -> IngestStats:
+        """Stream one export file into the table for kind"""
+        return self.ingest(kind, read_records(path))
+
+    def ingest(
+        self,
+        kind: str,
+        records: Iterable[Tuple[int, Optional[Dict[str, Any]]]]
+    ) -> IngestStats:
+        """Validate and upsert (line number, record) pairs"""
+        if kind not in TARGETS:
+            raise IngestError(f"Unknown ingestion target: {kind}")
+        target = TARGETS[kind]
+        now = datetime.utcnow()
+        stats = IngestStats()
+        batch: Dict[Tuple, Dict[str, Any]] = {}
+
+        for line_number, record in records:
+            stats.read += 1
+            if record is None:
+                stats.record_error(line_number, "not a valid record")
+                continue
+            try:
+                row = target.parse(record, now)
+            except RecordError as e:
+                stats.record_error(line_number, str(e))
+                continue
+
+            key = tuple(row[column] for column in target.key_columns)
+            if key in batch:
+                stats.duplicates += 1
+            batch[key] = row
+            if len(batch) >= self.batch_size:
+                self._write(target, list(batch.values()), stats)
+                batch.clear()
+
+        if batch:
+            self._write(target, list(batch.values()), stats)
+        return stats
+
+    def _upsert_statement(self, target: IngestTarget):
+        """One upsert per table, compiled once and reused for every batch"""
+        table = target.model.__table__
+        if table.name not in self._statements:
+            stmt = self._insert(table)
+            self._statements[table.name] = stmt.on_conflict_do_update(
+                index_elements=list(target.key_columns),
+                set_={
+                    column.name: stmt.excluded[column.name]
+                    for column in table.columns
+                    if not column.primary_key and column.name not in target.key_columns
+                },
+            )
+        return self._statements[table.name]
+
+    def _write(self, target: IngestTarget, rows: List[Dict[str, Any]], stats: IngestStats) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(self._upsert_statement(target), rows)
+        stats.upserted += len(rows)
+        stats.batches += 1
+
+
+if __name__ == "__main__":
+    from app.db.database import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Load Assist-style articulation exports")
+    parser.add_argument("kind", choices=sorted(TARGETS))
+    parser.add_argument("paths", nargs="+", help=".jsonl, .ndjson or .csv, optionally .gz")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    args = parser.parse_args()
+
+    init_db()
+    ingestor = ArticulationIngestor(engine, args.batch_size)
+    for path in args.paths:
+        result = ingestor.ingest_file(args.kind, path)
+        print(
+            f"{path}: read {result.read}, upserted {result.upserted}, "
+            f"skipped {result.skipped}, duplicates {result.duplicates}, "
+            f"batches {result.batches}"
+        )
+        for error in result.errors:
+            print(f"  {error}")
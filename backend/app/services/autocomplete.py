@@ -0,0 +1,238 @@
+"""
+Autocomplete Index
+Prefix search over UC, CSU and ADT majors and community colleges, built once
+at startup from the reference catalogs. Tokens live in one sorted array of
+bitset postings, so a prefix is two bisections and an OR over a slice, and
+filters, ranking tiers and facet counts are AND and popcount
+"""
+
+import os
+import re
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.services.reference_data import campus_entries, campus_labels, load_catalog
+
+SEARCH_PREFIX_CACHE = int(os.getenv("SEARCH_PREFIX_CACHE", "4096"))
+MAX_FACET_VALUES = 20
+
+# Result types and the major catalog whose campuses they list
+ENTRY_TYPES = ("uc_major", "csu_major", "cc_major", "college")
+CAMPUS_CATALOGS = {"uc_major": "uc_majors", "csu_major": "csu_majors"}
+
+
+def search_tokens(text: str) -> List[str]:
+    """Lowercase alphanumeric words of a name or query"""
+    return re.findall(r"[a-z0-9]+", (text or "").lower())
+
+
+@dataclass
+class SearchEntry:
+    """One searchable catalog item and the result returned for it"""
+    type: str
+    key: str  # tokens joined by spaces, for whole-name prefix matches
+    tokens: Tuple[str, ...]
+    category: Optional[str]
+    campuses: Tuple[str, ...]  # campus ids
+    result: Dict[str, Any]
+
+
+class PrefixTable:
+    """Sorted strings with a bitset of entry ids each, searched by prefix"""
+
+    def __init__(self, postings: Dict[str, int]):
+        self.keys: List[str] = sorted(postings)
+        self.masks: List[int] = [postings[key] for key in self.keys]
+        self.lookup = lru_cache(maxsize=SEARCH_PREFIX_CACHE)(self._collect)
+
+    def _collect(self, prefix: str) -> int:
+        """Bitset of entries with a key starting with prefix"""
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + "\uffff", start)
+        mask = 0
+        for key_mask in self.masks[start:end]:
+            mask |= key_mask
+        return mask
+
+
+class AutocompleteIndex:
+    """
+    Bitset prefix index over catalog names
+
+    Entry ids follow (name length, name), so among equally ranked matches
+    the lowest set bits are the best ones.
+    words: every name token; a query matches entries holding, for every
+        query word, a token that starts with it
+    names / first_words: whole names and first tokens, for ranking tiers:
+        names starting with the query, then names whose first word starts
+        with the query's first word, then the rest
+    type_masks, campus_masks, category_masks: entries per facet value
+    """
+
+    def __init__(self, entries: List[SearchEntry], campus_names: Dict[str, str]):
+        self.entries = sorted(entries, key=lambda entry: (len(entry.key), entry.key, entry.type))
+        self.campus_names = campus_names
+        words: Dict[str, int] = {}
+        names: Dict[str, int] = {}
+        first_words: Dict[str, int] = {}
+        self.type_masks: Dict[str, int] = {}
+        self.campus_masks: Dict[str, int] = {}
+        self.category_masks: Dict[str, int] = {}
+        self.category_names: Dict[str, str] = {}
+        for entry_id, entry in enumerate(self.entries):
+            bit = 1 << entry_id
+            for token in entry.tokens:
+                words[token] = words.get(token, 0) | bit
+            names[entry.key] = names.get(entry.key, 0) | bit
+            if entry.tokens:
+                first_words[entry.tokens[0]] = first_words.get(entry.tokens[0], 0) | bit
+            self.type_masks[entry.type] = self.type_masks.get(entry.type, 0) | bit
+            for campus_id in entry.campuses:
+                self.campus_masks[campus_id] = self.campus_masks.get(campus_id, 0) | bit
+            if entry.category:
+                category = entry.category.lower()
+                self.category_masks[category] = self.category_masks.get(category, 0) | bit
+                self.category_names.setdefault(category, entry.category)
+        self.words = PrefixTable(words)
+        self.names = PrefixTable(names)
+        self.first_words = PrefixTable(first_words)
+
+    @classmethod
+    def from_reference_data(cls) -> "AutocompleteIndex":
+        """Build from the bundled UC, CSU and ADT major and college catalogs"""
+        entries: List[SearchEntry] = []
+        campus_names: Dict[str, str] = {}
+
+        for entry_type, catalog in CAMPUS_CATALOGS.items():
+            campus_ids = {label: campus["id"] for label, campus in campus_entries(catalog).items()}
+            for campus in campus_entries(catalog).values():
+                campus_names[campus["id"]] = campus["name"]
+            for major in load_catalog(catalog)["majors"]:
+                # CSU majors have a base major rather than a category
+                result = {"type": entry_type, "name": major["name"]}
+                for field in ("category", "baseMajor"):
+                    if major.get(field):
+                        result[field] = major[field]
+                result["campuses"] = major.get("campuses", [])
+                entries.append(_entry(entry_type, major["name"], major.get("category"), tuple(
+                    campus_ids[label] for label in major.get("campuses", ()) if label in campus_ids
+                ), result))
+
+        for major in load_catalog("cc_majors")["majors"]:
+            entries.append(_entry("cc_major", major["name"], major.get("category"), (), {
+                "type": "cc_major",
+                "id": major.get("id"),
+                "name": major["name"],
+                "category": major.get("category"),
+                "degreeType": major.get("degreeType"),
+            }))
+
+        for college in load_catalog("community_colleges")["colleges"]:
+            entries.append(_entry("college", college["name"], None, (), {
+                "type": "college",
+                "id": college.get("id"),
+                "name": college["name"],
+                "region": college.get("region"),
+            }))
+
+        return cls(entries, campus_names)
+
+    def campus_mask(self, campus: str) -> int:
+        """Entries offered at a campus given by id, name or short name"""
+        key = campus.strip().lower()
+        mask = 0
+        for catalog in CAMPUS_CATALOGS.values():
+            label = campus_labels(catalog).get(key)
+            if label is not None:
+                mask |= self.campus_masks.get(campus_entries(catalog)[label]["id"], 0)
+        return mask
+
+    def search(
+        self,
+        query: str,
+        types: Optional[Iterable[str]] = None,
+        campus: Optional[str] = None,
+        category: Optional[str] = None,
+        limit: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Ranked matches for a query, with facet counts over every match
+        types, campus and category narrow the matches; facets count types,
+        categories and campuses among the narrowed matches
+        """
+        words = search_tokens(query)
+        matched = 0
+        if words:
+            matched = -1
+            # The longest word is usually the most selective
+            for word in sorted(words, key=len, reverse=True):
+                matched &= self.words.lookup(word)
+                if not matched:
+                    break
+        if matched and types is not None:
+            type_mask = 0
+            for entry_type in types:
+                type_mask |= self.type_masks.get(entry_type, 0)
+            matched &= type_mask
+        if matched and campus is not None:
+            matched &= self.campus_mask(campus)
+        if matched and category is not None:
+            matched &= self.category_masks.get(category.strip().lower(), 0)
+
+        return {
+            "query": query,
+            "total": matched.bit_count(),
+            "results": [self.entries[i].result for i in self._rank(matched, words, limit)],
+            "facets": self._facets(matched),
+        }
+
+    def _rank(self, matched: int, words: List[str], limit: int) -> List[int]:
+        ranked: List[int] = []
+        if not matched:
+            return ranked
+        whole = matched & self.names.lookup(" ".join(words))
+        leading = matched & self.first_words.lookup(words[0]) & ~whole
+        for tier in (whole, leading, matched & ~whole & ~leading):
+            while tier and len(ranked) < limit:
+                low = tier & -tier
+                ranked.append(low.bit_length() - 1)
+                tier ^= low
+        return ranked
+
+    def _facets(self, matched: int) -> Dict[str, List[Dict[str, Any]]]:
+        def counts(masks: Dict[str, int]) -> List[Dict[str, Any]]:
+            found = {}
+            for value, mask in masks.items():
+                count = (matched & mask).bit_count()
+                if count:
+                    found[value] = count
+            ordered = sorted(found.items(), key=lambda item: (-item[1], item[0]))
+            return [{"value": value, "count": count} for value, count in ordered[:MAX_FACET_VALUES]]
+
+        if not matched:
+            return {"type": [], "category": [], "campus": []}
+        return {
+            "type": counts(self.type_masks),
+            "category": [
+                {**facet, "value": self.category_names[facet["value"]]}
+                for facet in counts(self.category_masks)
+            ],
+            "campus": [
+                {**facet, "name": self.campus_names.get(facet["value"], facet["value"])}
+                for facet in counts(self.campus_masks)
+            ],
+        }
+
+
+def _entry(
+    entry_type: str,
+    name: str,
+    category: Optional[str],
+    campuses: Tuple[str, ...],
+    result: Dict[str, Any]
+) -> SearchEntry:
+    tokens = tuple(search_tokens(name))
+    return SearchEntry(entry_type, " ".join(tokens), tokens, category, campuses, result)
+
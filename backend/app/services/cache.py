@@ -0,0 +1,112 @@
+"""
+Verification Cache
+Content-addressed LRU/TTL cache for verification results, keyed by a hash
+of the normalized transcript and everything else the result depends on
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.services.requirement_index import course_college, normalize_course_code
+
+VERIFY_CACHE_SIZE = int(os.getenv("VERIFY_CACHE_SIZE", "4096"))
+VERIFY_CACHE_TTL = float(os.getenv("VERIFY_CACHE_TTL", "3600"))
+
+
+def verification_key(
+    courses: Iterable[Dict],
+    college: str,
+    major: str,
+    target_uc: str,
+    data_version: str
+) -> str:
+    """
+    Hash the inputs of a verification into a cache key
+    Only fields that affect the result are hashed, and course order is
+    ignored, so re-saving the same transcript yields the same key. A course
+    from another college adds that college, so single-college keys are
+    unchanged
+    """
+    transcript = []
+    for c in courses:
+        entry = (
+            normalize_course_code(c.get("course_code", "")),
+            float(c.get("units", 0)),
+            (c.get("grade") or "").strip().upper(),
+        )
+        source = course_college(c, college)
+        transcript.append(entry + (source,) if source != college else entry)
+    transcript.sort()
+    payload = json.dumps(
+        [transcript, college, major, target_uc, data_version],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class VerificationCache:
+    """
+    Thread-safe LRU cache with per-entry TTL and hit/miss counters
+    Cached results are shared between callers and must not be mutated
+    """
+
+    def __init__(
+        self,
+        max_entries: int = VERIFY_CACHE_SIZE,
+        ttl_seconds: float = VERIFY_CACHE_TTL
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entries if full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,415 @@
+"""
+Cohort Evaluation Engine
+Vectorized EligibilityChecker for research-scale batches: transcripts are
+flattened into NumPy arrays, and GPA, units, requirement matching, IGETC
+coverage, risks and eligibility are computed for every student at once
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.eligibility import EligibilityChecker
+from app.services.requirement_index import normalize_course_code
+from app.services.requirement_rules import RequirementPlan
+
+
+class _Courses:
+    """
+    A cohort's transcripts flattened once into parallel per-course columns
+    Codes, grades and college tags repeat heavily across a cohort, so
+    courses hold ids into tables of distinct raw values, each looked up once
+    """
+
+    def __init__(self, transcripts: Sequence[List[Dict]], grade_points: Dict[str, float]):
+        courses = [course for transcript in transcripts for course in transcript]
+        self.student = np.repeat(
+            np.arange(len(transcripts), dtype=np.int64),
+            [len(transcript) for transcript in transcripts],
+        )
+        codes = _Interner()
+        self.raw_code_ids = np.array(
+            [codes[course.get("course_code", "")] for course in courses], dtype=np.int64
+        )
+        self.raw_codes = list(codes)
+        self.normalized = [normalize_course_code(raw) for raw in self.raw_codes]
+
+        # Grade points (NaN when ungraded), per distinct raw grade
+        points = _GradePoints(grade_points)
+        self.points = np.array([points[course.get("grade", "")] for course in courses], dtype=np.float64)
+        self.units = np.array([course.get("units", 0) for course in courses], dtype=np.float64)
+
+        # College tags, usually absent: ids into tags, or None when no course has one
+        self.tags: List[str] = []
+        self.tag_ids: Optional[np.ndarray] = None
+        raw_tags = [course.get("college") for course in courses]
+        if any(raw_tags):
+            tags = _Interner()
+            self.tag_ids = np.array([tags[tag] for tag in raw_tags], dtype=np.int64)
+            self.tags = [(tag or "").strip() for tag in tags]
+
+
+class _Interner(dict):
+    """value -> id, numbering values in first-seen order"""
+
+    def __missing__(self, value):
+        self[value] = value_id = len(self)
+        return value_id
+
+
+class _GradePoints(dict):
+    """raw grade -> grade points, NaN for grades outside the scale"""
+
+    def __init__(self, grade_points: Dict[str, float]):
+        super().__init__()
+        self.grade_points = grade_points
+
+    def __missing__(self, grade):
+        self[grade] = points = self.grade_points.get(grade.upper(), np.nan)
+        return points
+
+
+class CohortEvaluator:
+    """
+    Batch mode for EligibilityChecker
+
+    Per-student aggregates come from np.bincount over flattened course
+    arrays; requirement satisfaction comes from a boolean student x
+    course-code matrix and IGETC satisfaction from a scatter of each
+    course's (college, code) areas, so transcripts may mix colleges. A rule
+    is evaluated once per distinct presence mask, risks and eligibility are
+    classified as arrays, and results are laid out with the checker's own
+    result_document and wording, so output matches run_full_verification
+    exactly. Results share their unchanging parts (requirement entries,
+    IGETC rows) and must be treated as read-only.
+    """
+
+    def __init__(self, checker: EligibilityChecker):
+        self.checker = checker
+        self.index = checker.index
+
+    def evaluate(
+        self,
+        transcripts: Sequence[List[Dict]],
+        colleges: Any,
+        major: str,
+        target_uc: str = "UCSC"
+    ) -> List[Dict[str, Any]]:
+        """Verify every transcript against one major"""
+        n = len(transcripts)
+        if isinstance(colleges, str):
+            colleges = [colleges] * n
+        if major not in self.checker.requirements:
+            return [
+                self.checker.run_full_verification(courses, college, major, target_uc)
+                for courses, college in zip(transcripts, colleges)
+            ]
+        if n == 0:
+            return []
+
+        reqs = self.checker.requirements[major]
+        courses = _Courses(transcripts, self.checker.GRADE_POINTS)
+        student = courses.student
+
+        # GPA and unit totals
+        points = courses.points
+        units = courses.units
+        course_counts = np.bincount(student, minlength=n)
+        total_units = np.bincount(student, weights=units, minlength=n)
+        graded = ~np.isnan(points)
+        graded_points = np.bincount(
+            student[graded], weights=points[graded] * units[graded], minlength=n
+        )
+        graded_units = np.bincount(student[graded], weights=units[graded], minlength=n)
+        gpa = [
+            round(p / u, 2) if u > 0 else 0.0
+            for p, u in zip(graded_points.tolist(), graded_units.tolist())
+        ]
+        unit_totals = [
+            total if count else 0
+            for total, count in zip(total_units.tolist(), course_counts.tolist())
+        ]
+
+        completed, missing = self._requirements(major, courses, n)
+        igetc_status, missing_igetc = self._igetc(reqs.get("igetc_areas", {}), courses, colleges, n)
+
+        # Risks and eligibility, classified for the whole cohort at once
+        min_gpa = reqs.get("min_gpa", 2.5)
+        min_units = reqs.get("min_units", 60)
+        max_units = reqs.get("max_units", 90)
+        gpas = np.array(gpa, dtype=np.float64)
+        units_arr = np.array(unit_totals, dtype=np.float64)
+        missing_counts = np.array([len(entries) for entries in missing], dtype=np.int64)
+        gpa_low = gpas < min_gpa
+        gpa_close = ~gpa_low & (gpas < min_gpa + 0.3)
+        units_low = units_arr < min_units
+        units_high = ~units_low & (units_arr > max_units)
+        gpa_ok = ~gpa_low
+        units_ok = (units_arr >= min_units) & (units_arr <= max_units)
+        statuses = np.where(
+            gpa_ok & units_ok,
+            np.where(missing_counts == 0, 0, 1),
+            2,
+        ).tolist()
+        status_names = ("likely_eligible", "conditional", "not_yet_eligible")
+        flags = np.stack([gpa_low, gpa_close, units_low, units_high, missing_counts > 0], axis=1)
+        any_risk = flags.any(axis=1) | np.array([bool(areas) for areas in missing_igetc])
+
+        messages = self.checker.RISK_MESSAGES
+        source = reqs.get("source_url", "")
+        major_prep_risks: Dict[int, Dict] = {}
+        igetc_risks: Dict[str, Dict] = {}
+        results = []
+        for i, flagged in enumerate(any_risk.tolist()):
+            risks = []
+            if flagged:
+                low, close, few, many, prep = flags[i].tolist()
+                if low:
+                    risks.append(_risk("GPA", "high", messages["gpa_low"].format(
+                        gpa=gpa[i], min_gpa=min_gpa), source))
+                elif close:
+                    risks.append(_risk("GPA", "medium", messages["gpa_close"].format(gpa=gpa[i]), source))
+                if few:
+                    risks.append(_risk("Units", "high", messages["units_low"].format(
+                        min_units=min_units, total_units=unit_totals[i]), source))
+                elif many:
+                    risks.append(_risk("Units", "medium", messages["units_high"].format(
+                        total_units=unit_totals[i], max_units=max_units), source))
+                if prep:
+                    count = len(missing[i])
+                    if count not in major_prep_risks:
+                        major_prep_risks[count] = _risk(
+                            "Major Prep", "high", messages["major_prep"].format(missing_count=count),
+                            "https://assist.org",
+                        )
+                    risks.append(major_prep_risks[count])
+                areas = missing_igetc[i]
+                if areas:
+                    if areas not in igetc_risks:
+                        igetc_risks[areas] = _risk(
+                            "IGETC", "medium", messages["igetc"].format(areas=areas),
+                            "https://assist.org/transfer/igetc",
+                        )
+                    risks.append(igetc_risks[areas])
+
+            status = status_names[statuses[i]]
+            results.append(self.checker.result_document(
+                status, self.checker.ELIGIBILITY_MESSAGES[status], gpa[i], unit_totals[i],
+                completed[i], missing[i], igetc_status[i], risks, major, target_uc,
+            ))
+        return results
+
+    def _requirements(
+        self,
+        major: str,
+        courses: _Courses,
+        n: int
+    ) -> Tuple[List[List[Dict]], List[List[Dict]]]:
+        """Completed and missing requirement entries per student, in listed order"""
+        # Intern every code that can affect major prep for this cohort
+        vocab: Dict[str, int] = {}
+        code_lists = self.index.requirement_codes.get(major, [])
+        for codes in code_lists:
+            for code in codes:
+                vocab.setdefault(code, len(vocab))
+        code_ids = np.array(
+            [vocab.get(code, -1) for code in courses.normalized], dtype=np.int64
+        )[courses.raw_code_ids] if courses.raw_codes else np.zeros(0, dtype=np.int64)
+
+        # Student x code presence matrix
+        student = courses.student
+        known = code_ids >= 0
+        has = np.zeros((n, len(vocab)), dtype=bool)
+        has[student[known], code_ids[known]] = True
+
+        plans: List[RequirementPlan] = self.index.plans[major]
+        required = self.checker.requirements[major].get("required_courses", [])
+
+        # Centi-units per code, only for rules with unit minimums
+        unit_codes = sorted({code for plan in plans if plan.needs_units for code in plan.codes})
+        code_units = None
+        if unit_codes:
+            sums = np.zeros((n, len(vocab)), dtype=np.int64)
+            centi = np.round(courses.units[known] * 100).astype(np.int64)
+            np.add.at(sums, (student[known], code_ids[known]), centi)
+            columns = sums[:, [vocab[code] for code in unit_codes]].tolist()
+            code_units = [dict(zip(unit_codes, row)) for row in columns]
+
+        # Per plan, each student's outcome: an id into entries, for the
+        # matched entry or the plan's missing entry
+        entries: List[Dict] = []
+        missing_ids = set()
+        outcomes = np.zeros((n, len(plans)), dtype=np.int64)
+        for position, (req, plan) in enumerate(zip(required, plans)):
+            codes = code_lists[position] if position < len(code_lists) else []
+            masks = _presence_masks(has, [vocab[code] for code in codes], n)
+            missing_id = len(entries)
+            missing_ids.add(missing_id)
+            entries.append(_entry(req["name"], "acceptable_courses", plan.labels, plan.description))
+            matched_ids: Dict[int, int] = {}
+
+            def outcome(mask: int, units: Optional[Dict[str, int]] = None) -> int:
+                if not plan.satisfied(mask, units):
+                    return missing_id
+                if mask not in matched_ids:
+                    matched_ids[mask] = len(entries)
+                    entries.append(_entry(req["name"], "matched_course", plan.matched(mask), plan.description))
+                return matched_ids[mask]
+
+            if plan.needs_units:
+                # Unit minimums depend on more than the mask
+                masks = masks.tolist() if isinstance(masks, np.ndarray) else masks
+                outcomes[:, position] = [outcome(mask, code_units[i]) for i, mask in enumerate(masks)]
+            elif isinstance(masks, np.ndarray):
+                # Everything else is a function of the mask: evaluate distinct masks once
+                distinct, inverse = np.unique(masks, return_inverse=True)
+                ids = np.array([outcome(mask) for mask in distinct.tolist()], dtype=np.int64)
+                outcomes[:, position] = ids[inverse.reshape(-1)]
+            else:
+                distinct_ids: Dict[int, int] = {}
+                outcomes[:, position] = [
+                    distinct_ids[mask] if mask in distinct_ids
+                    else distinct_ids.setdefault(mask, outcome(mask))
+                    for mask in masks
+                ]
+
+        # Students with the same outcomes share their entry lists
+        if not plans:
+            return [[] for _ in range(n)], [[] for _ in range(n)]
+        rows, inverse = np.unique(outcomes, axis=0, return_inverse=True)
+        completed_rows, missing_rows = [], []
+        for row in rows.tolist():
+            completed_rows.append([entries[i] for i in row if i not in missing_ids])
+            missing_rows.append([entries[i] for i in row if i in missing_ids])
+        inverse = inverse.reshape(-1).tolist()
+        return [completed_rows[j] for j in inverse], [missing_rows[j] for j in inverse]
+
+    def _igetc(
+        self,
+        igetc_reqs: Dict,
+        courses: _Courses,
+        colleges: Sequence[str],
+        n: int
+    ) -> Tuple[List[Dict], List[str]]:
+        """
+        IGETC status per student and the comma-joined required areas each
+        is missing; students with the same coverage share one status
+        """
+        areas = list(igetc_reqs)
+        area_pos = {area: i for i, area in enumerate(areas)}
+        satisfied = np.zeros((n, len(areas)), dtype=bool)
+        join_ids, grants = self._articulate(courses, colleges, area_pos)
+        if grants:
+            granted_by = np.array(grants, dtype=bool)
+            articulated = join_ids >= 0
+            owners = courses.student[articulated]
+            granted = granted_by[join_ids[articulated]]
+            for column in range(len(areas)):
+                satisfied[owners[granted[:, column]], column] = True
+
+        rows = {
+            area: {
+                done: {
+                    "name": info.get("name", ""),
+                    "required": info.get("required", True),
+                    "completed": done,
+                }
+                for done in (False, True)
+            }
+            for area, info in igetc_reqs.items()
+        }
+        distinct, inverse = _distinct_rows(satisfied)
+        patterns = [
+            (
+                {area: rows[area][done] for area, done in zip(areas, row)},
+                ", ".join(
+                    area for area, done in zip(areas, row)
+                    if igetc_reqs[area].get("required", True) and not done
+                ),
+            )
+            for row in distinct
+        ]
+        return [patterns[j][0] for j in inverse], [patterns[j][1] for j in inverse]
+
+    def _articulate(
+        self,
+        courses: _Courses,
+        colleges: Sequence[str],
+        area_pos: Dict[str, int]
+    ) -> Tuple[np.ndarray, List[List[int]]]:
+        """
+        Per-course ids of the cohort's distinct (college, code) pairs that
+        grant a required area (-1 for the rest), and each id's area row
+        Courses become (college id, raw code id) pairs, so the join runs
+        once per distinct pair
+        """
+        college_index: Dict[str, int] = {}
+        home = np.array(
+            [college_index.setdefault(college, len(college_index)) for college in colleges],
+            dtype=np.int64,
+        )[courses.student]
+        college_ids = home
+        if courses.tag_ids is not None and any(courses.tags):
+            tagged = np.array(
+                [college_index.setdefault(tag, len(college_index)) if tag else -1 for tag in courses.tags],
+                dtype=np.int64,
+            )[courses.tag_ids]
+            college_ids = np.where(tagged >= 0, tagged, home)
+
+        width = max(1, len(courses.raw_codes))
+        pairs, inverse = np.unique(college_ids * width + courses.raw_code_ids, return_inverse=True)
+        college_names = list(college_index)
+        normalized = courses.normalized
+        articulation = self.index.articulation
+        grants: List[List[int]] = []
+        pair_ids = np.full(len(pairs), -1, dtype=np.int64)
+        pair_colleges, pair_codes = np.divmod(pairs, width)
+        for i, (college_id, raw_id) in enumerate(zip(pair_colleges.tolist(), pair_codes.tolist())):
+            found = articulation.get((college_names[college_id], normalized[raw_id]))
+            if not found:
+                continue
+            row = [0] * len(area_pos)
+            for area in found:
+                if area in area_pos:
+                    row[area_pos[area]] = 1
+            if any(row):
+                pair_ids[i] = len(grants)
+                grants.append(row)
+        return pair_ids[inverse], grants
+
+
+def _distinct_rows(matrix: np.ndarray) -> Tuple[List[List[bool]], List[int]]:
+    """A boolean matrix's distinct rows and, per row, its distinct row's index"""
+    if matrix.shape[1] >= 63:
+        distinct, inverse = np.unique(matrix, axis=0, return_inverse=True)
+        return distinct.tolist(), inverse.reshape(-1).tolist()
+    weights = np.int64(1) << np.arange(matrix.shape[1], dtype=np.int64)
+    keys, inverse = np.unique(matrix.astype(np.int64) @ weights, return_inverse=True)
+    distinct = ((keys[:, None] & weights) != 0).tolist()
+    return distinct, inverse.reshape(-1).tolist()
+
+
+def _presence_masks(has: np.ndarray, columns: List[int], n: int):
+    """
+    Per student, the mask with bit r set when the code of rank r is held:
+    an int64 array, or a list of ints for requirements of 63+ codes
+    """
+    if not columns:
+        return np.zeros(n, dtype=np.int64)
+    hits = has[:, columns]
+    if len(columns) < 63:
+        weights = np.int64(1) << np.arange(len(columns), dtype=np.int64)
+        return hits.astype(np.int64) @ weights
+    return [sum(1 << int(r) for r in np.flatnonzero(row)) for row in hits]
+
+
+def _entry(name: str, field: str, value: Any, rule: Optional[str]) -> Dict[str, Any]:
+    """A completed or missing requirement entry, as build_result lays it out"""
+    entry = {"requirement": name, field: value}
+    if rule:
+        entry["rule"] = rule
+    return entry
+
+
+def _risk(kind: str, severity: str, message: str, source: str) -> Dict[str, str]:
+    return {"type": kind, "severity": severity, "message": message, "source": source}
@@ -0,0 +1,31 @@
+"""
+Course Codes
+Normalization of transcript and articulation course codes into the
+canonical keys used by every index
+"""
+
+import re
+from functools import lru_cache
+
+# Bumped whenever normalization changes: it is folded into data versions,
+# so caches, persisted state and snapshots keyed the old way are rebuilt
+CODE_FORMAT = 2
+
+_SEPARATORS = re.compile(r"[^A-Z0-9]+")
+_GLUED_SUBJECT = re.compile(r"^([A-Z]+)(?=[0-9])")
+_LEADING_ZEROS = re.compile(r"(?<![A-Z0-9])0+(?=[0-9])")
+_DETACHED_SUFFIX = re.compile(r"(?<=[0-9]) (?=[A-Z]{1,2}$)")
+
+
+@lru_cache(maxsize=65536)
+def normalize_course_code(code: str) -> str:
+    """
+    Normalize a course code into the key used by the index
+    Uppercase, with separators collapsed to one space, the subject split
+    from the number, a detached letter suffix joined to it and leading
+    zeros dropped: 'MATH1A', 'Math 1 a' and 'math-001a' all become 'MATH 1A'
+    """
+    text = _SEPARATORS.sub(" ", (code or "").upper()).strip()
+    text = _GLUED_SUBJECT.sub(r"\1 ", text)
+    text = _DETACHED_SUFFIX.sub("", text)
+    return _LEADING_ZEROS.sub("", text)
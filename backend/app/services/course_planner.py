@@ -0,0 +1,410 @@
+"""
+Course Planner
+Chooses the fewest courses at a student's community college that close their
+missing major-prep and IGETC gaps, then schedules them into terms under a
+unit cap. Courses and IGETC areas are bits, so choosing a requirement's
+courses is a mask union and the areas left over are covered exactly by a
+memoized search over area masks
+"""
+
+import os
+import time
+from itertools import combinations
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Mapping, Optional, Set, Tuple
+
+from app.services.course_codes import normalize_course_code
+from app.services.requirement_rules import RequirementPlan
+
+if TYPE_CHECKING:
+    from app.services.incremental import TranscriptAccumulator
+
+# Default unit cap per term and the search budget before the best plan found
+# so far is returned
+PLAN_TERM_UNITS = float(os.getenv("PLAN_TERM_UNITS", "15"))
+PLAN_SEARCH_MS = float(os.getenv("PLAN_SEARCH_MS", "50"))
+
+# Bounds on the ways one requirement can be completed: offered codes tried,
+# completions kept, and how many courses beyond the smallest completion
+PLAN_MAX_CANDIDATES = int(os.getenv("PLAN_MAX_CANDIDATES", "16"))
+PLAN_MAX_COMPLETIONS = int(os.getenv("PLAN_MAX_COMPLETIONS", "64"))
+PLAN_EXTRA_COURSES = 1
+
+# (course count, centi-units, course mask)
+Cover = Tuple[int, int, int]
+
+
+def _bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Gap:
+    """
+    One missing requirement
+    options are course masks, any one of which completes it; reach is their
+    union, the courses it can still use
+    """
+
+    __slots__ = ("position", "name", "options", "reach")
+
+    def __init__(self, position: int, name: str, options: List[int]):
+        self.position = position
+        self.name = name
+        self.set_options(options)
+
+    def set_options(self, options: List[int]) -> None:
+        self.options = options
+        self.reach = 0
+        for option in options:
+            self.reach |= option
+
+    def closed(self, chosen: int) -> bool:
+        return any(option & chosen == option for option in self.options)
+
+
+class CoursePlanner:
+    """
+    Planning tables for one major at one campus and one college
+
+    Courses offered at the college (its Assist.org equivalencies) are
+    interned once as bits with their centi-units and a mask of the major's
+    IGETC areas they cover. area_courses keeps the cheapest course per area
+    mask, minus masks a no-costlier course covers a superset of; covers
+    memoizes the cheapest way to cover each set of areas with them.
+    """
+
+    def __init__(
+        self,
+        requirements: Dict,
+        plans: List[RequirementPlan],
+        college_courses: Mapping[str, Dict]
+    ):
+        self.requirements = requirements
+        self.plans = plans
+        self.area_names = list(requirements.get("igetc_areas", {}))
+        area_bits = {area: i for i, area in enumerate(self.area_names)}
+        self.codes: List[str] = []
+        self.labels: List[str] = []
+        self.units: List[int] = []
+        self.area_masks: List[int] = []
+        self.bits: Dict[str, int] = {}
+        for label, info in college_courses.items():
+            code = normalize_course_code(label)
+            if not code:
+                continue
+            if code not in self.bits:
+                self.bits[code] = len(self.codes)
+                self.codes.append(code)
+                self.labels.append(label)
+                self.units.append(0)
+                self.area_masks.append(0)
+            # Later duplicates of a normalized code win, as in RequirementIndex
+            bit = self.bits[code]
+            self.units[bit] = round(float(info.get("units", 0)) * 100)
+            self.area_masks[bit] = 0
+            for area in info.get("igetc", []):
+                if area in area_bits:
+                    self.area_masks[bit] |= 1 << area_bits[area]
+
+        cheapest: Dict[int, int] = {}
+        for bit, areas in enumerate(self.area_masks):
+            if areas and (areas not in cheapest or self.units[bit] < self.units[cheapest[areas]]):
+                cheapest[areas] = bit
+        self.area_courses = [
+            bit for areas, bit in cheapest.items()
+            if not any(
+                other != areas and other & areas == areas and self.units[cheapest[other]] <= self.units[bit]
+                for other in cheapest
+            )
+        ]
+        self.coverable = 0
+        for bit in self.area_courses:
+            self.coverable |= self.area_masks[bit]
+        self.covers: Dict[int, Optional[Cover]] = {0: (0, 0, 0)}
+
+    def units_of(self, mask: int) -> int:
+        """Centi-units of the courses in a mask"""
+        return sum(self.units[bit] for bit in _bits(mask))
+
+    def areas_of(self, mask: int) -> int:
+        """IGETC area mask covered by the courses in a mask"""
+        areas = 0
+        for bit in _bits(mask):
+            areas |= self.area_masks[bit]
+        return areas
+
+    def cover(self, areas: int) -> Cover:
+        """
+        Fewest courses (then fewest units) covering a mask of coverable
+        areas: some course must cover the lowest area, so try each and
+        recurse on what it leaves
+        """
+        found = self.covers.get(areas)
+        if found is not None:
+            return found
+        lowest = areas & -areas
+        for bit in self.area_courses:
+            if self.area_masks[bit] & lowest:
+                count, units, courses = self.cover(areas & ~self.area_masks[bit])
+                option = (count + 1, units + self.units[bit], courses | 1 << bit)
+                if found is None or option[:2] < found[:2]:
+                    found = option
+        self.covers[areas] = found
+        return found
+
+    # ===================== GAPS =====================
+
+    def gaps(
+        self,
+        matches: List[int],
+        code_units: Mapping[str, int],
+        satisfied_areas: Set[str]
+    ) -> Tuple[List[Gap], int, List[Dict[str, Any]]]:
+        """
+        (missing requirements the college can complete, mask of missing IGETC
+        areas it can cover, what it cannot) for a transcript, from its
+        requirement matches, per-code units and completed IGETC areas
+        """
+        gaps: List[Gap] = []
+        unavailable: List[Dict[str, Any]] = []
+        required_courses = self.requirements.get("required_courses", [])
+        for position, (req, plan, present) in enumerate(zip(required_courses, self.plans, matches)):
+            if plan.satisfied(present, code_units):
+                continue
+            options = self._completions(plan, present, code_units)
+            if options:
+                gaps.append(Gap(position, req["name"], options))
+            else:
+                unavailable.append({
+                    "type": "requirement", "name": req["name"], "acceptable_courses": plan.labels,
+                })
+
+        missing = 0
+        for bit, (area, info) in enumerate(self.requirements.get("igetc_areas", {}).items()):
+            if not info.get("required", True) or area in satisfied_areas:
+                continue
+            if self.coverable >> bit & 1:
+                missing |= 1 << bit
+            else:
+                unavailable.append({"type": "igetc", "area": area, "name": info.get("name", area)})
+        return gaps, missing, unavailable
+
+    def _completions(self, plan: RequirementPlan, present: int, code_units: Mapping[str, int]) -> List[int]:
+        """
+        Minimal sets of offered courses that complete a requirement, as
+        course masks, smallest first
+        """
+        candidates = [
+            rank for rank, code in enumerate(plan.codes)
+            if code in self.bits and not present >> rank & 1
+        ][:PLAN_MAX_CANDIDATES]
+        units = code_units
+        if plan.needs_units:
+            units = dict(code_units)
+            for rank in candidates:
+                units.setdefault(plan.codes[rank], self.units[self.bits[plan.codes[rank]]])
+
+        everything = 0
+        for rank in candidates:
+            everything |= 1 << rank
+        # Satisfaction only grows with more courses, so this rules out the rest
+        if not plan.satisfied(present | everything, units):
+            return []
+
+        found: List[int] = []
+        smallest = None
+        for size in range(1, len(candidates) + 1):
+            if smallest is not None and size > smallest + PLAN_EXTRA_COURSES:
+                break
+            for combo in combinations(candidates, size):
+                ranks = 0
+                for rank in combo:
+                    ranks |= 1 << rank
+                if any(done & ranks == done for done in found):
+                    continue
+                if plan.satisfied(present | ranks, units):
+                    found.append(ranks)
+                    smallest = smallest or size
+                    if len(found) >= PLAN_MAX_COMPLETIONS:
+                        break
+            if len(found) >= PLAN_MAX_COMPLETIONS:
+                break
+
+        options = []
+        for ranks in found:
+            mask = 0
+            for rank in _bits(ranks):
+                mask |= 1 << self.bits[plan.codes[rank]]
+            options.append(mask)
+        return options
+
+    def _prune(self, gaps: List[Gap], missing: int) -> None:
+        """
+        Drop options another option of the same gap dominates: when neither
+        shares a course with another gap, one with no more courses and units
+        that covers at least the same missing areas can always replace it
+        """
+        for gap in gaps:
+            shared = 0
+            for other in gaps:
+                if other is not gap:
+                    shared |= other.reach
+            kept: List[Tuple[int, int, int, int]] = []
+            for option in sorted(gap.options, key=lambda option: (
+                option.bit_count(), self.units_of(option), -(self.areas_of(option) & missing).bit_count()
+            )):
+                count, units = option.bit_count(), self.units_of(option)
+                areas = self.areas_of(option) & missing
+                if not option & shared and any(
+                    not other & shared and other_count <= count and other_units <= units
+                    and other_areas & areas == areas
+                    for other_count, other_units, other_areas, other in kept
+                ):
+                    continue
+                kept.append((count, units, areas, option))
+            gap.set_options([option for _, _, _, option in kept])
+
+    # ===================== SEARCH =====================
+
+    def choose(self, gaps: List[Gap], missing: int, budget_ms: float = PLAN_SEARCH_MS) -> Tuple[int, bool]:
+        """
+        Fewest courses (then fewest units) completing every gap and covering
+        the missing areas
+        Returns (course mask, whether the search finished and so proved it
+        optimal). What is left to decide depends only on the open gaps, the
+        uncovered areas and the chosen courses open gaps can still use, so
+        the search is memoized on those. Past the budget each open gap takes
+        its cheapest option, which still yields a complete plan.
+        """
+        self._prune(gaps, missing)
+        for gap in gaps:
+            gap.options.sort(key=lambda option: (
+                option.bit_count(), -(self.areas_of(option) & missing).bit_count(), self.units_of(option)
+            ))
+        deadline = time.perf_counter() + budget_ms / 1000
+        memo: Dict[Tuple[int, int, int], Cover] = {}
+        state = {"nodes": 0, "timed_out": False}
+
+        def solve(open_gaps: int, remaining: int, partial: int) -> Cover:
+            if not open_gaps:
+                return self.cover(remaining)
+            key = (open_gaps, remaining, partial)
+            found = memo.get(key)
+            if found is not None:
+                return found
+            state["nodes"] += 1
+            if state["nodes"] & 63 == 0 and time.perf_counter() > deadline:
+                state["timed_out"] = True
+            gap = min((gaps[index] for index in _bits(open_gaps)), key=lambda gap: len(gap.options))
+            options = gap.options[:1] if state["timed_out"] else gap.options
+            for option in options:
+                chosen = partial | option
+                new = option & ~partial
+                still_open, reach = 0, 0
+                for index in _bits(open_gaps):
+                    if not gaps[index].closed(chosen):
+                        still_open |= 1 << index
+                        reach |= gaps[index].reach
+                count, units, courses = solve(
+                    still_open, remaining & ~self.areas_of(new), chosen & reach
+                )
+                option_cover = (count + new.bit_count(), units + self.units_of(new), courses | new)
+                if found is None or option_cover[:2] < found[:2]:
+                    found = option_cover
+            if not state["timed_out"]:
+                memo[key] = found
+            return found
+
+        chosen = solve((1 << len(gaps)) - 1, missing, 0)[2]
+        return chosen, not state["timed_out"]
+
+    # ===================== SCHEDULE =====================
+
+    def schedule(
+        self,
+        chosen: int,
+        gaps: List[Gap],
+        missing: int,
+        term_units: float = PLAN_TERM_UNITS
+    ) -> List[Dict[str, Any]]:
+        """
+        Place chosen courses into terms of at most term_units
+        Prerequisites are not in the data, so courses sharing a subject are
+        taken one per term in requirement order (MATH 1A before MATH 1B);
+        major prep comes first and IGETC-only courses fill in after it
+        """
+        satisfies: Dict[int, List[str]] = {bit: [] for bit in _bits(chosen)}
+        order: Dict[int, int] = {}
+        for gap in sorted(gaps, key=lambda gap: gap.position):
+            option = next(option for option in gap.options if option & chosen == option)
+            for bit in _bits(option):
+                satisfies[bit].append(gap.name)
+                order.setdefault(bit, gap.position)
+        for bit in satisfies:
+            for area in _bits(self.area_masks[bit] & missing):
+                satisfies[bit].append(f"IGETC {self.area_names[area]}")
+
+        cap = round(term_units * 100)
+        terms: List[List[int]] = []
+        loads: List[int] = []
+        last_term: Dict[str, int] = {}
+        for bit in sorted(satisfies, key=lambda bit: (order.get(bit, len(self.plans)), self.codes[bit])):
+            subject = self.codes[bit].split(" ", 1)[0]
+            term = last_term.get(subject, -1) + 1
+            while term < len(terms) and loads[term] and loads[term] + self.units[bit] > cap:
+                term += 1
+            if term == len(terms):
+                terms.append([])
+                loads.append(0)
+            terms[term].append(bit)
+            loads[term] += self.units[bit]
+            last_term[subject] = term
+
+        return [
+            {
+                "term": number,
+                "units": loads[number - 1] / 100,
+                "courses": [
+                    {
+                        "course_code": self.labels[bit],
+                        "units": self.units[bit] / 100,
+                        "satisfies": satisfies[bit],
+                    }
+                    for bit in courses
+                ],
+            }
+            for number, courses in enumerate(terms, start=1)
+        ]
+
+    def plan(
+        self,
+        matches: List[int],
+        code_units: Mapping[str, int],
+        satisfied_areas: Set[str],
+        term_units: float = PLAN_TERM_UNITS,
+        budget_ms: float = PLAN_SEARCH_MS
+    ) -> Dict[str, Any]:
+        """Course plan for a transcript's remaining gaps"""
+        gaps, missing, unavailable = self.gaps(matches, code_units, satisfied_areas)
+        chosen, optimal = self.choose(gaps, missing, budget_ms)
+        return {
+            "course_count": chosen.bit_count(),
+            "total_units": self.units_of(chosen) / 100,
+            "optimal": optimal,
+            "terms": self.schedule(chosen, gaps, missing, term_units),
+            "unavailable": unavailable,
+        }
+
+
+def plan_for_state(
+    state: "TranscriptAccumulator",
+    planner: CoursePlanner,
+    term_units: float = PLAN_TERM_UNITS
+) -> Dict[str, Any]:
+    """Course plan from transcript state built for the planner's major"""
+    result = planner.plan(state.matches, state.code_units, state.igetc_areas(), term_units)
+    result["major"] = state.major
+    result["community_college"] = state.college
+    return result
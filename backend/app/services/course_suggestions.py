@@ -0,0 +1,98 @@
+"""
+Course Code Suggestions
+Trigram index over every known course code, used to rank "did you mean"
+suggestions for transcript codes that match nothing
+"""
+
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from app.services.course_codes import normalize_course_code
+
+SUGGESTION_LIMIT = int(os.getenv("COURSE_SUGGESTION_LIMIT", "3"))
+SUGGESTION_MIN_SIMILARITY = float(os.getenv("COURSE_SUGGESTION_MIN_SIMILARITY", "0.5"))
+SUGGESTION_CACHE = int(os.getenv("COURSE_SUGGESTION_CACHE", "16384"))
+
+
+def _trigrams(key: str) -> List[str]:
+    """Distinct trigrams of a key, padded so the subject's start weighs most"""
+    padded = f"  {key} "
+    return list({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+class CourseCodeIndex:
+    """
+    Every known course code by canonical key, plus a trigram index
+
+    Exact lookups are a set membership test. Suggestions rank known codes
+    by Dice similarity of trigram sets: the postings of the query's
+    trigrams (int32 arrays of key ids) are concatenated and counted with
+    one bincount, so a lookup costs the total posting length rather than
+    a scan over the catalog.
+    """
+
+    def __init__(self, codes: Iterable[str]):
+        self.keys: List[str] = sorted({
+            key for key in (normalize_course_code(code) for code in codes) if key
+        })
+        self._known = set(self.keys)
+        postings: Dict[str, List[int]] = {}
+        sizes = []
+        for key_id, key in enumerate(self.keys):
+            grams = _trigrams(key)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(key_id)
+        self._postings = {
+            gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()
+        }
+        self._sizes = np.array(sizes, dtype=np.float64)
+        # Unmatched codes repeat across transcripts (common typos)
+        self._suggest = lru_cache(maxsize=SUGGESTION_CACHE)(self._rank)
+
+    def __reduce__(self):
+        # Rebuilt from the keys in worker processes
+        return CourseCodeIndex, (self.keys,)
+
+    def __contains__(self, code: str) -> bool:
+        return normalize_course_code(code) in self._known
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def suggest(
+        self,
+        code: str,
+        limit: int = SUGGESTION_LIMIT,
+        min_similarity: float = SUGGESTION_MIN_SIMILARITY
+    ) -> List[str]:
+        """Known codes most similar to code, best first"""
+        return list(self._suggest(normalize_course_code(code), limit, min_similarity))
+
+    def _rank(self, key: str, limit: int, min_similarity: float) -> tuple:
+        grams = _trigrams(key) if key else []
+        hits = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not hits:
+            return ()
+        counts = np.bincount(np.concatenate(hits), minlength=len(self.keys))
+        candidates = np.flatnonzero(counts)
+        scores = 2 * counts[candidates] / (len(grams) + self._sizes[candidates])
+        keep = scores >= min_similarity
+        candidates, scores = candidates[keep], scores[keep]
+        # Best score first; equal scores in code order (key ids follow the
+        # sorted keys), so ties at the limit always keep the same codes
+        ranked = candidates[np.lexsort((candidates, -scores))[:limit]]
+        return tuple(self.keys[key_id] for key_id in ranked.tolist())
+
+    def suggestions(self, codes: Iterable[str]) -> List[Dict]:
+        """'Did you mean' entries for the normalized codes that are unknown"""
+        entries = []
+        for code in codes:
+            if code and code not in self._known:
+                suggested = self.suggest(code)
+                if suggested:
+                    entries.append({"course_code": code, "suggestions": suggested})
+        return entries
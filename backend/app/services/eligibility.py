@@ -6,6 +6,10 @@ Core logic for checking transfer eligibility against requirements
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 
+from app.services.cache import VerificationCache, verification_key
+from app.services.requirement_index import RequirementIndex, course_college, normalize_course_code
+from app.services.requirement_rules import course_units
+
 
 @dataclass
 class CourseMatch:
@@ -14,6 +18,7 @@ class CourseMatch:
     completed: bool
     matched_course: Optional[str] = None
     acceptable_courses: List[str] = None
+    rule: Optional[str] = None  # readable rule, for requirements beyond a one-of list
 
 
 @dataclass
@@ -38,9 +43,43 @@ class EligibilityChecker:
         "F": 0.0
     }
     
-    def __init__(self, requirements: Dict, equivalencies: Dict):
+    # Risk and eligibility wording, shared with the cohort engine
+    RISK_MESSAGES = {
+        "gpa_low": "GPA ({gpa}) is below minimum requirement ({min_gpa})",
+        "gpa_close": "GPA ({gpa}) meets minimum but may not be competitive",
+        "units_low": "Need {min_units} units minimum, have {total_units}",
+        "units_high": "Unit count ({total_units}) exceeds {max_units} cap",
+        "major_prep": "Missing {missing_count} required major prep course(s)",
+        "igetc": "IGETC areas incomplete: {areas}",
+    }
+    
+    ELIGIBILITY_MESSAGES = {
+        "likely_eligible": (
+            "You appear to meet the basic transfer requirements. "
+            "Verify with an advisor before applying."
+        ),
+        "conditional": (
+            "You meet GPA and unit requirements but are missing coursework. "
+            "Complete missing courses before applying."
+        ),
+        "not_yet_eligible": (
+            "You do not yet meet transfer requirements. "
+            "Review the issues below and work with an advisor."
+        ),
+    }
+    
+    def __init__(
+        self,
+        requirements: Dict,
+        equivalencies: Dict,
+        index: Optional[RequirementIndex] = None,
+        cache: Optional[VerificationCache] = None
+    ):
         self.requirements = requirements
         self.equivalencies = equivalencies
+        # Compile the inverted index once unless a prebuilt one is shared in
+        self.index = index or RequirementIndex(requirements, equivalencies)
+        self.cache = cache
     
     def calculate_gpa(self, courses: List[Dict]) -> float:
         """Calculate GPA from transcript courses"""
@@ -74,25 +113,27 @@ class EligibilityChecker:
             return {"completed": [], "missing": []}
         
         major_reqs = self.requirements[major].get("required_courses", [])
-        completed_codes = [c.get("course_code", "").upper() for c in courses]
+        plans = self.index.plans[major]
+        matches = self.index.match_requirements(
+            (normalize_course_code(c.get("course_code", "")) for c in courses),
+            major
+        )
+        # Per-code units are only needed by rules with unit minimums
+        units = course_units(courses) if any(plan.needs_units for plan in plans) else None
         
         completed = []
         missing = []
         
-        for req in major_reqs:
+        for req, plan, present in zip(major_reqs, plans, matches):
+            satisfied = plan.satisfied(present, units)
             match = CourseMatch(
                 requirement_name=req["name"],
-                completed=False,
-                matched_course=None,
-                acceptable_courses=req.get("equivalent_codes", [])
+                completed=satisfied,
+                matched_course=plan.matched(present) if satisfied else None,
+                acceptable_courses=plan.labels,
+                rule=plan.description
             )
             
-            for code in req.get("equivalent_codes", []):
-                if code.upper() in completed_codes:
-                    match.completed = True
-                    match.matched_course = code
-                    break
-            
             if match.completed:
                 completed.append(match)
             else:
@@ -114,16 +155,13 @@ class EligibilityChecker:
             return {}
         
         igetc_reqs = self.requirements[major].get("igetc_areas", {})
-        college_equiv = self.equivalencies.get(college, {})
-        
-        # Find which IGETC areas are satisfied by completed courses
-        satisfied_areas = set()
-        completed_codes = [c.get("course_code", "").upper() for c in courses]
         
-        for code in completed_codes:
-            if code in college_equiv:
-                areas = college_equiv[code].get("igetc", [])
-                satisfied_areas.update(areas)
+        # Find which IGETC areas are satisfied by completed courses, each
+        # articulated at the college it was taken at
+        satisfied_areas = self.index.articulated_areas(
+            (course_college(c, college), normalize_course_code(c.get("course_code", "")))
+            for c in courses
+        )
         
         # Build status for each required area
         result = {}
@@ -159,14 +197,14 @@ class EligibilityChecker:
             risks.append(RiskItem(
                 type="GPA",
                 severity="high",
-                message=f"GPA ({gpa}) is below minimum requirement ({min_gpa})",
+                message=self.RISK_MESSAGES["gpa_low"].format(gpa=gpa, min_gpa=min_gpa),
                 source=reqs.get("source_url", "")
             ))
         elif gpa < min_gpa + 0.3:
             risks.append(RiskItem(
                 type="GPA",
                 severity="medium",
-                message=f"GPA ({gpa}) meets minimum but may not be competitive",
+                message=self.RISK_MESSAGES["gpa_close"].format(gpa=gpa),
                 source=reqs.get("source_url", "")
             ))
         
@@ -178,14 +216,14 @@ class EligibilityChecker:
             risks.append(RiskItem(
                 type="Units",
                 severity="high",
-                message=f"Need {min_units} units minimum, have {total_units}",
+                message=self.RISK_MESSAGES["units_low"].format(min_units=min_units, total_units=total_units),
                 source=reqs.get("source_url", "")
             ))
         elif total_units > max_units:
             risks.append(RiskItem(
                 type="Units",
                 severity="medium",
-                message=f"Unit count ({total_units}) exceeds {max_units} cap",
+                message=self.RISK_MESSAGES["units_high"].format(total_units=total_units, max_units=max_units),
                 source=reqs.get("source_url", "")
             ))
         
@@ -195,7 +233,7 @@ class EligibilityChecker:
             risks.append(RiskItem(
                 type="Major Prep",
                 severity="high",
-                message=f"Missing {missing_count} required major prep course(s)",
+                message=self.RISK_MESSAGES["major_prep"].format(missing_count=missing_count),
                 source="https://assist.org"
             ))
         
@@ -208,7 +246,7 @@ class EligibilityChecker:
             risks.append(RiskItem(
                 type="IGETC",
                 severity="medium",
-                message=f"IGETC areas incomplete: {', '.join(missing_igetc)}",
+                message=self.RISK_MESSAGES["igetc"].format(areas=", ".join(missing_igetc)),
                 source="https://assist.org/transfer/igetc"
             ))
         
@@ -237,23 +275,28 @@ class EligibilityChecker:
         major_prep_ok = len(major_status.get("missing", [])) == 0
         
         if gpa_ok and units_ok and major_prep_ok:
-            return (
-                "likely_eligible",
-                "You appear to meet the basic transfer requirements. "
-                "Verify with an advisor before applying."
-            )
+            status = "likely_eligible"
         elif gpa_ok and units_ok:
-            return (
-                "conditional",
-                "You meet GPA and unit requirements but are missing coursework. "
-                "Complete missing courses before applying."
-            )
+            status = "conditional"
         else:
-            return (
-                "not_yet_eligible",
-                "You do not yet meet transfer requirements. "
-                "Review the issues below and work with an advisor."
-            )
+            status = "not_yet_eligible"
+        return (status, self.ELIGIBILITY_MESSAGES[status])
+    
+    def run_cohort_verification(
+        self,
+        transcripts: List[List[Dict]],
+        colleges: Any,
+        major: str,
+        target_uc: str = "UCSC"
+    ) -> List[Dict[str, Any]]:
+        """
+        Verify many transcripts at once with the vectorized cohort engine
+        `colleges` is one college for everyone or one per transcript.
+        Returns the same per-student results as run_full_verification
+        """
+        from app.services.cohort import CohortEvaluator
+        
+        return CohortEvaluator(self).evaluate(transcripts, colleges, major, target_uc)
     
     def run_full_verification(
         self,
@@ -264,12 +307,45 @@ class EligibilityChecker:
     ) -> Dict[str, Any]:
         """
         Run complete eligibility verification
-        Returns full verification result
+        Returns full verification result (shared, read-only when cached)
         """
+        key = None
+        if self.cache is not None:
+            key = verification_key(courses, college, major, target_uc, self.index.version)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        result = self._verify(courses, college, major, target_uc)
+        if key is not None:
+            self.cache.put(key, result)
+        return result
+    
+    def _verify(
+        self,
+        courses: List[Dict],
+        college: str,
+        major: str,
+        target_uc: str
+    ) -> Dict[str, Any]:
         gpa = self.calculate_gpa(courses)
         total_units = self.calculate_total_units(courses)
         major_status = self.check_major_requirements(courses, major)
         igetc_status = self.check_igetc_areas(courses, college, major)
+        return self.build_result(
+            gpa, total_units, major_status, igetc_status, major, target_uc
+        )
+    
+    def build_result(
+        self,
+        gpa: float,
+        total_units: float,
+        major_status: Dict,
+        igetc_status: Dict,
+        major: str,
+        target_uc: str
+    ) -> Dict[str, Any]:
+        """Assemble the verification result from computed transcript facts"""
         risks = self.identify_risks(
             gpa, total_units, major_status, igetc_status, major
         )
@@ -277,6 +353,50 @@ class EligibilityChecker:
             gpa, total_units, major_status, major
         )
         
+        return self.result_document(
+            eligibility_status,
+            eligibility_message,
+            gpa,
+            total_units,
+            [
+                self._requirement_entry(m, "matched_course", m.matched_course)
+                for m in major_status["completed"]
+            ],
+            [
+                self._requirement_entry(m, "acceptable_courses", m.acceptable_courses)
+                for m in major_status["missing"]
+            ],
+            igetc_status,
+            [
+                {
+                    "type": r.type,
+                    "severity": r.severity,
+                    "message": r.message,
+                    "source": r.source,
+                }
+                for r in risks
+            ],
+            major,
+            target_uc
+        )
+    
+    def result_document(
+        self,
+        eligibility_status: str,
+        eligibility_message: str,
+        gpa: float,
+        total_units: float,
+        completed: List[Dict],
+        missing: List[Dict],
+        igetc_status: Dict,
+        risks: List[Dict],
+        major: str,
+        target_uc: str
+    ) -> Dict[str, Any]:
+        """
+        The verification result layout, from its evaluated parts
+        Shared by the scalar path and the cohort (batch) path
+        """
         reqs = self.requirements.get(major, {})
         
         return {
@@ -291,31 +411,11 @@ class EligibilityChecker:
                 "target_uc": target_uc,
             },
             "major_requirements": {
-                "completed": [
-                    {
-                        "requirement": m.requirement_name,
-                        "matched_course": m.matched_course,
-                    }
-                    for m in major_status["completed"]
-                ],
-                "missing": [
-                    {
-                        "requirement": m.requirement_name,
-                        "acceptable_courses": m.acceptable_courses,
-                    }
-                    for m in major_status["missing"]
-                ],
+                "completed": completed,
+                "missing": missing,
             },
             "igetc_status": igetc_status,
-            "risks": [
-                {
-                    "type": r.type,
-                    "severity": r.severity,
-                    "message": r.message,
-                    "source": r.source,
-                }
-                for r in risks
-            ],
+            "risks": risks,
             "notes": reqs.get("notes", []),
             "sources": {
                 "ucsc_transfer": reqs.get("source_url", ""),
@@ -326,3 +426,10 @@ class EligibilityChecker:
                 "It is NOT official advice. Always confirm with an academic counselor."
             )
         }
+    
+    @staticmethod
+    def _requirement_entry(match: CourseMatch, field: str, value: Any) -> Dict[str, Any]:
+        entry = {"requirement": match.requirement_name, field: value}
+        if match.rule:
+            entry["rule"] = match.rule
+        return entry
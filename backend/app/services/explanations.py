@@ -0,0 +1,186 @@
+"""
+Explanation Service
+Streams LLM explanations of stored verification results. Explanations are
+cached by prompt and result, identical concurrent requests share one model
+call, and a slow or failing model falls back to the rule-based summary
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+from app.prompting.prompt_builder import build_explanation_prompt
+from app.prompting.prompts import SYSTEM_PROMPT
+from app.services.cache import VerificationCache
+from app.services.explainer import ResultExplainer
+from app.services.llm import LLMClient, LLMError
+
+# Seconds to wait for the first token, then for the whole explanation
+LLM_FIRST_TOKEN_TIMEOUT = float(os.getenv("LLM_FIRST_TOKEN_TIMEOUT", "5"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+
+EXPLAIN_CACHE_SIZE = int(os.getenv("EXPLAIN_CACHE_SIZE", "2048"))
+EXPLAIN_CACHE_TTL = float(os.getenv("EXPLAIN_CACHE_TTL", "86400"))
+
+logger = logging.getLogger(__name__)
+
+
+def explanation_key(model: str, prompt: str, result: Dict) -> str:
+    """Hash of everything an explanation depends on"""
+    payload = json.dumps([model, SYSTEM_PROMPT, prompt, result], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Generation:
+    """
+    One explanation as it is produced
+    Chunks are kept as they arrive, so any number of requests can follow
+    the same generation: each replays what it missed, then waits for more.
+    source is 'model', 'cache', 'fallback' (the model was slow, failed or
+    returned nothing) or 'partial' (the model stopped after some text)
+    """
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.source: Optional[str] = None
+        self._changed = asyncio.Event()
+
+    @classmethod
+    def completed(cls, text: str, source: str) -> "Generation":
+        generation = cls()
+        generation.publish(text)
+        generation.finish(source)
+        return generation
+
+    def publish(self, chunk: str) -> None:
+        self.chunks.append(chunk)
+        self._wake()
+
+    def finish(self, source: str) -> None:
+        self.source = source
+        self.done = True
+        self._wake()
+
+    def _wake(self) -> None:
+        # Waiters hold the old event; the next wait uses a fresh one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self) -> AsyncIterator[str]:
+        """Yield every chunk, from the first, until the generation finishes"""
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                return
+            await changed.wait()
+
+
+class ExplanationService:
+    """
+    Explanations for verification results, produced off the request path
+    A model call runs as its own task, so a client that disconnects does
+    not cancel it for other followers, and its output is still cached
+    """
+
+    def __init__(
+        self,
+        model: LLMClient,
+        cache: Optional[VerificationCache] = None,
+        first_token_timeout: float = LLM_FIRST_TOKEN_TIMEOUT,
+        timeout: float = LLM_TIMEOUT
+    ):
+        self.model = model
+        self.cache = cache or VerificationCache(EXPLAIN_CACHE_SIZE, EXPLAIN_CACHE_TTL)
+        self.first_token_timeout = first_token_timeout
+        self.timeout = timeout
+        self._inflight: Dict[str, Generation] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.model_calls = 0
+        self.coalesced = 0
+        self.fallbacks = 0
+
+    def explain(self, user: Dict, result: Dict) -> Generation:
+        """The cached, in-flight or newly started explanation of a result"""
+        prompt = build_explanation_prompt(user, result)
+        key = explanation_key(self.model.name, prompt, result)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return Generation.completed(cached, "cache")
+        generation = self._inflight.get(key)
+        if generation is not None:
+            self.coalesced += 1
+            return generation
+
+        generation = Generation()
+        self._inflight[key] = generation
+        task = asyncio.create_task(self._generate(key, generation, prompt, result))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return generation
+
+    async def _generate(self, key: str, generation: Generation, prompt: str, result: Dict) -> None:
+        self.model_calls += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        chunks = self.model.stream(SYSTEM_PROMPT, prompt)
+        # Only a stream that ends cleanly is complete and may be cached
+        source = "partial"
+        try:
+            wait = self.first_token_timeout
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(anext(chunks), min(wait, deadline - loop.time()))
+                except StopAsyncIteration:
+                    source = "model"
+                    break
+                generation.publish(chunk)
+                wait = self.timeout
+        except (asyncio.TimeoutError, LLMError):
+            pass
+        except Exception:
+            # Nobody awaits this task, so report the failure here
+            logger.exception("Explanation stream from %s failed", self.model.name)
+        finally:
+            self._inflight.pop(key, None)
+            await chunks.aclose()
+            text = "".join(generation.chunks)
+            if not text.strip():
+                # Nothing was sent yet, so the rule-based summary stands in
+                self.fallbacks += 1
+                generation.publish(ResultExplainer.generate_summary_paragraph(result))
+                source = "fallback"
+            elif source == "model":
+                self.cache.put(key, text)
+            generation.finish(source)
+
+    async def close(self) -> None:
+        """Cancel running model calls and release the model client"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.model.close()
+
+    def stats(self) -> Dict:
+        return {
+            "model": self.model.name,
+            "model_calls": self.model_calls,
+            "coalesced": self.coalesced,
+            "fallbacks": self.fallbacks,
+            "in_flight": len(self._inflight),
+            "cache": self.cache.stats(),
+        }
+
+
+async def sse_events(generation: Generation) -> AsyncIterator[str]:
+    """Server-sent events for a generation: 'token' events, then 'done'"""
+    async for chunk in generation.follow():
+        yield f"event: token\ndata: {json.dumps({'text': chunk})}\n\n"
+    yield f"event: done\ndata: {json.dumps({'source': generation.source})}\n\n"
@@ -0,0 +1,160 @@
+"""
+HTTP Caching
+Strong ETags, If-None-Match handling and Cache-Control for JSON responses,
+so polled and reference endpoints can answer 304 instead of a full body,
+plus gzip/brotli variants compressed once for bodies that never change
+Brotli variants need the optional brotli package (pip install brotli);
+without it, bodies are served gzip-compressed only
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Reference data only changes on deploy; per-user documents are revalidated
+# on every poll, which a matching ETag turns into an empty 304
+REFERENCE_MAX_AGE = int(os.getenv("REFERENCE_MAX_AGE", "3600"))
+REFERENCE_CACHE_CONTROL = f"public, max-age={REFERENCE_MAX_AGE}"
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+# Precompressed bodies are built once, so they use the slowest settings
+GZIP_LEVEL = int(os.getenv("REFERENCE_GZIP_LEVEL", "9"))
+BROTLI_QUALITY = int(os.getenv("REFERENCE_BROTLI_QUALITY", "11"))
+COMPRESS_MIN_BYTES = int(os.getenv("REFERENCE_COMPRESS_MIN_BYTES", "512"))
+
+# Preferred content codings, best first
+ENCODING_PREFERENCE = ("br", "gzip")
+
+
+def encode_json(payload: Any) -> bytes:
+    """Encode a payload the way FastAPI's JSONResponse does"""
+    return json.dumps(
+        payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def strong_etag(body: bytes) -> str:
+    """Quoted strong entity tag for a response body"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison, RFC 9110)"""
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+class EncodedJSON:
+    """A JSON payload encoded once, with its strong ETag"""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, payload: Any):
+        self.body = encode_json(payload)
+        self.etag = strong_etag(self.body)
+
+
+def _brotli_compress(body: bytes) -> Optional[bytes]:
+    """Brotli-compressed body, or None when the brotli package is not installed"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(body, quality=BROTLI_QUALITY)
+
+
+class PrecompressedJSON(EncodedJSON):
+    """
+    An encoded JSON payload plus its compressed variants
+    variants maps a content coding to (body, ETag); a coding is kept only
+    when it makes the body smaller. Each variant has its own strong ETag,
+    since its bytes differ from the identity body's
+    """
+
+    __slots__ = ("variants",)
+
+    def __init__(self, payload: Any):
+        super().__init__(payload)
+        self.variants: Dict[str, tuple] = {}
+        if len(self.body) < COMPRESS_MIN_BYTES:
+            return
+        compressed = {
+            "br": _brotli_compress(self.body),
+            "gzip": gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0),
+        }
+        for coding, body in compressed.items():
+            if body is not None and len(body) < len(self.body):
+                self.variants[coding] = (body, f'{self.etag[:-1]}-{coding}"')
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """Content codings from an Accept-Encoding header, with their q-values"""
+    accepted: Dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str], available: Any) -> Optional[str]:
+    """Best available content coding the client accepts, or None for identity"""
+    accepted = accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in ENCODING_PREFERENCE:
+        quality = accepted.get(coding, wildcard)
+        if coding in available and quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def conditional_json(
+    request: Request,
+    payload: Any,
+    cache_control: str = PRIVATE_CACHE_CONTROL
+) -> Response:
+    """
+    JSON response carrying an ETag and Cache-Control
+    Returns an empty 304 when the request's If-None-Match already matches.
+    payload may be an EncodedJSON to reuse a body encoded earlier; a
+    PrecompressedJSON is sent in the best coding the client accepts
+    """
+    encoded = payload if isinstance(payload, EncodedJSON) else EncodedJSON(payload)
+    body, etag = encoded.body, encoded.etag
+    headers = {"Cache-Control": cache_control}
+    variants = getattr(encoded, "variants", None)
+    if variants is not None:
+        headers["Vary"] = "Accept-Encoding"
+        coding = choose_encoding(request.headers.get("accept-encoding"), variants)
+        if coding is not None:
+            body, etag = variants[coding]
+            headers["Content-Encoding"] = coding
+    headers["ETag"] = etag
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
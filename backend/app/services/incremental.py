@@ -0,0 +1,277 @@
+"""
+Incremental Verification State
+Running totals for GPA, units, requirement matches and IGETC coverage,
+persisted next to the transcript so an edit only touches the changed courses
+"""
+
+import hashlib
+import json
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.services.metrics import stage_clock
+from app.services.requirement_index import RequirementIndex, normalize_course_code
+
+# Bumped when the persisted layout changes; older state is rebuilt
+STATE_FORMAT = 5
+
+# (code, centi-units, grade, college tag), see _course_key
+CourseKey = Tuple[str, int, str, str]
+
+# Grade scale used by the /api/verify endpoint
+GRADE_POINTS = {"A": 4.0, "A-": 3.7, "B+": 3.3, "B": 3.0, "B-": 2.7,
+                "C+": 2.3, "C": 2.0, "C-": 1.7, "D+": 1.3, "D": 1.0, "F": 0.0}
+
+
+def _course_key(course: Dict) -> CourseKey:
+    """
+    The parts of a course that affect verification:
+    (code, centi-units, grade, college tag or '' for the student's own college)
+    """
+    return (
+        normalize_course_code(course.get("course_code", "")),
+        round(float(course.get("units", 0)) * 100),
+        (course.get("grade") or "").upper(),
+        (course.get("college") or "").strip(),
+    )
+
+
+def transcript_digest(courses: Iterable[Dict]) -> str:
+    """Order-independent hash of the course keys of a transcript"""
+    keys = sorted(_course_key(course) for course in courses)
+    return hashlib.sha256(json.dumps(keys, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+class TranscriptAccumulator:
+    """
+    Incrementally maintained verification inputs for one transcript
+
+    Units are kept in hundredths and grade points in thousandths so that
+    adding and removing courses never accumulates float drift. matches
+    holds, per requirement, the mask of its codes on the transcript, so a
+    removal clears a bit instead of re-resolving the requirement. Masks are
+    persisted as hex strings, since a requirement may list more codes than
+    fit in a 64-bit Firestore integer. Courses may come from several
+    colleges: major prep matches on the code alone, while IGETC areas are
+    resolved per (college, code) through the index's articulation join, and
+    college_codes keeps the codes per college so the state can be
+    re-targeted. The state is only valid for the transcript,
+    home college, major and requirements-data version it was built against;
+    load() returns None when any of them changed.
+    """
+
+    def __init__(self, index: RequirementIndex, college: str, major: str):
+        self.index = index
+        self.college = college
+        self.major = major
+        self.grade_points = 0
+        self.graded_units = 0
+        self.total_units_centi = 0
+        self.codes: Dict[str, int] = {}
+        self.code_units: Dict[str, int] = {}
+        self.college_codes: Dict[str, Dict[str, int]] = {}
+        self.matches: List[int] = [0] * index.requirement_counts.get(major, 0)
+        self.igetc: Dict[str, int] = {}
+
+    @classmethod
+    def from_transcript(
+        cls,
+        courses: Iterable[Dict],
+        index: RequirementIndex,
+        college: str,
+        major: str
+    ) -> "TranscriptAccumulator":
+        """Build the state from scratch"""
+        state = cls(index, college, major)
+        keys = [_course_key(course) for course in courses]
+        stage_clock().lap("transcript_state")
+        state._update([], keys)
+        return state
+
+    @classmethod
+    def load(
+        cls,
+        data: Optional[Dict],
+        index: RequirementIndex,
+        college: str,
+        major: str,
+        courses: Iterable[Dict]
+    ) -> Optional["TranscriptAccumulator"]:
+        """
+        Restore persisted state, or None if it is missing or stale
+        `courses` is the stored transcript the state should reflect
+        """
+        if not data:
+            return None
+        if (
+            data.get("format") != STATE_FORMAT
+            or data.get("transcript") != transcript_digest(courses)
+            or data.get("version") != index.version
+            or data.get("college") != college
+            or data.get("major") != major
+        ):
+            return None
+        state = cls(index, college, major)
+        state.grade_points = data["grade_points"]
+        state.graded_units = data["graded_units"]
+        state.total_units_centi = data["total_units"]
+        state.codes = dict(data["codes"])
+        state.code_units = dict(data["code_units"])
+        state.college_codes = {college: dict(codes) for college, codes in data["college_codes"].items()}
+        state.matches = [int(mask, 16) for mask in data["matches"]]
+        state.igetc = dict(data["igetc"])
+        return state
+
+    def to_dict(self, courses: Iterable[Dict]) -> Dict:
+        """Serialize for storage next to `courses`, the transcript it reflects"""
+        return {
+            "format": STATE_FORMAT,
+            "transcript": transcript_digest(courses),
+            "version": self.index.version,
+            "college": self.college,
+            "major": self.major,
+            "grade_points": self.grade_points,
+            "graded_units": self.graded_units,
+            "total_units": self.total_units_centi,
+            "codes": dict(self.codes),
+            "code_units": dict(self.code_units),
+            "college_codes": {college: dict(codes) for college, codes in self.college_codes.items()},
+            "matches": [format(mask, "x") for mask in self.matches],
+            "igetc": dict(self.igetc),
+        }
+
+    def rebind(self, index: RequirementIndex) -> "TranscriptAccumulator":
+        """
+        Re-target this state at another campus index for the same major
+        Totals and code counts are shared as-is; only requirement and
+        IGETC matching are recomputed, from the distinct codes per college
+        """
+        state = TranscriptAccumulator(index, self.college, self.major)
+        state.grade_points = self.grade_points
+        state.graded_units = self.graded_units
+        state.total_units_centi = self.total_units_centi
+        state.codes = dict(self.codes)
+        state.code_units = dict(self.code_units)
+        state.college_codes = {college: dict(codes) for college, codes in self.college_codes.items()}
+        for code in self.codes:
+            postings = index.requirement_postings.get(code, {})
+            for position, rank in postings.get(self.major, ()):
+                state.matches[position] |= 1 << rank
+        for college, codes in self.college_codes.items():
+            for code, count in codes.items():
+                for area in index.articulation.get((college, code), ()):
+                    state.igetc[area] = state.igetc.get(area, 0) + count
+        return state
+
+    # ===================== UPDATES =====================
+
+    def apply(self, old_courses: Iterable[Dict], new_courses: Iterable[Dict]) -> int:
+        """
+        Move the state from one transcript to another by applying the diff
+        Returns the number of course changes applied
+        """
+        old = Counter(_course_key(c) for c in old_courses)
+        new = Counter(_course_key(c) for c in new_courses)
+        removed = list((old - new).elements())
+        added = list((new - old).elements())
+        stage_clock().lap("transcript_state")
+        self._update(removed, added)
+        return len(removed) + len(added)
+
+    def _update(self, removed: List[CourseKey], added: List[CourseKey]) -> None:
+        """
+        Remove then add courses, one kind of matching at a time
+        Inside a timed operation each kind is recorded as a stage
+        """
+        clock = stage_clock()
+        for key in removed:
+            self._count_units(key, -1)
+        for key in added:
+            self._count_units(key, 1)
+        clock.lap("gpa")
+        for key in removed:
+            self._remove_code(key)
+        for key in added:
+            self._add_code(key)
+        clock.lap("requirements")
+        for key in removed:
+            self._remove_articulation(key)
+        for key in added:
+            self._add_articulation(key)
+        clock.lap("igetc")
+
+    def _count_units(self, key: CourseKey, sign: int) -> None:
+        _, units, grade, _ = key
+        self.total_units_centi += sign * units
+        if grade in GRADE_POINTS:
+            self.grade_points += sign * round(GRADE_POINTS[grade] * 10) * units
+            self.graded_units += sign * units
+
+    def _add_code(self, key: CourseKey) -> None:
+        code, units, _, _ = key
+        if not code:
+            return
+        count = self.codes.get(code, 0)
+        self.codes[code] = count + 1
+        self.code_units[code] = self.code_units.get(code, 0) + units
+        if count == 0:
+            postings = self.index.requirement_postings.get(code, {})
+            for position, rank in postings.get(self.major, ()):
+                self.matches[position] |= 1 << rank
+
+    def _remove_code(self, key: CourseKey) -> None:
+        code, units, _, _ = key
+        if not code:
+            return
+        count = self.codes.get(code, 0) - 1
+        if count > 0:
+            self.codes[code] = count
+            self.code_units[code] -= units
+        else:
+            self.codes.pop(code, None)
+            self.code_units.pop(code, None)
+            postings = self.index.requirement_postings.get(code, {})
+            for position, rank in postings.get(self.major, ()):
+                self.matches[position] &= ~(1 << rank)
+
+    def _add_articulation(self, key: CourseKey) -> None:
+        code, _, _, college = key
+        if not code:
+            return
+        college = college or self.college
+        college_codes = self.college_codes.setdefault(college, {})
+        college_codes[code] = college_codes.get(code, 0) + 1
+        for area in self.index.articulation.get((college, code), ()):
+            self.igetc[area] = self.igetc.get(area, 0) + 1
+
+    def _remove_articulation(self, key: CourseKey) -> None:
+        code, _, _, college = key
+        if not code:
+            return
+        college = college or self.college
+        college_codes = self.college_codes.get(college, {})
+        if college_codes.get(code, 0) > 1:
+            college_codes[code] -= 1
+        else:
+            college_codes.pop(code, None)
+            if not college_codes:
+                self.college_codes.pop(college, None)
+        for area in self.index.articulation.get((college, code), ()):
+            remaining = self.igetc.get(area, 0) - 1
+            if remaining > 0:
+                self.igetc[area] = remaining
+            else:
+                self.igetc.pop(area, None)
+
+    # ===================== DERIVED VALUES =====================
+
+    @property
+    def gpa(self) -> float:
+        return self.grade_points / (self.graded_units * 10) if self.graded_units > 0 else 0.0
+
+    @property
+    def total_units(self) -> float:
+        return self.total_units_centi / 100
+
+    def igetc_areas(self) -> Set[str]:
+        return set(self.igetc)
@@ -1,18 +1,133 @@
-from string import Template
-
-SYSTEM_PROMPT = """
-You are a college advising assiastnt. 
-Provide transfering guidance based only on the user's academic information.
-State only the facts, and do not include a formal introduction (e.g. greeting the individual).
-Provide only the summary, and seem potentially more robotic. 
 """
+LLM Clients
+Streaming text generation behind one async interface, with a deterministic
+local stand-in for development and tests and an OpenAI-compatible client
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+# Model backend: "stub" (default, local) or "openai" (any OpenAI-compatible API)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "stub")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://api.openai.com/v1")
+LLM_API_KEY = os.getenv("LLM_API_KEY", "")
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "400"))
+
+# Seconds the stub waits per token, to exercise slow-model handling
+LLM_STUB_DELAY = float(os.getenv("LLM_STUB_DELAY", "0"))
+
+
+class LLMError(Exception):
+    """Raised when the model call fails"""
+
+
+class LLMClient(ABC):
+    """Streams a completion for a system prompt and a user prompt"""
+
+    # Identifies the model in cache keys, so switching models misses the cache
+    name: str
+
+    @abstractmethod
+    def stream(self, system: str, prompt: str) -> AsyncIterator[str]:
+        """Yield the completion as text chunks; raises LLMError on failure"""
+
+    async def close(self) -> None:
+        """Release connections held by the client"""
+
+
+class StubLLM(LLMClient):
+    """
+    Local stand-in model
+    Deterministically restates the prompt's content lines word by word, so
+    responses are stable for a prompt and tests can count model calls
+    """
+
+    name = "stub"
+
+    def __init__(self, delay: float = LLM_STUB_DELAY):
+        self.delay = delay
+        self.calls = 0
+
+    async def stream(self, system: str, prompt: str) -> AsyncIterator[str]:
+        self.calls += 1
+        facts = [line.strip("- ").strip() for line in prompt.splitlines() if line.strip().startswith("-")]
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        text = f"Summary ({digest}): " + "; ".join(facts) + "."
+        for word in re.findall(r"\S+\s*", text):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield word
+
+
+class OpenAICompatibleLLM(LLMClient):
+    """
+    Chat-completions client for OpenAI-compatible APIs, streamed over SSE
+    httpx is imported when the client is created, so it is only needed
+    by deployments that use a hosted model
+    """
+
+    def __init__(
+        self,
+        base_url: str = LLM_BASE_URL,
+        api_key: str = LLM_API_KEY,
+        model: str = LLM_MODEL,
+        max_tokens: int = LLM_MAX_TOKENS
+    ):
+        import httpx
+
+        self.name = f"openai:{model}"
+        self.model = model
+        self.max_tokens = max_tokens
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=httpx.Timeout(60.0, connect=5.0),
+        )
+
+    async def stream(self, system: str, prompt: str) -> AsyncIterator[str]:
+        import httpx
+
+        request = {
+            "model": self.model,
+            "stream": True,
+            "max_tokens": self.max_tokens,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+        }
+        try:
+            async with self._client.stream("POST", "/chat/completions", json=request) as response:
+                if response.status_code != 200:
+                    body = (await response.aread()).decode("utf-8", errors="replace")
+                    raise LLMError(f"Model returned {response.status_code}: {body[:200]}")
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        return
+                    choices = json.loads(data).get("choices") or [{}]
+                    text = (choices[0].get("delta") or {}).get("content")
+                    if text:
+                        yield text
+        except (httpx.HTTPError, json.JSONDecodeError) as e:
+            raise LLMError(f"Model call failed: {e}") from e
+
+    async def close(self) -> None:
+        await self._client.aclose()
 
-USER_PROMPT_TEMPLATE = Template("""
-Student Information:
-- Name: $name
-- Current Community College: $community_college
-- Target University: $target_uc
-- Target Major: $major
 
-Prompt: Summarize the details of this user and provide feedback.
-""")
+def create_llm_client(backend: str = LLM_BACKEND) -> LLMClient:
+    """Build the configured model client"""
+    if backend == "stub":
+        return StubLLM()
+    if backend == "openai":
+        return OpenAICompatibleLLM()
+    raise ValueError(f"Unknown LLM_BACKEND: {backend}")
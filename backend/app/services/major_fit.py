@@ -0,0 +1,200 @@
+"""
+Major Fit Service
+Ranks every UC and CSU major by how close a transcript is to its lower
+division preparation. Requirement nodes such as "Calculus I" are shared by
+many majors, so each node is evaluated once per transcript and every major
+is then scored with a single bitmask operation
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from app.services.reference_data import load_catalog
+from app.services.requirement_index import normalize_course_code
+from app.services.requirement_rules import requirement_codes
+
+# Abbreviations seen in course titles, expanded before comparing titles
+TITLE_ALIASES = {
+    "intro": "introduction",
+    "math": "mathematics",
+    "calc": "calculus",
+    "chem": "chemistry",
+    "bio": "biology",
+    "psych": "psychology",
+    "stats": "statistics",
+}
+
+
+def normalize_title(title: str) -> str:
+    """Normalize a course or major title for comparison"""
+    title = re.sub(r"\(.*?\)", " ", (title or "").lower())
+    tokens = re.findall(r"[a-z0-9]+", title)
+    return " ".join(TITLE_ALIASES.get(token, token) for token in tokens)
+
+
+@dataclass
+class CatalogMajor:
+    """A catalog major compiled to a requirement-node bitmask"""
+    name: str
+    system: str  # 'UC' or 'CSU'
+    campuses: List[str]
+    category: str
+    requirement_mask: int
+    requirement_count: int
+
+
+class MajorFitIndex:
+    """
+    Shared requirement nodes plus one bitmask per catalog major
+
+    A node is satisfied by a transcript course whose code is one of its
+    articulated codes (from the UC requirements data) or whose title matches
+    the node title (for ADT common courses, which carry no codes).
+    Majors are linked to the ADT degrees that list them as related majors.
+    """
+
+    def __init__(self):
+        self.node_names: List[str] = []
+        self._title_nodes: Dict[str, int] = {}
+        self._code_masks: Dict[str, int] = {}
+        self.majors: List[CatalogMajor] = []
+
+    def _node(self, title: str) -> int:
+        """Intern a requirement node by normalized title, returning its bit"""
+        key = normalize_title(title)
+        if key not in self._title_nodes:
+            self._title_nodes[key] = len(self.node_names)
+            self.node_names.append(title)
+        return 1 << self._title_nodes[key]
+
+    @classmethod
+    def build(
+        cls,
+        requirements: Dict,
+        uc_majors: List[Dict],
+        csu_majors: List[Dict],
+        cc_majors: List[Dict]
+    ) -> "MajorFitIndex":
+        """Compile catalogs into shared nodes and per-major masks"""
+        index = cls()
+
+        # Articulated requirements carry course codes
+        major_masks: Dict[str, int] = {}
+        for major, major_reqs in requirements.items():
+            mask = 0
+            for req in major_reqs.get("required_courses", []):
+                bit = index._node(req["name"])
+                mask |= bit
+                for code in requirement_codes(req):
+                    index._code_masks[code] = index._code_masks.get(code, 0) | bit
+            major_masks[normalize_title(major)] = mask
+
+        # ADT common courses, keyed by the UC/CSU majors they feed into
+        related: Dict[str, Dict[str, int]] = {"UC": {}, "CSU": {}}
+        for adt in cc_majors:
+            mask = 0
+            for title in adt.get("commonCourses", []):
+                mask |= index._node(title)
+            for system, field in (("UC", "relatedUCMajors"), ("CSU", "relatedCSUMajors")):
+                for name in adt.get(field, []):
+                    key = normalize_title(name)
+                    related[system][key] = related[system].get(key, 0) | mask
+
+        def linked_mask(system: str, names: Iterable[str]) -> int:
+            mask = 0
+            for name in names:
+                key = normalize_title(name)
+                mask |= major_masks.get(key, 0) if system == "UC" else 0
+                for rel, rel_mask in related[system].items():
+                    if key == rel or key.startswith(rel + " "):
+                        mask |= rel_mask
+            return mask
+
+        for major in uc_majors:
+            mask = linked_mask("UC", [major["name"]])
+            index.majors.append(CatalogMajor(
+                name=major["name"],
+                system="UC",
+                campuses=major.get("campuses", []),
+                category=major.get("category", ""),
+                requirement_mask=mask,
+                requirement_count=mask.bit_count(),
+            ))
+        for major in csu_majors:
+            mask = linked_mask("CSU", [major.get("baseMajor", ""), major["name"]])
+            index.majors.append(CatalogMajor(
+                name=major["name"],
+                system="CSU",
+                campuses=major.get("campuses", []),
+                category=major.get("baseMajor", ""),
+                requirement_mask=mask,
+                requirement_count=mask.bit_count(),
+            ))
+
+        return index
+
+    @classmethod
+    def from_reference_data(cls, requirements: Dict) -> "MajorFitIndex":
+        """Build from the bundled UC, CSU and ADT major catalogs"""
+        return cls.build(
+            requirements,
+            load_catalog("uc_majors")["majors"],
+            load_catalog("csu_majors")["majors"],
+            load_catalog("cc_majors")["majors"],
+        )
+
+    def transcript_mask(self, courses: Iterable[Dict]) -> int:
+        """Evaluate every shared requirement node against a transcript once"""
+        mask = 0
+        for course in courses:
+            mask |= self._code_masks.get(normalize_course_code(course.get("course_code", "")), 0)
+            node = self._title_nodes.get(normalize_title(course.get("course_name", "")))
+            if node is not None:
+                mask |= 1 << node
+        return mask
+
+    def _names(self, mask: int) -> List[str]:
+        names = []
+        while mask:
+            low = mask & -mask
+            names.append(self.node_names[low.bit_length() - 1])
+            mask ^= low
+        return names
+
+    def rank(
+        self,
+        courses: List[Dict],
+        system: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Rank catalog majors by fit (share of known prep already completed)
+        Majors without any linked requirements sort last
+        """
+        done = self.transcript_mask(courses)
+        scored = []
+        for major in self.majors:
+            if system and major.system != system:
+                continue
+            completed = (done & major.requirement_mask).bit_count()
+            fit = completed / major.requirement_count if major.requirement_count else 0.0
+            scored.append((-fit, -completed, major.requirement_count == 0, major.name, completed, major))
+        scored.sort(key=lambda item: item[:4])
+        if limit is not None:
+            scored = scored[:limit]
+
+        return [
+            {
+                "name": major.name,
+                "system": major.system,
+                "campuses": major.campuses,
+                "category": major.category,
+                "completed": completed,
+                "missing": major.requirement_count - completed,
+                "total": major.requirement_count,
+                "fit_score": round(-neg_fit, 3),
+                "missing_requirements": self._names(major.requirement_mask & ~done),
+            }
+            for neg_fit, _, _, _, completed, major in scored
+        ]
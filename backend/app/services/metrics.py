@@ -0,0 +1,267 @@
+"""
+Metrics
+Request latency, in-flight counts and per-stage timings of the verification
+hot path, rendered in the Prometheus text exposition format for /metrics.
+Metrics are kept per process and observed from the event loop thread
+"""
+
+import functools
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+METRICS_PREFIX = os.getenv("METRICS_PREFIX", "transfermap")
+
+# Seconds; stages go well below a millisecond, whole requests rarely do
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+# (labels, value) pairs of one metric, as returned by collectors
+Samples = List[Tuple[Dict[str, str], float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A named metric with a fixed set of label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = f"{METRICS_PREFIX}_{name}"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Gauge(Metric):
+    """A value that goes up and down, per label values"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {_number(value)}")
+        return lines
+
+
+class Histogram(Metric):
+    """
+    Observations counted into fixed buckets, per label values
+    Buckets are stored per bucket and made cumulative when rendered
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = REQUEST_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket..., count above the last bucket, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for values, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+            labels = _labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Metrics rendered together
+    Collectors are called at scrape time for values kept elsewhere (such
+    as cache counters) and return (name, kind, documentation, samples)
+    """
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.collectors: List[Callable[[], Iterable[Tuple[str, str, str, Samples]]]] = []
+
+    def add(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, collect: Callable[[], Iterable[Tuple[str, str, str, Samples]]]) -> None:
+        self.collectors.append(collect)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            for name, kind, documentation, samples in collect():
+                full_name = f"{METRICS_PREFIX}_{name}"
+                lines.append(f"# HELP {full_name} {documentation}")
+                lines.append(f"# TYPE {full_name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{full_name}{_labels(list(labels), list(labels.values()))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.add(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status"),
+))
+REQUESTS_IN_FLIGHT = REGISTRY.add(Gauge(
+    "http_requests_in_flight", "HTTP requests being served",
+))
+OPERATIONS_IN_FLIGHT = REGISTRY.add(Gauge(
+    "operations_in_flight", "Instrumented operations being served", ("operation",),
+))
+STAGE_SECONDS = REGISTRY.add(Histogram(
+    "stage_duration_seconds", "Time spent in each stage of an instrumented operation",
+    ("operation", "stage"), STAGE_BUCKETS,
+))
+
+
+# ===================== STAGES =====================
+
+class StageClock:
+    """
+    Times consecutive stages of one operation
+    Each lap records the time since the previous lap (or the start) under
+    the stage's name, so hooks only mark where a stage ends
+    """
+
+    __slots__ = ("operation", "last")
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        STAGE_SECONDS.observe(now - self.last, self.operation, stage)
+        self.last = now
+
+
+class _IdleClock:
+    """Stands in outside instrumented operations (batch jobs, scripts)"""
+
+    __slots__ = ()
+
+    def lap(self, stage: str) -> None:
+        pass
+
+
+IDLE_CLOCK = _IdleClock()
+
+_current_clock: ContextVar[Optional[StageClock]] = ContextVar("stage_clock", default=None)
+
+
+def stage_clock():
+    """The running operation's clock, or one that records nothing"""
+    return _current_clock.get() or IDLE_CLOCK
+
+
+def timed_operation(operation: str):
+    """
+    Decorate an async endpoint so stage laps inside it (including in the
+    services it calls) are recorded under `operation`
+    """
+    def decorate(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            token = _current_clock.set(StageClock(operation))
+            OPERATIONS_IN_FLIGHT.inc(operation)
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                OPERATIONS_IN_FLIGHT.dec(operation)
+                _current_clock.reset(token)
+        return wrapper
+    return decorate
+
+
+# ===================== MIDDLEWARE =====================
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request by method, route template
+    and status; paths that match no route share the 'unmatched' label
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # The router records the matched route in the shared scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], route, str(status))
@@ -0,0 +1,141 @@
+"""
+Reference Data
+Loads the college, campus and major catalogs shared with the frontend
+"""
+
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Catalog JSON lives with the frontend; override for deployments without it
+DATA_DIR = Path(os.getenv(
+    "REFERENCE_DATA_DIR",
+    Path(__file__).resolve().parents[3] / "frontend" / "src" / "data",
+))
+
+CATALOG_FILES = {
+    "community_colleges": "communityColleges.json",
+    "cc_majors": "ccMajors.json",
+    "uc_campuses": "ucCampuses.json",
+    "uc_majors": "ucMajors.json",
+    "csu_campuses": "csuCampuses.json",
+    "csu_majors": "csuMajors.json",
+}
+
+
+@lru_cache(maxsize=None)
+def load_catalog(name: str) -> Dict:
+    """Load and memoize one reference catalog by name"""
+    if name not in CATALOG_FILES:
+        raise KeyError(f"Unknown catalog: {name}")
+    snapshot_path = os.getenv("REFERENCE_SNAPSHOT")
+    if snapshot_path:
+        from app.services.snapshot import open_snapshot
+        return open_snapshot(snapshot_path).catalog(name)
+    with open(DATA_DIR / CATALOG_FILES[name], encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ===================== FILTERING =====================
+
+# Catalog -> (list key, count key, campus catalog for the campus filter,
+# field holding the category); None where a filter does not apply
+CATALOG_LISTS = {
+    "community_colleges": ("colleges", "totalColleges", None, None),
+    "cc_majors": ("majors", "totalMajors", None, "category"),
+    "uc_campuses": ("campuses", "totalCampuses", None, None),
+    "uc_majors": ("majors", "totalMajors", "uc_campuses", "category"),
+    "csu_campuses": ("campuses", "totalCampuses", None, None),
+    "csu_majors": ("majors", "totalMajors", "csu_campuses", None),
+}
+
+
+class CatalogFilterError(ValueError):
+    """Raised when a catalog does not support a requested filter"""
+
+
+class UnknownCampusError(LookupError):
+    """Raised when a campus filter names no campus in the campus catalog"""
+
+
+@lru_cache(maxsize=None)
+def campus_entries(name: str) -> Dict[str, Dict]:
+    """
+    Campus catalog entries for a major catalog, keyed by the label its
+    majors list them under (e.g. 'Santa Cruz' or 'UCLA')
+    """
+    list_key, _, campus_catalog, _ = CATALOG_LISTS[name]
+    used = {label for entry in load_catalog(name)[list_key] for label in entry.get("campuses", ())}
+    entries = {}
+    for campus in load_catalog(campus_catalog)["campuses"]:
+        names = [campus.get(field) for field in ("shortName", "name", "id") if campus.get(field)]
+        label = next((candidate for candidate in names if candidate in used), None)
+        if label is not None:
+            entries[label] = campus
+    return entries
+
+
+@lru_cache(maxsize=None)
+def campus_labels(name: str) -> Dict[str, str]:
+    """
+    Map a campus id, name or short name (lowercase) to the label a major
+    catalog lists it under, e.g. 'ucsc' -> 'Santa Cruz', 'ucla' -> 'UCLA'
+    """
+    labels = {}
+    for label, campus in campus_entries(name).items():
+        for field in ("shortName", "name", "id"):
+            if campus.get(field):
+                labels[campus[field].lower()] = label
+    return labels
+
+
+@lru_cache(maxsize=None)
+def campus_keys(campus_catalog: str) -> frozenset:
+    """Every campus id, name and short name (lowercase) in a campus catalog"""
+    return frozenset(
+        campus[field].lower()
+        for campus in load_catalog(campus_catalog)["campuses"]
+        for field in ("shortName", "name", "id")
+        if campus.get(field)
+    )
+
+
+def filter_catalog(
+    name: str,
+    campus: Optional[str] = None,
+    category: Optional[str] = None
+) -> Dict:
+    """
+    A catalog narrowed to entries offered at a campus and/or in a category
+    Matching is case-insensitive; the count field reflects the filtered list.
+    Raises KeyError for an unknown catalog, CatalogFilterError for a
+    filter the catalog does not have and UnknownCampusError for a campus
+    the campus catalog does not list
+    """
+    catalog = load_catalog(name)
+    if campus is None and category is None:
+        return catalog
+    list_key, count_key, campus_catalog, category_field = CATALOG_LISTS[name]
+    entries: List[Dict] = catalog[list_key]
+
+    if campus is not None:
+        if campus_catalog is None:
+            raise CatalogFilterError(f"{name} cannot be filtered by campus")
+        key = campus.strip().lower()
+        if key not in campus_keys(campus_catalog):
+            raise UnknownCampusError(f"Unknown campus: {campus.strip()}")
+        # A listed campus without majors has no label, and matches nothing
+        label = campus_labels(name).get(key)
+        entries = [entry for entry in entries if label in entry.get("campuses", ())]
+    if category is not None:
+        if category_field is None:
+            raise CatalogFilterError(f"{name} cannot be filtered by category")
+        key = category.strip().lower()
+        entries = [entry for entry in entries if (entry.get(category_field) or "").lower() == key]
+
+    filtered = {**catalog, list_key: entries}
+    if count_key in filtered:
+        filtered[count_key] = len(entries)
+    return filtered
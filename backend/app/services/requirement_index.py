@@ -0,0 +1,160 @@
+"""
+Requirement Index
+Inverted index over transfer requirements and Assist.org equivalencies,
+compiled once at startup so a verification is a single pass over the transcript
+"""
+
+import hashlib
+import json
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.services.course_codes import CODE_FORMAT, normalize_course_code
+from app.services.requirement_rules import RequirementPlan, compile_major
+
+
+def data_version(requirements: Dict, equivalencies: Dict) -> str:
+    """Digest of one campus's source data, used to key cached results"""
+    return hashlib.sha256(
+        json.dumps([CODE_FORMAT, requirements, equivalencies], sort_keys=True).encode("utf-8")
+    ).hexdigest()[:16]
+
+
+def combined_version(versions: Dict[str, str]) -> str:
+    """Digest over every campus's data version"""
+    return hashlib.sha256(
+        "|".join(f"{campus}:{version}" for campus, version in sorted(versions.items())).encode("utf-8")
+    ).hexdigest()[:16]
+
+
+def course_college(course: Dict, home_college: str) -> str:
+    """College a transcript course was taken at: its own tag, else the student's"""
+    return (course.get("college") or "").strip() or home_college
+
+
+class RequirementIndex:
+    """
+    Precompiled lookup tables for requirement matching
+
+    plans: major -> compiled RequirementPlan per requirement position
+    requirement_postings: course code -> major -> [(requirement position, code rank)]
+    requirement_codes: major -> requirement position -> normalized codes by rank
+    igetc_postings: college -> course code -> IGETC areas
+    articulation: (college, course code) -> IGETC areas, the same join flat,
+        so a transcript mixing colleges resolves each course in one lookup
+    The code rank is the code's bit in the requirement's plan, which for an
+    equivalent_codes list is its position in the list.
+    version is a digest of the source data, used to key cached results.
+    """
+
+    def __init__(self, requirements: Dict, equivalencies: Dict):
+        self.version = data_version(requirements, equivalencies)
+        self.plans: Dict[str, List[RequirementPlan]] = {}
+        self.requirement_postings: Dict[str, Dict[str, List[Tuple[int, int]]]] = {}
+        self.igetc_postings: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+        self.requirement_counts: Dict[str, int] = {}
+        self.requirement_codes: Dict[str, List[List[str]]] = {}
+
+        for major, major_reqs in requirements.items():
+            plans = compile_major(major_reqs)
+            self.plans[major] = plans
+            self.requirement_counts[major] = len(plans)
+            self.requirement_codes[major] = [plan.codes for plan in plans]
+            for position, plan in enumerate(plans):
+                for rank, code in enumerate(plan.codes):
+                    postings = self.requirement_postings.setdefault(code, {})
+                    postings.setdefault(major, []).append((position, rank))
+
+        self.articulation: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+        for college, courses in equivalencies.items():
+            self.igetc_postings[college] = {
+                normalize_course_code(code): tuple(info.get("igetc", []))
+                for code, info in courses.items()
+            }
+            for code, areas in self.igetc_postings[college].items():
+                self.articulation[(college, code)] = areas
+
+    def match_requirements(
+        self,
+        codes: Iterable[str],
+        major: str
+    ) -> List[int]:
+        """
+        Match normalized transcript codes against a major's requirements
+        Returns, per requirement, the mask of its codes present on the
+        transcript, to be checked with the requirement's plan
+        """
+        matches = [0] * self.requirement_counts.get(major, 0)
+
+        for code in codes:
+            postings = self.requirement_postings.get(code)
+            if not postings:
+                continue
+            for position, rank in postings.get(major, ()):
+                matches[position] |= 1 << rank
+
+        return matches
+
+    def igetc_areas(self, codes: Iterable[str], college: str) -> Set[str]:
+        """Collect the IGETC areas satisfied by normalized transcript codes"""
+        college_postings = self.igetc_postings.get(college, {})
+        satisfied = set()
+        for code in codes:
+            satisfied.update(college_postings.get(code, ()))
+        return satisfied
+
+    def articulated_areas(self, courses: Iterable[Tuple[str, str]]) -> Set[str]:
+        """IGETC areas satisfied by (college, normalized code) pairs from any colleges"""
+        satisfied = set()
+        for key in courses:
+            satisfied.update(self.articulation.get(key, ()))
+        return satisfied
+
+
+class CampusRequirements:
+    """
+    Requirement data and a compiled RequirementIndex for every campus
+    Campus ids are lowercase (e.g. 'ucsc'); version covers every campus
+    """
+
+    def __init__(
+        self,
+        requirements_by_campus: Dict[str, Dict],
+        equivalencies: Dict,
+        campus_names: Optional[Dict[str, str]] = None
+    ):
+        self.requirements = requirements_by_campus
+        self.equivalencies = equivalencies
+        self.names = campus_names or {}
+        self.indexes = {
+            campus: RequirementIndex(requirements, equivalencies)
+            for campus, requirements in requirements_by_campus.items()
+        }
+        self.version = combined_version(
+            {campus: index.version for campus, index in self.indexes.items()}
+        )
+        self._course_codes = None
+
+    @property
+    def course_codes(self):
+        """
+        CourseCodeIndex over every requirement and equivalency code
+        Built on first use, which keeps NumPy off the import path
+        """
+        if self._course_codes is None:
+            from app.services.course_suggestions import CourseCodeIndex
+
+            codes = {code for courses in self.equivalencies.values() for code in courses}
+            for index in self.indexes.values():
+                for major_codes in index.requirement_codes.values():
+                    for codes_by_rank in major_codes:
+                        codes.update(codes_by_rank)
+            self._course_codes = CourseCodeIndex(codes)
+        return self._course_codes
+
+    def college_courses(self, college: str) -> Dict:
+        """Equivalency entries (units, IGETC areas) for courses at a college"""
+        return self.equivalencies.get(college, {})
+
+    def name(self, campus: str) -> str:
+        """Display name for a campus id"""
+        return self.names.get(campus, campus.upper())
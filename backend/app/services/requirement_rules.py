@@ -0,0 +1,223 @@
+"""
+Requirement Rules
+Declarative requirement language, compiled once per requirement into a flat
+plan of bitmask counts so richer rules cost no more than a one-of list
+
+A required_courses entry lists its alternatives in one of two ways:
+    {"name": "Calculus I", "equivalent_codes": ["MATH 1A", "MATH 3A"]}
+    {"name": "Physics", "rule": RULE}
+where RULE is
+    "PHYS 4A"                                  that course
+    {"all": [RULE, ...]}                       every item (e.g. a series)
+    {"any": [RULE, ...]}                       at least one item
+    {"choose": 2, "from": [RULE, ...]}         at least N items
+and any group may add "min_units": 8, meaning the transcript courses
+matched anywhere inside the group must add up to at least that many units.
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from app.services.course_codes import normalize_course_code
+
+# (code mask, child step indexes, count needed, unit mask, minimum centi-units)
+Step = Tuple[int, Tuple[int, ...], int, int, int]
+
+
+class RuleError(ValueError):
+    """Raised when a requirement rule is malformed"""
+
+
+class RequirementPlan:
+    """
+    One requirement compiled to evaluation steps over interned codes
+
+    codes: normalized codes the requirement mentions; a code's position is
+        its rank and its bit in the presence mask
+    labels: the codes as written, for display
+    steps: one per rule group, children before parents, root last. A step
+        holds when its present codes plus its children that held reach the
+        count needed, and its matched courses carry the minimum units.
+    A transcript is evaluated from a presence mask (bit r set when codes[r]
+    is on the transcript), which the requirement index maintains directly.
+    """
+
+    __slots__ = (
+        "codes", "labels", "steps", "mask", "description", "first_match", "needs_units", "_flat",
+    )
+
+    def __init__(
+        self,
+        codes: List[str],
+        labels: List[str],
+        steps: List[Step],
+        description: Optional[str] = None,
+        first_match: bool = False
+    ):
+        self.codes = codes
+        self.labels = labels
+        self.steps = tuple(steps)
+        self.mask = (1 << len(codes)) - 1
+        self.description = description
+        self.first_match = first_match
+        self.needs_units = any(step[4] for step in steps)
+        # One group without a unit minimum (every one-of list) is a single count
+        self._flat = (steps[0][0], steps[0][2]) if len(steps) == 1 and not self.needs_units else None
+
+    def satisfied(self, present: int, units: Optional[Mapping[str, int]] = None) -> bool:
+        """
+        Whether a presence mask satisfies the requirement
+        units maps normalized codes to centi-units and is only consulted
+        for groups with a unit minimum
+        """
+        if self._flat is not None:
+            mask, need = self._flat
+            return (present & mask).bit_count() >= need
+        results: List[bool] = []
+        for mask, children, need, unit_mask, min_units in self.steps:
+            count = (present & mask).bit_count()
+            for child in children:
+                count += results[child]
+            held = count >= need
+            if held and min_units:
+                held = self.units(present & unit_mask, units or {}) >= min_units
+            results.append(held)
+        return results[-1]
+
+    def units(self, bits: int, units: Mapping[str, int]) -> int:
+        """Centi-units carried by the codes in bits"""
+        return sum(units.get(self.codes[rank], 0) for rank in _ranks(bits))
+
+    def matched(self, present: int) -> Optional[str]:
+        """
+        Display text for the transcript courses that count toward the
+        requirement: the first listed alternative for a one-of list,
+        otherwise every matched course in listed order
+        """
+        present &= self.mask
+        if not present:
+            return None
+        if self.first_match:
+            return self.labels[(present & -present).bit_length() - 1]
+        return ", ".join(self.labels[rank] for rank in _ranks(present))
+
+
+def _ranks(bits: int) -> Iterable[int]:
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+# ===================== COMPILER =====================
+
+def _group(node: Dict) -> Tuple[str, List[Any], Optional[int]]:
+    """(kind, items, choose count) for a rule group"""
+    kinds = [kind for kind in ("all", "any", "choose") if kind in node]
+    if len(kinds) != 1:
+        raise RuleError(f"Rule group needs exactly one of all/any/choose: {node}")
+    kind = kinds[0]
+    items = node.get("from") if kind == "choose" else node[kind]
+    if not isinstance(items, list) or not items:
+        raise RuleError(f"Rule group has no items: {node}")
+    return kind, items, node["choose"] if kind == "choose" else None
+
+
+def compile_rule(rule: Any) -> RequirementPlan:
+    """Compile a rule into a plan; raises RuleError when it is malformed"""
+    codes: List[str] = []
+    labels: List[str] = []
+    bits: Dict[str, int] = {}
+    steps: List[Step] = []
+    covers: List[int] = []
+
+    def intern(label: str) -> int:
+        code = normalize_course_code(label)
+        if not code:
+            raise RuleError("Rule contains an empty course code")
+        if code not in bits:
+            bits[code] = len(codes)
+            codes.append(code)
+            labels.append(label)
+        return 1 << bits[code]
+
+    def visit(node: Any) -> int:
+        """Compile a group into steps, returning its step index"""
+        if not isinstance(node, dict):
+            raise RuleError(f"Rule items must be course codes or groups: {node!r}")
+        kind, items, choose = _group(node)
+        mask, children, cover = 0, [], 0
+        for item in items:
+            if isinstance(item, str):
+                mask |= intern(item)
+            else:
+                child = visit(item)
+                children.append(child)
+                cover |= covers[child]
+        # Repeated codes count once
+        width = mask.bit_count() + len(children)
+        if kind == "all":
+            need = width
+        elif kind == "any":
+            need = 1
+        elif not isinstance(choose, int) or not 1 <= choose <= width:
+            raise RuleError(f"choose must be between 1 and {width}: {node}")
+        else:
+            need = choose
+        try:
+            min_units = round(float(node.get("min_units") or 0) * 100)
+        except (TypeError, ValueError):
+            raise RuleError(f"min_units must be a number: {node}")
+        cover |= mask
+        steps.append((mask, tuple(children), need, cover if min_units else 0, min_units))
+        covers.append(cover)
+        return len(steps) - 1
+
+    visit({"all": [rule]} if isinstance(rule, str) else rule)
+    return RequirementPlan(codes, labels, steps, describe_rule(rule))
+
+
+def compile_requirement(requirement: Dict) -> RequirementPlan:
+    """Compile one required_courses entry (a rule or an equivalent_codes list)"""
+    if "rule" in requirement:
+        return compile_rule(requirement["rule"])
+    labels = list(requirement.get("equivalent_codes", []))
+    codes = [normalize_course_code(code) for code in labels]
+    # Ranks follow the list as written, so the first listed code wins a tie
+    return RequirementPlan(codes, labels, [((1 << len(codes)) - 1, (), 1, 0, 0)], first_match=True)
+
+
+def compile_major(major_reqs: Dict) -> List[RequirementPlan]:
+    """Plans for a major's required courses, in listed order"""
+    return [compile_requirement(req) for req in major_reqs.get("required_courses", [])]
+
+
+def requirement_codes(requirement: Dict) -> List[str]:
+    """Normalized codes a requirement mentions, in rank order"""
+    return compile_requirement(requirement).codes
+
+
+def describe_rule(rule: Any) -> str:
+    """Readable form of a rule, e.g. '2 of (MATH 1A, MATH 1B, MATH 1C)'"""
+    if isinstance(rule, str):
+        return rule
+    kind, items, choose = _group(rule)
+    parts = [describe_rule(item) if isinstance(item, str) else f"({describe_rule(item)})" for item in items]
+    if kind == "all":
+        text = " and ".join(parts)
+    elif kind == "any":
+        text = " or ".join(parts)
+    else:
+        text = f"{choose} of ({', '.join(parts)})"
+    if rule.get("min_units"):
+        text += f", at least {float(rule['min_units']):g} units"
+    return text
+
+
+def course_units(courses: Iterable[Dict]) -> Dict[str, int]:
+    """Centi-units per normalized code across a transcript"""
+    units: Dict[str, int] = {}
+    for course in courses:
+        code = normalize_course_code(course.get("course_code", ""))
+        if code:
+            units[code] = units.get(code, 0) + round(float(course.get("units", 0)) * 100)
+    return units
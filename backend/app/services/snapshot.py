@@ -0,0 +1,534 @@
+"""
+Reference Data Snapshot
+Compiles requirements, equivalencies and catalogs into one binary file that
+every worker memory-maps read-only instead of parsing and indexing its own copy
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Mapping
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.services.course_codes import CODE_FORMAT
+from app.services.reference_data import CATALOG_FILES, DATA_DIR
+from app.services.requirement_index import (
+    RequirementIndex,
+    combined_version,
+    data_version,
+    normalize_course_code,
+)
+from app.services.requirement_rules import RequirementPlan, compile_major
+
+# Set to serve reference data from a compiled snapshot instead of the sources
+REFERENCE_SNAPSHOT = os.getenv("REFERENCE_SNAPSHOT", "")
+SNAPSHOT_LOOKUP_CACHE = int(os.getenv("SNAPSHOT_LOOKUP_CACHE", "65536"))
+
+MAGIC = b"TMAPSNP1"
+_ALIGN = 8
+
+# Row layouts of the uint32 tables; rows are sorted so a key prefix is a range.
+# Postings rows are grouped by course code id, located via posting_offsets
+POSTING_COLUMNS = ("campus", "major", "position", "rank")
+REQUIREMENT_CODE_COLUMNS = ("campus", "major", "position", "rank", "code")
+REQUIREMENT_COUNT_COLUMNS = ("campus", "major", "count")
+IGETC_COLUMNS = ("college", "code", "area")
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, corrupt or from another build"""
+
+
+# ===================== BUILD =====================
+
+def build_snapshot(
+    path: str,
+    requirements_by_campus: Dict[str, Dict],
+    equivalencies: Dict,
+    campus_names: Dict[str, str],
+    catalogs: Dict[str, Dict]
+) -> Dict:
+    """
+    Write a snapshot file and return its header
+    The file is written next to the target and renamed into place, so
+    workers that already mapped the previous snapshot keep a valid view
+    """
+    codes = set()
+    for requirements in requirements_by_campus.values():
+        for major_reqs in requirements.values():
+            for plan in compile_major(major_reqs):
+                codes.update(plan.codes)
+    for courses in equivalencies.values():
+        codes.update(normalize_course_code(code) for code in courses)
+    strings = set(requirements_by_campus) | set(equivalencies) | codes
+    for requirements in requirements_by_campus.values():
+        strings.update(requirements)
+    for courses in equivalencies.values():
+        for info in courses.values():
+            strings.update(info.get("igetc", []))
+
+    # Sorted by UTF-8 bytes so readers can binary search the raw table
+    encoded = sorted(s.encode("utf-8") for s in strings)
+    ids = {value.decode("utf-8"): i for i, value in enumerate(encoded)}
+    offsets = [0]
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+
+    postings, requirement_codes, requirement_counts = [], [], []
+    for campus, requirements in requirements_by_campus.items():
+        for major, major_reqs in requirements.items():
+            plans = compile_major(major_reqs)
+            requirement_counts.append((ids[campus], ids[major], len(plans)))
+            for position, plan in enumerate(plans):
+                for rank, code in enumerate(plan.codes):
+                    code_id = ids[code]
+                    postings.append((code_id, ids[campus], ids[major], position, rank))
+                    requirement_codes.append((ids[campus], ids[major], position, rank, code_id))
+
+    # Later duplicates of a normalized code win, as in RequirementIndex
+    igetc_by_code: Dict[Tuple[int, int], List[str]] = {}
+    for college, courses in equivalencies.items():
+        for code, info in courses.items():
+            igetc_by_code[(ids[college], ids[normalize_course_code(code)])] = info.get("igetc", [])
+    igetc = [
+        (college_id, code_id, ids[area])
+        for (college_id, code_id), areas in igetc_by_code.items()
+        for area in areas
+    ]
+
+    def pack(rows: List[Tuple[int, ...]]) -> bytes:
+        flat = [value for row in rows for value in row]
+        return struct.pack(f"={len(flat)}I", *flat)
+
+    def table(rows: List[Tuple[int, ...]], key=None) -> bytes:
+        return pack(sorted(rows, key=key))
+
+    # CSR layout: rows of code id i are posting_offsets[i]:posting_offsets[i + 1]
+    postings.sort()
+    posting_offsets = [0] * (len(encoded) + 1)
+    for row in postings:
+        posting_offsets[row[0] + 1] += 1
+    for i in range(len(encoded)):
+        posting_offsets[i + 1] += posting_offsets[i]
+
+    sections = [
+        ("string_offsets", struct.pack(f"={len(offsets)}I", *offsets), 1),
+        ("string_data", b"".join(encoded), 0),
+        ("posting_offsets", struct.pack(f"={len(posting_offsets)}I", *posting_offsets), 1),
+        ("postings", pack([row[1:] for row in postings]), len(POSTING_COLUMNS)),
+        ("requirement_codes", table(requirement_codes), len(REQUIREMENT_CODE_COLUMNS)),
+        ("requirement_counts", table(requirement_counts), len(REQUIREMENT_COUNT_COLUMNS)),
+        # Areas keep their listed order within a (college, code) row range
+        ("igetc", table(igetc, key=lambda row: (row[0], row[1])), len(IGETC_COLUMNS)),
+        ("course_codes", pack(sorted((ids[code],) for code in codes)), 1),
+    ]
+    for campus, requirements in requirements_by_campus.items():
+        sections.append((f"requirements:{campus}", _json_bytes(requirements), 0))
+    for college, courses in equivalencies.items():
+        sections.append((f"equivalencies:{college}", _json_bytes(courses), 0))
+    for name, catalog in catalogs.items():
+        sections.append((f"catalog:{name}", _json_bytes(catalog), 0))
+
+    campus_versions = {
+        campus: data_version(requirements, equivalencies)
+        for campus, requirements in requirements_by_campus.items()
+    }
+    layout = {}
+    position = 0
+    for name, data, stride in sections:
+        layout[name] = [position, len(data), stride]
+        position += _padded(len(data))
+    header = {
+        "byteorder": sys.byteorder,
+        "code_format": CODE_FORMAT,
+        "version": combined_version(campus_versions),
+        "campus_versions": campus_versions,
+        "campus_names": campus_names,
+        "campuses": list(requirements_by_campus),
+        "string_count": len(encoded),
+        "sections": layout,
+    }
+    header_bytes = _json_bytes(header)
+    data_start = _padded(len(MAGIC) + 4 + len(header_bytes))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * (data_start - f.tell()))
+        for name, data, _ in sections:
+            f.write(data)
+            f.write(b"\0" * (_padded(len(data)) - len(data)))
+    os.replace(tmp_path, path)
+    return header
+
+
+def build_from_sources(path: str) -> Dict:
+    """Compile the bundled requirements data and frontend catalogs"""
+    from app.services.requirements_data import ASSIST_EQUIVALENCIES, UC_CAMPUSES, UC_REQUIREMENTS
+
+    catalogs = {}
+    for name, filename in CATALOG_FILES.items():
+        with open(DATA_DIR / filename, encoding="utf-8") as f:
+            catalogs[name] = json.load(f)
+    return build_snapshot(
+        path,
+        UC_REQUIREMENTS,
+        ASSIST_EQUIVALENCIES,
+        {campus["id"]: campus["name"] for campus in UC_CAMPUSES},
+        catalogs,
+    )
+
+
+def _json_bytes(value) -> bytes:
+    # Key order is kept: it is the display order of majors and IGETC areas
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _padded(size: int) -> int:
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+# ===================== READ =====================
+
+class ReferenceSnapshot:
+    """
+    Read-only view over a memory-mapped snapshot
+
+    Strings are interned as ids into a sorted table and every index is a
+    flat uint32 array, so opening a snapshot parses only a small JSON
+    header. Pages are shared between all processes mapping the same file.
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        try:
+            with open(self.path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Cannot open reference snapshot {self.path}: {e}") from e
+
+        buf = memoryview(self._mmap)
+        if bytes(buf[:len(MAGIC)]) != MAGIC:
+            raise SnapshotError(f"{self.path} is not a reference snapshot")
+        (header_size,) = struct.unpack_from("<I", buf, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        header = json.loads(bytes(buf[header_start:header_start + header_size]))
+        if header["byteorder"] != sys.byteorder:
+            raise SnapshotError(f"{self.path} was built on a {header['byteorder']}-endian host")
+        if header.get("code_format") != CODE_FORMAT:
+            raise SnapshotError(f"{self.path} uses an older course-code format; rebuild it")
+
+        self._data = buf[_padded(header_start + header_size):]
+        self._layout = header["sections"]
+        self.version: str = header["version"]
+        self.campus_versions: Dict[str, str] = header["campus_versions"]
+        self.campus_names: Dict[str, str] = header["campus_names"]
+        self.campuses: List[str] = header["campuses"]
+        self.string_count: int = header["string_count"]
+
+        self._string_offsets = self._section("string_offsets").cast("I")
+        self._string_data = self._section("string_data")
+        self._posting_offsets = self._section("posting_offsets").cast("I")
+        self._postings = self._section("postings").cast("I")
+        self._requirement_codes = self._section("requirement_codes").cast("I")
+        self._requirement_counts = self._section("requirement_counts").cast("I")
+        self._igetc = self._section("igetc").cast("I")
+
+        # Hot keys resolve once per process; bounded since keys come from requests
+        self.lookup = lru_cache(maxsize=SNAPSHOT_LOOKUP_CACHE)(self._lookup)
+        self.postings = lru_cache(maxsize=SNAPSHOT_LOOKUP_CACHE)(self._code_postings)
+        self.requirement_count = lru_cache(maxsize=SNAPSHOT_LOOKUP_CACHE)(self._requirement_count)
+        self.igetc = lru_cache(maxsize=SNAPSHOT_LOOKUP_CACHE)(self._igetc_table)
+        self.articulation = lru_cache(maxsize=SNAPSHOT_LOOKUP_CACHE)(self._articulated_areas)
+        self.requirement_codes = lru_cache(maxsize=SNAPSHOT_LOOKUP_CACHE)(self._requirement_code_lists)
+        self.plans = lru_cache(maxsize=SNAPSHOT_LOOKUP_CACHE)(self._major_plans)
+        self._documents: Dict[str, Dict] = {}
+
+    def __reduce__(self):
+        # Worker processes map the file again rather than receiving a copy
+        return open_snapshot, (self.path,)
+
+    def _section(self, name: str) -> memoryview:
+        if name not in self._layout:
+            raise SnapshotError(f"{self.path} has no section '{name}'")
+        offset, size, _ = self._layout[name]
+        return self._data[offset:offset + size]
+
+    # ===================== STRINGS =====================
+
+    def _string_bytes(self, string_id: int) -> bytes:
+        start = self._string_offsets[string_id]
+        return self._string_data[start:self._string_offsets[string_id + 1]].tobytes()
+
+    def string(self, string_id: int) -> str:
+        """The interned string for an id"""
+        return self._string_bytes(string_id).decode("utf-8")
+
+    def _lookup(self, value: str) -> Optional[int]:
+        """Interned id of a string, or None when the snapshot never saw it"""
+        target = value.encode("utf-8")
+        lo, hi = 0, self.string_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._string_bytes(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.string_count and self._string_bytes(lo) == target:
+            return lo
+        return None
+
+    # ===================== TABLES =====================
+
+    def _code_postings(self, campus: str, code: str) -> Optional[Dict[str, List[Tuple[int, int]]]]:
+        """major -> [(requirement position, code rank)] for one code at one campus"""
+        code_id, campus_id = self.lookup(code), self.lookup(campus)
+        if code_id is None or campus_id is None:
+            return None
+        rows = self._postings
+        stride = len(POSTING_COLUMNS)
+        start, end = _row_range(
+            rows, stride, (campus_id,),
+            self._posting_offsets[code_id], self._posting_offsets[code_id + 1],
+        )
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for row in range(start, end):
+            base = row * stride
+            postings.setdefault(self.string(rows[base + 1]), []).append(
+                (rows[base + 2], rows[base + 3])
+            )
+        return postings or None
+
+    def _requirement_count(self, campus: str, major: str) -> Optional[int]:
+        """Number of required courses for a major, or None if not offered"""
+        campus_id, major_id = self.lookup(campus), self.lookup(major)
+        if campus_id is None or major_id is None:
+            return None
+        rows = self._requirement_counts
+        start, end = _row_range(rows, len(REQUIREMENT_COUNT_COLUMNS), (campus_id, major_id))
+        return rows[start * len(REQUIREMENT_COUNT_COLUMNS) + 2] if start < end else None
+
+    def _requirement_code_lists(self, campus: str, major: str) -> Optional[List[List[str]]]:
+        """Normalized codes per requirement position, in rank order"""
+        count = self.requirement_count(campus, major)
+        if count is None:
+            return None
+        rows = self._requirement_codes
+        stride = len(REQUIREMENT_CODE_COLUMNS)
+        start, end = _row_range(rows, stride, (self.lookup(campus), self.lookup(major)))
+        codes: List[List[str]] = [[] for _ in range(count)]
+        for row in range(start, end):
+            base = row * stride
+            codes[rows[base + 2]].append(self.string(rows[base + 4]))
+        return codes
+
+    def _igetc_table(self, college: str) -> Optional[Dict[str, Tuple[str, ...]]]:
+        """course code -> IGETC areas for one college, shared by every campus"""
+        college_id = self.lookup(college)
+        if college_id is None:
+            return None
+        rows = self._igetc
+        stride = len(IGETC_COLUMNS)
+        start, end = _row_range(rows, stride, (college_id,))
+        if start == end:
+            return None
+        table: Dict[str, List[str]] = {}
+        for row in range(start, end):
+            base = row * stride
+            table.setdefault(self.string(rows[base + 1]), []).append(self.string(rows[base + 2]))
+        return {code: tuple(areas) for code, areas in table.items()}
+
+    def _articulated_areas(self, key: Tuple[str, str]) -> Optional[Tuple[str, ...]]:
+        """IGETC areas of one (college, code) pair: a row range of the igetc table"""
+        college_id, code_id = self.lookup(key[0]), self.lookup(key[1])
+        if college_id is None or code_id is None:
+            return None
+        rows = self._igetc
+        stride = len(IGETC_COLUMNS)
+        start, end = _row_range(rows, stride, (college_id, code_id))
+        if start == end:
+            return None
+        return tuple(self.string(rows[row * stride + 2]) for row in range(start, end))
+
+    def _major_plans(self, campus: str, major: str) -> Optional[List[RequirementPlan]]:
+        """Requirement plans for a major, compiled from its campus document"""
+        if campus not in self.campus_versions:
+            return None
+        major_reqs = self.campus_document(campus).get(major)
+        return compile_major(major_reqs) if major_reqs is not None else None
+
+    def course_codes(self) -> List[str]:
+        """Every requirement and equivalency code in the snapshot"""
+        return [self.string(code_id) for code_id in self._section("course_codes").cast("I")]
+
+    # ===================== DOCUMENTS =====================
+
+    def requirements(self, campus: str) -> Dict:
+        """Decoded requirements document for one campus"""
+        return json.loads(self._section(f"requirements:{campus}").tobytes())
+
+    def campus_document(self, campus: str) -> Dict:
+        """
+        Requirements document for one campus, decoded once per process
+        Shared by every caller and must not be mutated
+        """
+        document = self._documents.get(campus)
+        if document is None:
+            document = self._documents[campus] = self.requirements(campus)
+        return document
+
+    def equivalencies(self, college: str) -> Dict:
+        """Decoded Assist.org equivalencies for one college ({} when unknown)"""
+        if f"equivalencies:{college}" not in self._layout:
+            return {}
+        return json.loads(self._section(f"equivalencies:{college}").tobytes())
+
+    def catalog(self, name: str) -> Dict:
+        """Decoded frontend catalog by name"""
+        return json.loads(self._section(f"catalog:{name}").tobytes())
+
+    def campus_requirements(self) -> "SnapshotCampusRequirements":
+        return SnapshotCampusRequirements(self)
+
+
+def _row_range(
+    rows: memoryview,
+    stride: int,
+    prefix: Tuple[int, ...],
+    lo: int = 0,
+    hi: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Half-open range of rows in a sorted table whose leading columns equal prefix
+    lo and hi optionally narrow the search to a block of rows
+    """
+    width = len(prefix)
+    end = len(rows) // stride if hi is None else hi
+
+    def key(row: int) -> Tuple[int, ...]:
+        return tuple(rows[row * stride:row * stride + width])
+
+    hi = end
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if key(mid) < prefix:
+            lo = mid + 1
+        else:
+            hi = mid
+    start, hi = lo, end
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if key(mid) <= prefix:
+            lo = mid + 1
+        else:
+            hi = mid
+    return start, lo
+
+
+class _LookupTable:
+    """Read-only dict-style view that resolves keys through a loader"""
+
+    def __init__(self, loader: Callable):
+        self._loader = loader
+
+    def get(self, key, default=None):
+        value = self._loader(key)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self._loader(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return self._loader(key) is not None
+
+
+class SnapshotIndex(RequirementIndex):
+    """
+    RequirementIndex backed by snapshot tables for one campus
+    Exposes the same lookup tables as views, so the accumulator, cohort
+    engine and match helpers work unchanged
+    """
+
+    def __init__(self, snapshot: ReferenceSnapshot, campus: str):
+        self.version = snapshot.campus_versions[campus]
+        self.plans = _LookupTable(partial(snapshot.plans, campus))
+        self.requirement_postings = _LookupTable(partial(snapshot.postings, campus))
+        self.igetc_postings = _LookupTable(snapshot.igetc)
+        self.articulation = _LookupTable(snapshot.articulation)
+        self.requirement_counts = _LookupTable(partial(snapshot.requirement_count, campus))
+        self.requirement_codes = _LookupTable(partial(snapshot.requirement_codes, campus))
+
+
+class _CampusDocuments(Mapping):
+    """campus -> requirements document, decoded on first access"""
+
+    def __init__(self, snapshot: ReferenceSnapshot):
+        self._snapshot = snapshot
+
+    def __getitem__(self, campus: str) -> Dict:
+        if campus not in self._snapshot.campus_versions:
+            raise KeyError(campus)
+        return self._snapshot.campus_document(campus)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot.campuses)
+
+    def __len__(self) -> int:
+        return len(self._snapshot.campuses)
+
+
+class SnapshotCampusRequirements:
+    """CampusRequirements served from a snapshot instead of compiled dicts"""
+
+    def __init__(self, snapshot: ReferenceSnapshot):
+        self.snapshot = snapshot
+        self.requirements = _CampusDocuments(snapshot)
+        self.names = snapshot.campus_names
+        self.indexes = {campus: SnapshotIndex(snapshot, campus) for campus in snapshot.campuses}
+        self.version = snapshot.version
+        self._course_codes = None
+
+    def __reduce__(self):
+        return SnapshotCampusRequirements, (self.snapshot,)
+
+    @property
+    def course_codes(self):
+        """CourseCodeIndex over the snapshot's code table, built on first use"""
+        if self._course_codes is None:
+            from app.services.course_suggestions import CourseCodeIndex
+
+            self._course_codes = CourseCodeIndex(self.snapshot.course_codes())
+        return self._course_codes
+
+    def college_courses(self, college: str) -> Dict:
+        """Equivalency entries (units, IGETC areas) for courses at a college"""
+        return self.snapshot.equivalencies(college)
+
+    def name(self, campus: str) -> str:
+        """Display name for a campus id"""
+        return self.names.get(campus, campus.upper())
+
+
+@lru_cache(maxsize=None)
+def open_snapshot(path: str) -> ReferenceSnapshot:
+    """Map a snapshot once per process"""
+    return ReferenceSnapshot(path)
+
+
+if __name__ == "__main__":
+    output = sys.argv[1] if len(sys.argv) > 1 else (REFERENCE_SNAPSHOT or "reference.snapshot")
+    header = build_from_sources(output)
+    print(
+        f"Wrote {output}: {len(header['campuses'])} campus(es), "
+        f"{header['string_count']} strings, {Path(output).stat().st_size} bytes, "
+        f"version {header['version']}"
+    )
@@ -0,0 +1,398 @@
+"""
+Transcript Import
+Streams transcript files (CSV, or text extracted from registrar exports) out
+of multipart uploads into transcript course records, one row at a time
+"""
+
+import codecs
+import csv
+import os
+import re
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+# Upload limits; a file is parsed as it arrives and never held whole
+TRANSCRIPT_MAX_BYTES = int(os.getenv("TRANSCRIPT_MAX_BYTES", str(16 * 1024 * 1024)))
+TRANSCRIPT_MAX_COURSES = int(os.getenv("TRANSCRIPT_MAX_COURSES", "2000"))
+
+MAX_ERROR_SAMPLES = 50
+MAX_FIELD_BYTES = 1024
+MAX_HEADER_BYTES = 8192
+MAX_LINE_CHARS = 65536
+
+# CSV header aliases, matched after lowercasing and collapsing separators to "_"
+COLUMN_ALIASES = {
+    "course_code": ("course_code", "code", "course", "course_id", "course_number"),
+    "course_name": ("course_name", "name", "title", "course_title", "description"),
+    "units": ("units", "unit", "credits", "credit", "credit_hours", "units_earned"),
+    "grade": ("grade", "final_grade", "mark"),
+    "semester": ("semester", "term", "session"),
+    "college": ("college", "institution", "school", "source_college"),
+}
+REQUIRED_COLUMNS = ("course_code", "units", "grade")
+
+# Text exports: term headings, then one course per line as
+# 'MATH 1A  Calculus I  5.0  A' (trailing grade points are ignored)
+_TERM_LINE = re.compile(
+    r"^\s*(Fall|Winter|Spring|Summer)\s+(?:(?:Quarter|Semester|Term)\s+)?(\d{4})\b", re.IGNORECASE
+)
+_CODE = r"[A-Z][A-Z&/]{1,7}[ -]?\d{1,4}[A-Z]{0,3}"
+_COURSE_START = re.compile(rf"^\s*{_CODE}\b")
+_COURSE_LINE = re.compile(
+    rf"^\s*(?P<code>{_CODE})\s+(?P<name>.*?)\s+(?P<units>\d{{1,2}}(?:\.\d{{1,2}})?)"
+    r"\s+(?P<grade>[A-DF][+-]?|P|NP|CR|NC|W|IP|I)(?:\s+\d+(?:\.\d+)?)?\s*$"
+)
+
+
+class TranscriptImportError(Exception):
+    """Raised when an upload cannot be read at all"""
+
+
+class UploadTooLarge(TranscriptImportError):
+    """Raised when an upload exceeds the size or course limits"""
+
+
+class RowError(ValueError):
+    """Raised when a single transcript row fails validation"""
+
+
+@dataclass
+class TranscriptFile:
+    """Result of reading one transcript upload"""
+    courses: List[Dict] = field(default_factory=list)
+    fields: Dict[str, str] = field(default_factory=dict)
+    filename: Optional[str] = None
+    rows: int = 0
+    skipped: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def record_error(self, line: int, message: str) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_ERROR_SAMPLES:
+            self.errors.append(f"line {line}: {message}")
+
+
+# ===================== ROW PARSING =====================
+
+def parse_course(
+    code: str,
+    name: Optional[str],
+    units: Optional[str],
+    grade: Optional[str],
+    semester: Optional[str],
+    college: Optional[str] = None
+) -> Dict:
+    """
+    Validate one row into a transcript course record
+    A college is kept only when given, for courses taken at another college
+    """
+    code = (code or "").strip()
+    if not code:
+        raise RowError("missing course_code")
+    try:
+        unit_value = float((units or "").strip())
+    except ValueError:
+        raise RowError(f"units must be a number, got {units!r}")
+    if not 0 <= unit_value <= 30:
+        raise RowError(f"units out of range: {unit_value:g}")
+    grade = (grade or "").strip().upper()
+    if not grade:
+        raise RowError("missing grade")
+    course = {
+        "course_code": code,
+        "course_name": (name or "").strip(),
+        "units": unit_value,
+        "grade": grade,
+        "semester": (semester or "").strip(),
+    }
+    if college and college.strip():
+        course["college"] = college.strip()
+    return course
+
+
+def _column_key(header: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", header.strip().lower()).strip("_")
+
+
+class TranscriptParser:
+    """
+    Incremental transcript parser
+    Text is fed in arbitrary chunks; each complete line (or quoted CSV
+    record) is validated and appended to the result as soon as it arrives,
+    so memory holds the courses plus at most one partial record.
+    The format is 'csv' or 'text'; None picks one from the first line.
+    """
+
+    def __init__(self, result: TranscriptFile, file_format: Optional[str] = None):
+        self.result = result
+        self.format = file_format
+        self.columns: Optional[Dict[str, int]] = None
+        self.semester = ""
+        self.line_number = 0
+        self._partial = ""
+        self._record: List[str] = []
+        self._record_line = 0
+        self._quotes = 0
+
+    def feed(self, text: str) -> None:
+        """Parse every complete line in text, keeping the remainder"""
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._line(line[:-1] if line.endswith("\r") else line)
+        if len(self._partial) > MAX_LINE_CHARS:
+            raise TranscriptImportError(f"Line {self.line_number + 1} is too long")
+
+    def close(self) -> None:
+        """Parse the final line and check the upload held a header"""
+        if self._partial:
+            self._line(self._partial.rstrip("\r"))
+            self._partial = ""
+        if self._record:
+            self.result.record_error(self._record_line, "unterminated quoted field")
+            self._record = []
+        if self.format == "csv" and self.columns is None:
+            raise TranscriptImportError("CSV transcript has no header row")
+
+    def _line(self, line: str) -> None:
+        self.line_number += 1
+        if self.format is None:
+            if not line.strip():
+                return
+            self.format = "csv" if "," in line and not _COURSE_LINE.match(line) else "text"
+        if self.format == "csv":
+            self._csv_line(line)
+        else:
+            self._text_line(line)
+
+    def _csv_line(self, line: str) -> None:
+        # A quoted field may span lines: gather lines until the quotes balance
+        if not self._record:
+            self._record_line = self.line_number
+        self._record.append(line)
+        self._quotes += line.count('"')
+        if self._quotes % 2:
+            if len(self._record) > 100:
+                raise TranscriptImportError(f"Unterminated quoted field on line {self._record_line}")
+            return
+        record = "\n".join(self._record)
+        self._record = []
+        self._quotes = 0
+        if not record.strip():
+            return
+        try:
+            row = next(csv.reader((record,)))
+        except csv.Error as e:
+            self.result.record_error(self._record_line, str(e))
+            return
+
+        if self.columns is None:
+            self._read_header(row)
+            return
+
+        values = []
+        for column in ("course_code", "course_name", "units", "grade", "semester", "college"):
+            position = self.columns.get(column)
+            values.append(row[position] if position is not None and position < len(row) else None)
+        self._add(self._record_line, *values)
+
+    def _read_header(self, row: List[str]) -> None:
+        keys = [_column_key(header) for header in row]
+        columns = {}
+        for column, aliases in COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias in keys:
+                    columns[column] = keys.index(alias)
+                    break
+        missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+        if missing:
+            raise TranscriptImportError(f"CSV transcript is missing columns: {', '.join(missing)}")
+        self.columns = columns
+
+    def _text_line(self, line: str) -> None:
+        term = _TERM_LINE.match(line)
+        if term:
+            self.semester = f"{term.group(1).title()} {term.group(2)}"
+            return
+        match = _COURSE_LINE.match(line)
+        if match:
+            self._add(self.line_number, match["code"], match["name"],
+                      match["units"], match["grade"], self.semester)
+        elif _COURSE_START.match(line):
+            # Looks like a course but the columns don't parse; other lines
+            # (page headers, totals) are export noise and are skipped quietly
+            self.result.rows += 1
+            self.result.record_error(self.line_number, f"unrecognized course line: {line.strip()[:80]}")
+
+    def _add(self, line: int, *values: Optional[str]) -> None:
+        self.result.rows += 1
+        try:
+            course = parse_course(*values)
+        except RowError as e:
+            self.result.record_error(line, str(e))
+            return
+        if len(self.result.courses) >= TRANSCRIPT_MAX_COURSES:
+            raise UploadTooLarge(f"Transcript has more than {TRANSCRIPT_MAX_COURSES} courses")
+        self.result.courses.append(course)
+
+
+# ===================== MULTIPART =====================
+
+def multipart_boundary(content_type: str) -> bytes:
+    """The boundary of a multipart/form-data content type"""
+    media_type, _, params = content_type.partition(";")
+    if media_type.strip().lower() != "multipart/form-data":
+        raise TranscriptImportError("Expected a multipart/form-data upload")
+    match = re.search(r'boundary="?([^";]+)"?', params)
+    if not match:
+        raise TranscriptImportError("Multipart upload has no boundary")
+    return match.group(1).encode("latin-1")
+
+
+def _part_headers(block: bytes) -> Tuple[Optional[str], Optional[str], str]:
+    """(field name, filename, content type) from a part's header block"""
+    name = filename = None
+    content_type = ""
+    for line in block.decode("latin-1").split("\r\n"):
+        header, _, value = line.partition(":")
+        header = header.strip().lower()
+        if header == "content-disposition":
+            name_match = re.search(r'\bname="([^"]*)"', value)
+            file_match = re.search(r'\bfilename="([^"]*)"', value)
+            name = name_match.group(1) if name_match else None
+            filename = file_match.group(1) if file_match else None
+        elif header == "content-type":
+            content_type = value.strip().lower()
+    return name, filename, content_type
+
+
+class MultipartReader:
+    """
+    Incremental multipart/form-data reader
+    feed() takes body bytes as they arrive and returns events:
+    ('part', (name, filename, content type)), ('data', bytes) and ('end', None).
+    Only a delimiter's length of unparsed bytes is held between feeds.
+    """
+
+    def __init__(self, boundary: bytes):
+        self._delimiter = b"\r\n--" + boundary
+        # The first delimiter has no preceding line break
+        self._buffer = bytearray(b"\r\n")
+        self._state = "preamble"
+
+    def feed(self, chunk: bytes) -> List[Tuple[str, object]]:
+        self._buffer += chunk
+        events: List[Tuple[str, object]] = []
+        while True:
+            if self._state == "preamble":
+                at = self._buffer.find(self._delimiter)
+                if at < 0:
+                    del self._buffer[:max(0, len(self._buffer) - len(self._delimiter))]
+                    return events
+                del self._buffer[:at + len(self._delimiter)]
+                self._state = "after_delimiter"
+            elif self._state == "after_delimiter":
+                if len(self._buffer) < 2:
+                    return events
+                if self._buffer[:2] == b"--":
+                    self._state = "done"
+                elif self._buffer[:2] == b"\r\n":
+                    del self._buffer[:2]
+                    self._state = "headers"
+                else:
+                    raise TranscriptImportError("Malformed multipart delimiter")
+            elif self._state == "headers":
+                end = self._buffer.find(b"\r\n\r\n")
+                if end < 0:
+                    if len(self._buffer) > MAX_HEADER_BYTES:
+                        raise TranscriptImportError("Multipart part headers are too long")
+                    return events
+                events.append(("part", _part_headers(bytes(self._buffer[:end]))))
+                del self._buffer[:end + 4]
+                self._state = "body"
+            elif self._state == "body":
+                at = self._buffer.find(self._delimiter)
+                if at < 0:
+                    # Hold back a possible partial delimiter
+                    keep = len(self._delimiter) - 1
+                    if len(self._buffer) > keep:
+                        events.append(("data", bytes(self._buffer[:-keep])))
+                        del self._buffer[:-keep]
+                    return events
+                if at:
+                    events.append(("data", bytes(self._buffer[:at])))
+                events.append(("end", None))
+                del self._buffer[:at + len(self._delimiter)]
+                self._state = "after_delimiter"
+            else:
+                self._buffer.clear()
+                return events
+
+    def close(self) -> None:
+        if self._state != "done":
+            raise TranscriptImportError("Multipart upload ended early")
+
+
+def _file_format(filename: Optional[str], content_type: str) -> Optional[str]:
+    name = (filename or "").lower()
+    if name.endswith(".csv") or content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if name.endswith(".txt"):
+        return "text"
+    return None
+
+
+async def read_transcript_upload(
+    content_type: str,
+    body: AsyncIterator[bytes],
+    file_field: str = "file"
+) -> TranscriptFile:
+    """
+    Read a multipart transcript upload as it streams in
+    Small form fields are collected into fields; the file part is parsed
+    row by row. Raises UploadTooLarge past the byte or course limits and
+    TranscriptImportError when the upload is unreadable.
+    """
+    reader = MultipartReader(multipart_boundary(content_type))
+    result = TranscriptFile()
+    parser: Optional[TranscriptParser] = None
+    decoder = None
+    field_name: Optional[str] = None
+    field_value = bytearray()
+    received = 0
+
+    async for chunk in body:
+        received += len(chunk)
+        if received > TRANSCRIPT_MAX_BYTES:
+            raise UploadTooLarge(f"Upload exceeds {TRANSCRIPT_MAX_BYTES} bytes")
+        for event, value in reader.feed(chunk):
+            if event == "part":
+                name, filename, part_type = value
+                field_name = None
+                if name == file_field and parser is None:
+                    result.filename = filename
+                    parser = TranscriptParser(result, _file_format(filename, part_type))
+                    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+                elif name and filename is None:
+                    field_name = name
+                    field_value.clear()
+            elif event == "data":
+                if decoder is not None:
+                    parser.feed(decoder.decode(value))
+                elif field_name is not None:
+                    field_value += value
+                    if len(field_value) > MAX_FIELD_BYTES:
+                        raise TranscriptImportError(f"Form field '{field_name}' is too long")
+            elif event == "end":
+                if decoder is not None:
+                    parser.feed(decoder.decode(b"", final=True))
+                    parser.close()
+                    decoder = None
+                elif field_name is not None:
+                    result.fields[field_name] = field_value.decode("utf-8", errors="replace")
+                    field_name = None
+    reader.close()
+
+    if parser is None:
+        raise TranscriptImportError(f"Upload has no '{file_field}' file part")
+    return result
@@ -0,0 +1,350 @@
+"""
+Verification Service
+Builds the /api/verify result from a stored user document, either inline
+or in bulk on a worker pool for cohort re-verification
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from app.services.cache import verification_key
+from app.services.incremental import TranscriptAccumulator
+from app.services.metrics import stage_clock
+from app.services.requirement_index import CampusRequirements
+
+if TYPE_CHECKING:
+    from app.services.course_suggestions import CourseCodeIndex
+
+# Worker pool sizing, overridable per deployment
+BATCH_WORKERS = int(os.getenv("VERIFY_BATCH_WORKERS", "0")) or None
+BATCH_CHUNK_SIZE = int(os.getenv("VERIFY_BATCH_CHUNK_SIZE", "250"))
+
+
+class VerificationError(Exception):
+    """Raised when a user document is not ready to be verified"""
+
+
+def resolve_target(user: Dict, campuses: CampusRequirements) -> Tuple[str, str]:
+    """
+    Check a user document is ready to be verified
+    Returns (campus id, major); raises VerificationError when the document
+    is missing a target UC, transcript, or a campus/major with data
+    """
+    if not user.get("target_uc"):
+        raise VerificationError("Please select a target UC first")
+
+    if not user.get("transcript"):
+        raise VerificationError("Please upload your transcript first")
+
+    campus = user["target_uc"].lower()
+    if campus not in campuses.requirements:
+        raise VerificationError(f"{campuses.name(campus)} is not available yet")
+
+    major = user.get("target_major", user.get("major", "Computer Science"))
+    if major not in campuses.requirements[campus]:
+        raise VerificationError(f"Major '{major}' not supported in demo")
+
+    return campus, major
+
+
+def verify_user_document(user: Dict, campuses: CampusRequirements) -> Dict[str, Any]:
+    """Check a user document's transcript against its target campus requirements"""
+    campus, major = resolve_target(user, campuses)
+    state = TranscriptAccumulator.from_transcript(
+        user["transcript"], campuses.indexes[campus], user["community_college"], major
+    )
+    return render_verification(
+        state, campuses.requirements[campus][major], campuses.name(campus),
+        campuses.course_codes
+    )
+
+
+def verify_all_campuses(user: Dict, campuses: CampusRequirements) -> Dict[str, Any]:
+    """
+    Verify a transcript against every campus that offers the user's major
+    GPA, units and course-code counts are accumulated once; only the
+    campus-specific requirement and IGETC matching runs per campus
+    """
+    if not user.get("transcript"):
+        raise VerificationError("Please upload your transcript first")
+
+    major = user.get("target_major", user.get("major", "Computer Science"))
+    offered = [
+        campus for campus, requirements in campuses.requirements.items()
+        if major in requirements
+    ]
+    if not offered:
+        raise VerificationError(f"Major '{major}' not supported in demo")
+
+    college = user["community_college"]
+    shared = TranscriptAccumulator.from_transcript(
+        user["transcript"], campuses.indexes[offered[0]], college, major
+    )
+    results = {}
+    for campus in offered:
+        state = shared if campus == offered[0] else shared.rebind(campuses.indexes[campus])
+        results[campus] = render_verification(
+            state, campuses.requirements[campus][major], campuses.name(campus),
+            campuses.course_codes
+        )
+
+    return {
+        "major": major,
+        "community_college": college,
+        "campuses": results,
+        "unavailable": [campus for campus in campuses.names if campus not in results],
+    }
+
+
+def render_verification(
+    state: TranscriptAccumulator,
+    requirements: Dict,
+    campus_name: str = "UC Santa Cruz",
+    course_codes: Optional["CourseCodeIndex"] = None
+) -> Dict[str, Any]:
+    """
+    Build the verification result from accumulated transcript state
+    With a course_codes index, transcript codes that match no known course
+    are listed under course_suggestions with their closest known codes.
+    Inside a timed operation requirement and IGETC evaluation, risks,
+    rendering and suggestions are recorded as stages
+    """
+    clock = stage_clock()
+    major = state.major
+    total_units = state.total_units
+    gpa = state.gpa
+
+    # Check major requirements against their compiled plans
+    major_requirements_status = []
+    plans = state.index.plans[major]
+    for req, plan, present in zip(requirements["required_courses"], plans, state.matches):
+        completed = plan.satisfied(present, state.code_units)
+        status = {
+            "requirement": req["name"],
+            "completed": completed,
+            "matched_course": plan.matched(present) if completed else None,
+            "acceptable_courses": plan.labels,
+        }
+        if plan.description:
+            status["rule"] = plan.description
+        major_requirements_status.append(status)
+    clock.lap("requirements")
+
+    # Check IGETC areas
+    igetc_status = {}
+    completed_igetc = state.igetc_areas()
+
+    for area, info in requirements["igetc_areas"].items():
+        igetc_status[area] = {
+            "name": info["name"],
+            "completed": area in completed_igetc,
+            "required": info["required"],
+        }
+    clock.lap("igetc")
+
+    # Identify risks and warnings
+    risks = []
+
+    if gpa < requirements["min_gpa"]:
+        risks.append({
+            "type": "GPA",
+            "severity": "high",
+            "message": f"Your GPA ({gpa:.2f}) is below the minimum requirement ({requirements['min_gpa']})",
+            "source": requirements["source_url"]
+        })
+    elif gpa < requirements["min_gpa"] + 0.3:
+        risks.append({
+            "type": "GPA",
+            "severity": "medium",
+            "message": f"Your GPA ({gpa:.2f}) is close to the minimum. A higher GPA improves your chances.",
+            "source": requirements["source_url"]
+        })
+
+    if total_units < requirements["min_units"]:
+        risks.append({
+            "type": "Units",
+            "severity": "high",
+            "message": f"You have {total_units} units but need at least {requirements['min_units']} to transfer",
+            "source": requirements["source_url"]
+        })
+
+    if total_units > requirements["max_units"]:
+        risks.append({
+            "type": "Units",
+            "severity": "medium",
+            "message": f"You have {total_units} units which exceeds the {requirements['max_units']} unit cap. Some units may not transfer.",
+            "source": requirements["source_url"]
+        })
+
+    # Missing major prep courses
+    missing_major_prep = [r for r in major_requirements_status if not r["completed"]]
+    if missing_major_prep:
+        risks.append({
+            "type": "Major Prep",
+            "severity": "high",
+            "message": f"You are missing {len(missing_major_prep)} required major preparation course(s)",
+            "source": "https://assist.org"
+        })
+
+    # Missing IGETC areas
+    missing_igetc = [area for area, info in igetc_status.items()
+                    if info["required"] and not info["completed"]]
+    if missing_igetc:
+        risks.append({
+            "type": "IGETC",
+            "severity": "medium",
+            "message": f"IGETC areas not yet satisfied: {', '.join(missing_igetc)}",
+            "source": "https://assist.org/transfer/institution/113/115"
+        })
+
+    # Overall eligibility determination
+    major_prep_complete = len(missing_major_prep) == 0
+    units_ok = requirements["min_units"] <= total_units <= requirements["max_units"]
+    gpa_ok = gpa >= requirements["min_gpa"]
+
+    if major_prep_complete and units_ok and gpa_ok:
+        eligibility_status = "likely_eligible"
+        eligibility_message = "Based on official requirements, you appear to meet the basic transfer eligibility criteria."
+    elif gpa_ok and units_ok:
+        eligibility_status = "conditional"
+        eligibility_message = "You meet some requirements but have missing coursework. Complete the missing courses before applying."
+    else:
+        eligibility_status = "not_yet_eligible"
+        eligibility_message = "You do not yet meet the transfer requirements. See the issues below."
+    clock.lap("risks")
+
+    # Build the result
+    result = {
+        "eligibility_status": eligibility_status,
+        "eligibility_message": eligibility_message,
+        "summary": {
+            "total_units": total_units,
+            "gpa": round(gpa, 2),
+            "min_gpa_required": requirements["min_gpa"],
+            "units_range": f"{requirements['min_units']}-{requirements['max_units']}",
+            "major": major,
+            "target_uc": campus_name,
+        },
+        "major_requirements": {
+            "completed": [r for r in major_requirements_status if r["completed"]],
+            "missing": missing_major_prep,
+        },
+        "igetc_status": igetc_status,
+        "risks": risks,
+        "notes": requirements["notes"],
+        "sources": {
+            "ucsc_transfer": requirements["source_url"],
+            "assist_org": f"https://assist.org/transfer/institution/113/115",
+            "igetc": "https://assist.org/transfer/igetc",
+        },
+        "disclaimer": "This is a verification tool using official sources. It is NOT official advice. Always confirm with an academic counselor before making decisions."
+    }
+    clock.lap("render")
+    if course_codes is not None:
+        result["course_suggestions"] = course_codes.suggestions(state.codes)
+        clock.lap("suggestions")
+
+    return result
+
+
+def user_verification_key(user: Dict, data_version: str) -> str:
+    """Content-addressed cache key for a user document's verification"""
+    return verification_key(
+        user.get("transcript") or [],
+        user.get("community_college", ""),
+        user.get("target_major", user.get("major", "Computer Science")),
+        (user.get("target_uc") or "").lower(),
+        data_version,
+    )
+
+
+# ===================== BATCH VERIFICATION =====================
+
+# Per-process reference data, installed by the pool initializer
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(campuses: CampusRequirements) -> None:
+    """Install the compiled campus requirements once per worker process"""
+    _worker_state["campuses"] = campuses
+
+
+def _verify_documents(
+    users: List[Optional[Dict]],
+    campuses: CampusRequirements
+) -> List[Tuple[bool, Any]]:
+    """Verify user documents, returning (ok, result or error detail) for each"""
+    outcomes = []
+    for user in users:
+        if user is None:
+            outcomes.append((False, "User not found"))
+            continue
+        try:
+            outcomes.append((True, verify_user_document(user, campuses)))
+        except VerificationError as e:
+            outcomes.append((False, str(e)))
+    return outcomes
+
+
+def _verify_chunk(users: List[Optional[Dict]]) -> List[Tuple[bool, Any]]:
+    """Worker entry point: verify a chunk against the per-process index"""
+    return _verify_documents(users, _worker_state["campuses"])
+
+
+class BatchVerifier:
+    """
+    Runs verification for many user documents on a process pool
+    The pool is started lazily, and small batches are verified on a thread
+    in-process, since shipping one chunk to a worker costs more than
+    computing it; either way the event loop is never blocked
+    """
+
+    def __init__(
+        self,
+        campuses: CampusRequirements,
+        max_workers: Optional[int] = BATCH_WORKERS,
+        chunk_size: int = BATCH_CHUNK_SIZE
+    ):
+        self.campuses = campuses
+        self.max_workers = max_workers
+        self.chunk_size = max(1, chunk_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self.campuses,),
+            )
+        return self._executor
+
+    async def verify_many(self, users: List[Optional[Dict]]) -> List[Tuple[bool, Any]]:
+        """
+        Verify user documents in order; None entries are reported as not found
+        Returns one (ok, result or error detail) tuple per input document
+        """
+        if not users:
+            return []
+        if len(users) <= self.chunk_size:
+            return await asyncio.to_thread(_verify_documents, users, self.campuses)
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        chunks = [
+            users[i:i + self.chunk_size]
+            for i in range(0, len(users), self.chunk_size)
+        ]
+        chunk_results = await asyncio.gather(*(
+            loop.run_in_executor(executor, _verify_chunk, chunk)
+            for chunk in chunks
+        ))
+        return [outcome for chunk in chunk_results for outcome in chunk]
+
+    def shutdown(self) -> None:
+        """Stop the worker pool if it was started"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,308 @@
+"""
+Application Load Test
+Replays a mix of register, select-uc, transcript upload, verify and results
+requests against the FastAPI app from a fixed number of concurrent clients,
+and reports throughput and p50/p95/p99 latency per route.
+
+By default the app runs in-process over ASGI with its user store backed by
+the latency-injected fake Firestore, so capacity can be measured without a
+Firebase project; --url drives a running server instead. Users are seeded
+through the same API before the timed run, and each new user goes through
+register -> select-uc -> upload before it takes verify and results traffic.
+
+Run from backend/:
+    python -m loadtest.app_traffic --concurrency 32 --duration 30 --latency 0.02
+    python -m loadtest.app_traffic --mix register=1,verify=4,results=10 --output load.json
+    python -m loadtest.app_traffic --url http://localhost:8000 --users 200
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.db.firestore_store import FirestoreUserStore
+from app.services.requirement_index import CampusRequirements
+from app.services.requirements_data import ASSIST_EQUIVALENCIES, UC_CAMPUSES, UC_REQUIREMENTS
+from loadtest.fake_firestore import FakeFirestoreClient
+from loadtest.firestore_offload import percentile
+from loadtest.synthetic import random_courses
+
+# Route label per operation, as reported
+ROUTES = {
+    "register": "POST /api/auth/register",
+    "select": "POST /api/select-uc",
+    "upload": "POST /api/transcript/upload",
+    "verify": "POST /api/verify/{email}",
+    "results": "GET /api/results/{email}",
+}
+
+# Mostly returning students reading results, a steady trickle of sign-ups
+DEFAULT_MIX = "register=1,select=1,upload=2,verify=3,results=8"
+
+TARGET_UC = "ucsc"
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """'register=1,verify=3' -> {'register': 1.0, 'verify': 3.0}"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ROUTES:
+            raise ValueError(f"Unknown operation {name!r}; expected one of {', '.join(ROUTES)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+class Traffic:
+    """
+    Virtual students and the requests they make
+    Students move from registered to selected (target chosen) to ready
+    (transcript uploaded) to verified; operations with nobody at the earlier
+    step act on a ready student instead, like a returning user editing
+    their profile
+    """
+
+    def __init__(self, http: httpx.AsyncClient, seed: int):
+        self.http = http
+        campuses = CampusRequirements(
+            UC_REQUIREMENTS, ASSIST_EQUIVALENCIES,
+            {campus["id"]: campus["name"] for campus in UC_CAMPUSES},
+        )
+        index = campuses.indexes[TARGET_UC]
+        self.majors = list(campuses.requirements[TARGET_UC])
+        self.required = {
+            major: [code for codes in index.requirement_codes[major] for code in codes]
+            for major in self.majors
+        }
+        self.colleges = list(ASSIST_EQUIVALENCIES)
+        self.offered = {college: list(courses) for college, courses in ASSIST_EQUIVALENCIES.items()}
+        self.prefix = f"load{seed}"
+        self.registered: Deque[Dict] = deque()
+        self.selected: Deque[Dict] = deque()
+        self.ready: List[Dict] = []
+        self.verified: List[Dict] = []
+        self.created = 0
+        self.latencies: Dict[str, List[float]] = {route: [] for route in ROUTES.values()}
+        self.statuses: Dict[str, Counter] = {route: Counter() for route in ROUTES.values()}
+        self.recording = False
+
+    async def request(self, operation: str, method: str, path: str, body: Optional[Dict] = None) -> int:
+        route = ROUTES[operation]
+        started = time.perf_counter()
+        try:
+            response = await self.http.request(method, path, json=body)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        if self.recording:
+            self.latencies[route].append(time.perf_counter() - started)
+            self.statuses[route][status] += 1
+        return status
+
+    async def register(self, rng: random.Random) -> Optional[Dict]:
+        self.created += 1
+        student = {
+            "email": f"{self.prefix}-{self.created}@example.edu",
+            "college": rng.choice(self.colleges),
+            "major": rng.choice(self.majors),
+        }
+        status = await self.request("register", "POST", "/api/auth/register", {
+            "email": student["email"],
+            "name": "Load Test Student",
+            "major": student["major"],
+            "community_college": student["college"],
+        })
+        if status != 200:
+            return None
+        self.registered.append(student)
+        return student
+
+    async def select(self, rng: random.Random, student: Optional[Dict] = None) -> None:
+        if student is None:
+            student = self.registered.popleft() if self.registered else self._returning(rng)
+        elif student in self.registered:
+            self.registered.remove(student)
+        if student is None:
+            return
+        status = await self.request("select", "POST", "/api/select-uc", {
+            "user_email": student["email"],
+            "target_uc": TARGET_UC,
+            "target_major": student["major"],
+        })
+        if status == 200 and not student.get("ready"):
+            self.selected.append(student)
+
+    async def upload(self, rng: random.Random, student: Optional[Dict] = None) -> None:
+        if student is None:
+            student = self.selected.popleft() if self.selected else self._returning(rng)
+        elif student in self.selected:
+            self.selected.remove(student)
+        if student is None:
+            return
+        courses = random_courses(
+            rng, self.offered[student["college"]], self.required[student["major"]], rng.randint(8, 40)
+        )
+        status = await self.request("upload", "POST", "/api/transcript/upload", {
+            "user_email": student["email"],
+            "courses": courses,
+        })
+        if status == 200 and not student.get("ready"):
+            student["ready"] = True
+            self.ready.append(student)
+
+    async def verify(self, rng: random.Random, student: Optional[Dict] = None) -> None:
+        student = student or self._returning(rng)
+        if student is None:
+            return
+        status = await self.request("verify", "POST", f"/api/verify/{student['email']}")
+        if status == 200 and not student.get("verified"):
+            student["verified"] = True
+            self.verified.append(student)
+
+    async def results(self, rng: random.Random) -> None:
+        # Only students with a verification have results to read
+        student = rng.choice(self.verified) if self.verified else None
+        if student is not None:
+            await self.request("results", "GET", f"/api/results/{student['email']}")
+
+    def _returning(self, rng: random.Random) -> Optional[Dict]:
+        return rng.choice(self.ready) if self.ready else None
+
+    async def seed(self, users: int, concurrency: int) -> None:
+        """Register, onboard and verify users without recording them"""
+        limit = asyncio.Semaphore(concurrency)
+        rng = random.Random(self.prefix)
+
+        async def onboard() -> None:
+            async with limit:
+                student = await self.register(rng)
+                if student is not None:
+                    await self.select(rng, student)
+                    await self.upload(rng, student)
+                    await self.verify(rng, student)
+
+        await asyncio.gather(*(onboard() for _ in range(users)))
+
+
+async def run_clients(traffic: Traffic, weights: Dict[str, float], args: argparse.Namespace) -> float:
+    """Keep `concurrency` clients busy for the duration; returns elapsed seconds"""
+    operations = list(weights)
+    chances = [weights[name] for name in operations]
+    deadline = time.perf_counter() + args.duration
+
+    async def client(number: int) -> None:
+        rng = random.Random(args.seed * 1000 + number)
+        while time.perf_counter() < deadline:
+            operation = rng.choices(operations, chances)[0]
+            await getattr(traffic, operation)(rng)
+
+    traffic.recording = True
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(args.concurrency)))
+    traffic.recording = False
+    return time.perf_counter() - started
+
+
+def route_report(traffic: Traffic, elapsed: float) -> Dict[str, Dict]:
+    report = {}
+    for route, samples in traffic.latencies.items():
+        if not samples:
+            continue
+        ms = [s * 1000 for s in samples]
+        statuses = traffic.statuses[route]
+        report[route] = {
+            "requests": len(ms),
+            "throughput": round(len(ms) / elapsed, 2),
+            "errors": sum(count for status, count in statuses.items() if not 200 <= status < 400),
+            "statuses": {str(status): count for status, count in sorted(statuses.items())},
+            "p50_ms": round(statistics.median(ms), 3),
+            "p95_ms": round(percentile(ms, 95), 3),
+            "p99_ms": round(percentile(ms, 99), 3),
+            "max_ms": round(max(ms), 3),
+        }
+    return report
+
+
+def print_report(report: Dict[str, Dict], elapsed: float) -> None:
+    print(f"{'route':<30} {'reqs':>7} {'req/s':>8} {'errors':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for route, row in report.items():
+        print(
+            f"{route:<30} {row['requests']:>7} {row['throughput']:>8.1f} {row['errors']:>6} "
+            f"{row['p50_ms']:>7.1f}ms {row['p95_ms']:>7.1f}ms {row['p99_ms']:>7.1f}ms"
+        )
+    total = sum(row["requests"] for row in report.values())
+    print(f"{'total':<30} {total:>7} {total / elapsed:>8.1f}")
+
+
+def in_process_client(args: argparse.Namespace) -> Tuple[httpx.AsyncClient, FakeFirestoreClient]:
+    """An HTTP client for the app itself, with users kept in the fake Firestore"""
+    # Imported here so --url runs do not build the app's reference data
+    from app import main
+
+    firestore = FakeFirestoreClient()
+    main.store = FirestoreUserStore(firestore, max_concurrency=args.pool)
+    main.warm_reference_data()
+    transport = httpx.ASGITransport(app=main.app)
+    return httpx.AsyncClient(transport=transport, base_url="http://load", timeout=args.timeout), firestore
+
+
+async def main(args: argparse.Namespace) -> int:
+    weights = parse_mix(args.mix)
+    if args.url:
+        http = httpx.AsyncClient(
+            base_url=args.url, timeout=args.timeout,
+            limits=httpx.Limits(max_connections=args.concurrency),
+        )
+        firestore = None
+        target = args.url
+    else:
+        http, firestore = in_process_client(args)
+        target = f"in-process app, {args.latency * 1000:g}ms fake Firestore latency, pool={args.pool}"
+
+    async with http:
+        traffic = Traffic(http, args.seed)
+        await traffic.seed(args.users, args.concurrency)
+        print(f"{target}; {len(traffic.ready)} seeded users, {args.concurrency} clients for {args.duration:g}s")
+        if firestore is not None:
+            firestore.latency = args.latency
+            firestore.jitter = args.jitter
+        elapsed = await run_clients(traffic, weights, args)
+
+    report = route_report(traffic, elapsed)
+    print_report(report, elapsed)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "target": target,
+                "concurrency": args.concurrency,
+                "duration_s": round(elapsed, 3),
+                "mix": weights,
+                "routes": report,
+            }, f, indent=2)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of timed traffic")
+    parser.add_argument("--users", type=int, default=500, help="users onboarded before the timed run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation weights, e.g. verify=3,results=8")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per fake Firestore call")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--pool", type=int, default=32, help="Firestore thread pool size")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds per request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the per-route report as JSON to this file")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,351 @@
+"""
+Benchmark Suite
+Times eligibility verification, the cohort engine against the scalar path,
+the /api/verify/{email} endpoint, ResultExplainer rendering and
+reference-data loading against a synthetic catalog at production scale,
+and writes the timings as JSON so runs from two commits can be compared
+
+Run from backend/:
+    python -m loadtest.benchmarks --output bench.json
+    python -m loadtest.benchmarks --compare bench.json --threshold 0.15
+    python -m loadtest.benchmarks --only verify explain --majors 100
+    python -m loadtest.benchmarks --only cohort --cohort-students 100000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from app.services.eligibility import EligibilityChecker
+from app.services.explainer import ResultExplainer
+from app.services.reference_data import CATALOG_FILES, load_catalog
+from app.services.requirement_index import CampusRequirements
+from app.services.snapshot import ReferenceSnapshot, build_snapshot
+from app.services.verification import verify_user_document
+from loadtest.firestore_offload import percentile
+from loadtest.synthetic import SyntheticCatalog, synthetic_transcript, synthetic_user
+
+# Bump when the result layout changes, so old baselines are not misread
+RESULTS_FORMAT = 1
+
+GROUPS = ("verify", "cohort", "endpoint", "explain", "reference")
+
+# Relative slowdown of a median before --compare reports a regression
+REGRESSION_THRESHOLD = float(os.getenv("BENCH_REGRESSION_THRESHOLD", "0.15"))
+
+
+# ===================== TIMING =====================
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Per-call statistics in milliseconds"""
+    ms = [s * 1000 for s in samples]
+    return {
+        "runs": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 4),
+        "median_ms": round(statistics.median(ms), 4),
+        "p95_ms": round(percentile(ms, 95), 4),
+        "min_ms": round(min(ms), 4),
+        "max_ms": round(max(ms), 4),
+    }
+
+
+def measure(call: Callable[[Any], Any], inputs: Iterable[Any], warmup: int = 3) -> Dict[str, float]:
+    """Time one call per input, after a few untimed calls"""
+    inputs = list(inputs)
+    for value in inputs[:warmup]:
+        call(value)
+    samples = []
+    for value in inputs:
+        started = time.perf_counter()
+        call(value)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def measure_passes(call: Callable[[Any], Any], inputs: Iterable[Any], passes: int = 20) -> Dict[str, float]:
+    """
+    Time whole passes over the inputs, reported per call
+    For calls of a few microseconds, where timing each one is mostly noise
+    """
+    inputs = list(inputs)
+    for value in inputs:
+        call(value)
+    samples = []
+    for _ in range(passes):
+        started = time.perf_counter()
+        for value in inputs:
+            call(value)
+        samples.append((time.perf_counter() - started) / len(inputs))
+    return summarize(samples)
+
+
+async def measure_async(call: Callable[[Any], Awaitable[Any]], inputs: Iterable[Any]) -> Dict[str, float]:
+    """Time one awaited call per input, one at a time"""
+    samples = []
+    for value in inputs:
+        started = time.perf_counter()
+        await call(value)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+# ===================== BENCHMARKS =====================
+
+class Suite:
+    """Shared synthetic data, built once for every benchmark group"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.results: Dict[str, Dict[str, float]] = {}
+        started = time.perf_counter()
+        self.catalog = SyntheticCatalog(args.colleges, args.campuses, args.majors, args.seed)
+        self.campuses = CampusRequirements(
+            self.catalog.requirements, self.catalog.equivalencies, self.catalog.campus_names
+        )
+        rng = random.Random(args.seed)
+        self.users = {
+            size: [synthetic_user(rng, self.catalog, f"s{size}-{i}@example.edu", size) for i in range(args.runs)]
+            for size in args.sizes
+        }
+        print(
+            f"catalog: {len(self.catalog.equivalencies)} colleges, {len(self.catalog.requirements)} campuses, "
+            f"{args.majors} majors each; built in {time.perf_counter() - started:.1f}s"
+        )
+
+    def record(self, name: str, stats: Dict[str, float]) -> None:
+        self.results[name] = stats
+        print(f"{name:<40} median {stats['median_ms']:9.3f}ms  p95 {stats['p95_ms']:9.3f}ms  n={stats['runs']}")
+
+    def verify(self) -> None:
+        checkers = {
+            campus: EligibilityChecker(
+                self.catalog.requirements[campus], self.catalog.equivalencies,
+                index=self.campuses.indexes[campus],
+            )
+            for campus in self.catalog.requirements
+        }
+
+        def full(user: Dict) -> Dict:
+            return checkers[user["target_uc"]].run_full_verification(
+                user["transcript"], user["community_college"], user["target_major"],
+                self.catalog.campus_names[user["target_uc"]],
+            )
+
+        for size, users in self.users.items():
+            self.record(f"verify.full.{size}", measure(full, users))
+            self.record(
+                f"verify.document.{size}",
+                measure(lambda user: verify_user_document(user, self.campuses), users),
+            )
+
+    def cohort(self) -> None:
+        # One major for the whole cohort, with transcripts from every college
+        campus = next(iter(self.catalog.requirements))
+        major = next(iter(self.catalog.requirements[campus]))
+        checker = EligibilityChecker(
+            self.catalog.requirements[campus], self.catalog.equivalencies,
+            index=self.campuses.indexes[campus],
+        )
+        rng = random.Random(self.args.seed)
+        n = self.args.cohort_students
+        colleges = [rng.choice(self.catalog.colleges) for _ in range(n)]
+        transcripts = [
+            synthetic_transcript(rng, self.catalog, rng.randint(5, 40), college, campus, major)
+            for college in colleges
+        ]
+        target_uc = self.catalog.campus_names[campus]
+
+        def vectorized(_: Any) -> List[Dict]:
+            return checker.run_cohort_verification(transcripts, colleges, major, target_uc)
+
+        def scalar(_: Any) -> List[Dict]:
+            return [
+                checker.run_full_verification(transcript, college, major, target_uc)
+                for transcript, college in zip(transcripts, colleges)
+            ]
+
+        # Timings are per pass over the whole cohort
+        runs = self.args.cohort_runs
+        self.record(f"cohort.vectorized.{n}", measure(vectorized, range(runs), warmup=1))
+        self.record(f"cohort.scalar.{n}", measure(scalar, range(runs), warmup=0))
+
+    def endpoint(self) -> None:
+        asyncio.run(self._endpoint())
+
+    async def _endpoint(self) -> None:
+        # The app is pointed at the synthetic catalog and an in-memory
+        # Firestore, then driven in-process through its ASGI interface
+        import httpx
+
+        from app import main
+        from app.db.firestore_store import FirestoreUserStore
+        from loadtest.fake_firestore import FakeFirestoreClient
+
+        client = FakeFirestoreClient()
+        for users in self.users.values():
+            for user in users:
+                client.collection("users").document(user["email"]).set(user)
+        main.store = FirestoreUserStore(client)
+        main.get_campus_requirements = lambda: self.campuses
+        main.verification_cache.clear()
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            async def verify(user: Dict) -> None:
+                response = await http.post(f"/api/verify/{user['email']}")
+                response.raise_for_status()
+
+            for size, users in self.users.items():
+                # First request per user computes; a repeat returns the stored result
+                self.record(f"endpoint.verify.{size}", await measure_async(verify, users))
+                self.record(f"endpoint.verify_stored.{size}", await measure_async(verify, users))
+        main.store.shutdown()
+
+    def explain(self) -> None:
+        for size, users in self.users.items():
+            results = [verify_user_document(user, self.campuses) for user in users]
+            self.record(
+                f"explain.summary.{size}", measure_passes(ResultExplainer.generate_summary_paragraph, results)
+            )
+            self.record(
+                f"explain.actions.{size}", measure_passes(ResultExplainer.generate_action_items, results)
+            )
+
+    def reference(self) -> None:
+        runs = self.args.reference_runs
+
+        def cold_catalog(name: str) -> Dict:
+            load_catalog.cache_clear()
+            return load_catalog(name)
+
+        for name in CATALOG_FILES:
+            self.record(f"reference.catalog.{name}", measure(cold_catalog, [name] * runs, warmup=1))
+        catalogs = {name: cold_catalog(name) for name in CATALOG_FILES}
+
+        self.record(
+            "reference.index_build",
+            measure(lambda _: CampusRequirements(
+                self.catalog.requirements, self.catalog.equivalencies, self.catalog.campus_names
+            ), range(runs), warmup=0),
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "reference.snapshot")
+            self.record(
+                "reference.snapshot_build",
+                measure(lambda _: build_snapshot(
+                    path, self.catalog.requirements, self.catalog.equivalencies,
+                    self.catalog.campus_names, catalogs,
+                ), range(runs), warmup=0),
+            )
+            self.record(
+                "reference.snapshot_open",
+                measure(lambda _: ReferenceSnapshot(path).campus_requirements().course_codes, range(runs)),
+            )
+            campuses = ReferenceSnapshot(path).campus_requirements()
+            size = self.args.sizes[len(self.args.sizes) // 2]
+            self.record(
+                f"verify.snapshot.{size}",
+                measure(lambda user: verify_user_document(user, campuses), self.users[size]),
+            )
+
+
+# ===================== RESULTS =====================
+
+def git_revision() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def compare(results: Dict[str, Dict], baseline: Dict, threshold: float) -> List[str]:
+    """Benchmarks whose median grew by more than threshold over the baseline"""
+    if baseline.get("format") != RESULTS_FORMAT:
+        print(f"baseline uses results format {baseline.get('format')}, expected {RESULTS_FORMAT}")
+        return []
+    old_results = baseline["results"]
+    regressions = []
+    print(f"--- against {baseline['meta'].get('revision') or 'baseline'}")
+    for name, stats in results.items():
+        if name not in old_results:
+            continue
+        old, new = old_results[name]["median_ms"], stats["median_ms"]
+        change = (new - old) / old if old else 0.0
+        flag = "REGRESSION" if change > threshold else ""
+        print(f"{name:<40} {old:9.3f}ms -> {new:9.3f}ms  {change:+7.1%} {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(args: argparse.Namespace) -> int:
+    suite = Suite(args)
+    for group in args.only:
+        getattr(suite, group)()
+
+    document = {
+        "format": RESULTS_FORMAT,
+        "meta": {
+            "revision": git_revision(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "scale": {
+                "colleges": args.colleges, "campuses": args.campuses, "majors": args.majors,
+                "sizes": args.sizes, "runs": args.runs, "seed": args.seed,
+            },
+        },
+        "results": suite.results,
+    }
+    if "cohort" in args.only:
+        document["meta"]["scale"]["cohort_students"] = args.cohort_students
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("scale") != document["meta"]["scale"]:
+            print(f"FAIL: {args.compare} was run at a different scale; rerun it with the same options")
+            return 2
+        regressions = compare(suite.results, baseline, args.threshold)
+        for name in regressions:
+            print(f"FAIL: {name} is more than {args.threshold:.0%} slower")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS), help="benchmark groups to run")
+    parser.add_argument("--colleges", type=int, default=116)
+    parser.add_argument("--campuses", type=int, default=9)
+    parser.add_argument("--majors", type=int, default=600, help="majors per campus")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200], help="courses per transcript")
+    parser.add_argument("--runs", type=int, default=200, help="transcripts per size")
+    parser.add_argument("--cohort-students", type=int, default=100000, help="transcripts in the cohort benchmark")
+    parser.add_argument("--cohort-runs", type=int, default=3, help="passes of each cohort benchmark")
+    parser.add_argument("--reference-runs", type=int, default=5, help="runs of each reference-data benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    sys.exit(main(parser.parse_args()))
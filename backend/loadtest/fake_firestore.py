@@ -0,0 +1,108 @@
+"""
+Fake Firestore Client
+In-memory stand-in for the firebase_admin Firestore client with injectable
+latency, so load tests never touch a real Firebase project
+"""
+
+import copy
+import random
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class FakeDocumentSnapshot:
+    """Snapshot of a single document at read time"""
+
+    def __init__(self, reference: "FakeDocumentReference", data: Optional[Dict]):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict]:
+        return copy.deepcopy(self._data)
+
+
+class FakeDocumentReference:
+    """Reference to one document in a fake collection"""
+
+    def __init__(self, client: "FakeFirestoreClient", collection: str, doc_id: str):
+        self.client = client
+        self.collection = collection
+        self.id = doc_id
+
+    def _docs(self) -> Dict[str, Dict]:
+        return self.client.data.setdefault(self.collection, {})
+
+    def get(self) -> FakeDocumentSnapshot:
+        self.client.wait()
+        return FakeDocumentSnapshot(self, self._docs().get(self.id))
+
+    def set(self, data: Dict) -> None:
+        self.client.wait()
+        self._docs()[self.id] = copy.deepcopy(data)
+
+    def update(self, data: Dict) -> None:
+        self.client.wait()
+        if self.id not in self._docs():
+            raise KeyError(f"No document to update: {self.collection}/{self.id}")
+        self._docs()[self.id].update(copy.deepcopy(data))
+
+
+class FakeCollectionReference:
+    """Reference to a fake collection"""
+
+    def __init__(self, client: "FakeFirestoreClient", name: str):
+        self.client = client
+        self.name = name
+
+    def document(self, doc_id: str) -> FakeDocumentReference:
+        return FakeDocumentReference(self.client, self.name, doc_id)
+
+
+class FakeWriteBatch:
+    """Buffered writes applied together on commit"""
+
+    def __init__(self, client: "FakeFirestoreClient"):
+        self.client = client
+        self._writes: List[Any] = []
+
+    def update(self, reference: FakeDocumentReference, data: Dict) -> None:
+        self._writes.append((reference, data))
+
+    def commit(self) -> None:
+        self.client.wait()
+        for reference, data in self._writes:
+            reference._docs().setdefault(reference.id, {}).update(copy.deepcopy(data))
+        self._writes = []
+
+
+class FakeFirestoreClient:
+    """
+    In-memory Firestore client
+    Every round trip blocks the calling thread for `latency` seconds
+    (plus up to `jitter` seconds), like the real synchronous client does
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.data: Dict[str, Dict[str, Dict]] = {}
+
+    def wait(self) -> None:
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def collection(self, name: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, name)
+
+    def get_all(self, references: Iterable[FakeDocumentReference]) -> List[FakeDocumentSnapshot]:
+        self.wait()
+        return [
+            FakeDocumentSnapshot(ref, ref._docs().get(ref.id))
+            for ref in references
+        ]
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
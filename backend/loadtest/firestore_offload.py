@@ -0,0 +1,95 @@
+"""
+Event Loop Blocking Load Test
+Replays concurrent user reads against a latency-injected fake Firestore and
+compares calling the synchronous client inline (the old endpoint pattern)
+with going through FirestoreUserStore's bounded thread pool
+
+Run from backend/:
+    python -m loadtest.firestore_offload --requests 400 --rate 400 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from app.db.firestore_store import FirestoreUserStore
+from loadtest.fake_firestore import FakeFirestoreClient
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+async def replay(
+    handler: Callable[[str], Awaitable[Dict]],
+    emails: List[str],
+    rate: float
+) -> List[float]:
+    """
+    Fire one request per email at a fixed arrival rate (open loop)
+    Latency is measured from the scheduled arrival, so time spent waiting
+    for a blocked event loop is counted
+    """
+    start = time.perf_counter()
+    latencies: List[float] = []
+
+    async def one(i: int, email: str) -> None:
+        arrival = start + i / rate
+        await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+        await handler(email)
+        latencies.append(time.perf_counter() - arrival)
+
+    await asyncio.gather(*(one(i, email) for i, email in enumerate(emails)))
+    return latencies
+
+
+def report(name: str, latencies: List[float]) -> None:
+    ms = [x * 1000 for x in latencies]
+    print(
+        f"{name:<10} n={len(ms):<5} "
+        f"p50={statistics.median(ms):8.1f}ms "
+        f"p95={percentile(ms, 95):8.1f}ms "
+        f"p99={percentile(ms, 99):8.1f}ms "
+        f"max={max(ms):8.1f}ms"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    client = FakeFirestoreClient(latency=0.0)
+    emails = [f"student{i}@example.edu" for i in range(args.requests)]
+    for email in emails:
+        client.collection("users").document(email).set({"email": email, "transcript": []})
+    client.latency = args.latency
+    client.jitter = args.jitter
+
+    async def blocking(email: str) -> Dict:
+        # What the endpoints used to do: a sync call inside `async def`
+        return client.collection("users").document(email).get().to_dict()
+
+    store = FirestoreUserStore(client, max_concurrency=args.concurrency)
+
+    async def offloaded(email: str) -> Dict:
+        return await store.get_user(email)
+
+    print(
+        f"{args.requests} reads at {args.rate:g} req/s, "
+        f"{args.latency * 1000:g}ms Firestore latency, pool={args.concurrency}"
+    )
+    report("before", await replay(blocking, emails, args.rate))
+    report("after", await replay(offloaded, emails, args.rate))
+    store.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--rate", type=float, default=400.0, help="arrivals per second")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per Firestore call")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=32, help="Firestore thread pool size")
+    asyncio.run(main(parser.parse_args()))
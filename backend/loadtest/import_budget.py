@@ -0,0 +1,95 @@
+"""
+Cold Start Budget Check
+Imports app.main in fresh interpreters and reports how long the import and
+the reference-data warm-up take, failing when the import exceeds its budget
+or pulls in the Firebase SDK
+
+Run from backend/:
+    python -m loadtest.import_budget --runs 5 --budget-ms 1000 --profile
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Import budget for app.main, excluding interpreter startup
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1000"))
+
+# Modules that must stay out of the import path (loaded lazily on first use)
+LAZY_MODULES = ("firebase_admin", "google.cloud.firestore")
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+app.main.warm_reference_data()
+warmed = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "warm_ms": (warmed - imported) * 1000,
+    "eager_modules": [m for m in %r if m in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def run_child(backend_dir: str) -> Dict:
+    """Time one cold import and warm-up in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        cwd=backend_dir, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_profile(backend_dir: str, top: int) -> List[Tuple[float, str]]:
+    """Slowest modules by self time from python -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=backend_dir, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, module = line[len("import time:"):].split("|")
+        rows.append((int(self_us) / 1000, module.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(args: argparse.Namespace) -> int:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = [run_child(backend_dir) for _ in range(args.runs)]
+    import_ms = statistics.median(s["import_ms"] for s in samples)
+    warm_ms = statistics.median(s["warm_ms"] for s in samples)
+    eager = sorted({m for s in samples for m in s["eager_modules"]})
+
+    print(f"runs:      {args.runs}")
+    print(f"import:    {import_ms:8.1f} ms (median, budget {args.budget_ms:.0f} ms)")
+    print(f"warm-up:   {warm_ms:8.1f} ms (median, reference data before readiness)")
+    if args.profile:
+        print("slowest imports (self time):")
+        for ms, module in import_profile(backend_dir, args.top):
+            print(f"  {ms:8.1f} ms  {module}")
+
+    failures = []
+    if import_ms > args.budget_ms:
+        failures.append(f"import took {import_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    if eager:
+        failures.append(f"imported at startup but should be lazy: {', '.join(eager)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--profile", action="store_true", help="list the slowest imports")
+    parser.add_argument("--top", type=int, default=10)
+    sys.exit(main(parser.parse_args()))
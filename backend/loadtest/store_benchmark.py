@@ -0,0 +1,115 @@
+"""
+User Store Benchmark
+Seeds the same user documents into the Firestore store (over the
+latency-injected fake client) and the SQL store, then compares single reads,
+bulk reads and bulk writes on each
+
+Run from backend/:
+    python -m loadtest.store_benchmark --users 2000 --latency 0.02
+    python -m loadtest.store_benchmark --database-url postgresql://localhost/transfermap
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+from app.db.database import make_engine
+from app.db.firestore_store import FirestoreUserStore
+from app.db.sql_store import SQLUserStore
+from app.db.user_store import UserStore
+from loadtest.fake_firestore import FakeFirestoreClient
+from loadtest.firestore_offload import replay, report
+
+TRANSCRIPT = [
+    {"course_code": "MATH 1A", "course_name": "Calculus I", "units": 5.0, "grade": "A", "semester": "Fall 2023"},
+    {"course_code": "MATH 1B", "course_name": "Calculus II", "units": 5.0, "grade": "B+", "semester": "Winter 2024"},
+    {"course_code": "CIS 22A", "course_name": "Beginning Programming", "units": 4.5, "grade": "A-", "semester": "Fall 2023"},
+    {"course_code": "CIS 22B", "course_name": "Intermediate Programming", "units": 4.5, "grade": "A", "semester": "Winter 2024"},
+    {"course_code": "EWRT 1A", "course_name": "Composition", "units": 5.0, "grade": "A", "semester": "Fall 2023"},
+    {"course_code": "PHYS 4A", "course_name": "Mechanics", "units": 6.0, "grade": "B", "semester": "Spring 2024"},
+]
+
+RESULT = {
+    "eligibility_status": "on_track",
+    "eligibility_message": "On track",
+    "summary": {"requirements_met": 4, "requirements_total": 6},
+    "major_requirements": [],
+    "igetc_status": {},
+    "risks": [],
+    "notes": [],
+    "sources": [],
+    "disclaimer": "Benchmark data",
+}
+
+
+def user_document(email: str) -> Dict:
+    return {
+        "email": email,
+        "name": "Benchmark Student",
+        "major": "Computer Science",
+        "community_college": "De Anza College",
+        "created_at": "2024-01-01T00:00:00",
+        "transcript": TRANSCRIPT,
+        "target_uc": "ucsc",
+        "target_major": "Computer Science",
+        "verification_results": None,
+    }
+
+
+async def timed(label: str, call) -> None:
+    started = time.perf_counter()
+    await call
+    print(f"{label:<10} {(time.perf_counter() - started) * 1000:10.1f}ms")
+
+
+async def benchmark(name: str, store: UserStore, emails: List[str], args: argparse.Namespace) -> None:
+    print(f"--- {name}")
+    await store.connect()
+
+    async def read(email: str) -> Dict:
+        return await store.get_user(email)
+
+    report("get_user", await replay(read, emails[:args.requests], args.rate))
+    await timed("get_users", store.get_users(emails))
+    await timed("update", store.update_users({
+        email: {"verification_results": RESULT, "verification_key": "benchmark"}
+        for email in emails
+    }))
+    store.shutdown()
+
+
+async def main(args: argparse.Namespace) -> None:
+    emails = [f"student{i}@example.edu" for i in range(args.users)]
+    print(
+        f"{args.users} users, {args.requests} reads at {args.rate:g} req/s, "
+        f"{args.latency * 1000:g}ms Firestore latency"
+    )
+
+    # Seed without latency, then measure with it
+    client = FakeFirestoreClient()
+    for email in emails:
+        client.collection("users").document(email).set(user_document(email))
+    client.latency = args.latency
+    client.jitter = args.jitter
+    firestore = FirestoreUserStore(client, max_concurrency=args.concurrency)
+    await benchmark("firestore (fake)", firestore, emails, args)
+
+    engine = make_engine(args.database_url)
+    sql = SQLUserStore(engine)
+    for email in emails:
+        await sql.create_user(email, user_document(email))
+    await benchmark(f"sql ({engine.dialect.name})", sql, emails, args)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=400, help="single reads to replay")
+    parser.add_argument("--rate", type=float, default=400.0, help="arrivals per second")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per Firestore call")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=32, help="Firestore thread pool size")
+    parser.add_argument("--database-url", default="sqlite://", help="SQL store database")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,197 @@
+"""
+Synthetic Reference Data
+Seeded generators for requirement catalogs, Assist.org equivalencies,
+transcripts and user documents at production scale (116 community colleges,
+9 UC campuses, 600 majors per campus), shaped like requirements_data so
+every service accepts them unchanged
+"""
+
+import random
+from typing import Dict, List, Optional
+
+from app.services.requirements_data import UC_CAMPUSES
+
+SUBJECTS = (
+    "ANTH", "ART", "BIOL", "BUS", "CHEM", "CIS", "COMM", "CS", "ECON", "ENGL",
+    "GEOG", "HIST", "MATH", "MUS", "PHIL", "PHYS", "POLS", "PSYC", "SOC", "SPAN",
+    "STAT", "THTR",
+)
+
+FIELDS = (
+    "Anthropology", "Art History", "Biochemistry", "Biology", "Business",
+    "Chemistry", "Cognitive Science", "Computer Engineering", "Computer Science",
+    "Economics", "Environmental Studies", "Film", "History", "Linguistics",
+    "Mathematics", "Music", "Philosophy", "Physics", "Political Science",
+    "Psychology", "Sociology", "Statistics", "Theater Arts", "Urban Studies",
+)
+
+IGETC_AREAS = {
+    "1A": {"name": "English Composition", "required": True},
+    "1B": {"name": "Critical Thinking", "required": True},
+    "2": {"name": "Mathematical Concepts", "required": True},
+    "3A": {"name": "Arts", "required": True},
+    "3B": {"name": "Humanities", "required": True},
+    "4": {"name": "Social Sciences", "required": True, "courses_needed": 3},
+    "5A": {"name": "Physical Science", "required": True},
+    "5B": {"name": "Biological Science", "required": True},
+    "5C": {"name": "Lab Science", "required": True},
+    "6A": {"name": "Language Other Than English", "required": True},
+}
+
+UNITS = (3.0, 4.0, 4.5, 5.0)
+
+# Grade mix of a typical transcript, W and P included
+GRADES = ("A", "A-", "B+", "B", "B-", "C+", "C", "D", "F", "P", "W")
+GRADE_WEIGHTS = (18, 10, 10, 14, 8, 7, 10, 3, 3, 5, 4)
+
+
+class SyntheticCatalog:
+    """
+    Requirements for every campus and equivalencies for every college
+    requirements: campus id -> major -> requirements entry
+    equivalencies: college -> course code -> equivalency entry
+    campus_names: campus id -> display name
+    """
+
+    def __init__(
+        self,
+        colleges: int = 116,
+        campuses: int = 9,
+        majors: int = 600,
+        seed: int = 0
+    ):
+        rng = random.Random(seed)
+        self.codes = [
+            f"{subject} {number}{suffix}"
+            for subject in SUBJECTS
+            for number in range(1, 61)
+            for suffix in ("", "A", "B")
+        ]
+        if campuses <= len(UC_CAMPUSES):
+            self.campus_names = {campus["id"]: campus["name"] for campus in UC_CAMPUSES[:campuses]}
+        else:
+            self.campus_names = {f"uc{i:02d}": f"UC Campus {i}" for i in range(campuses)}
+
+        # Every campus offers its own mix drawn from one pool of major names
+        pool = [f"{field} ({track})" for field in FIELDS for track in range(1, majors // len(FIELDS) + 2)]
+        self.requirements: Dict[str, Dict] = {
+            campus: {
+                major: self._major(rng, campus)
+                for major in rng.sample(pool, min(majors, len(pool)))
+            }
+            for campus in self.campus_names
+        }
+        self.equivalencies: Dict[str, Dict] = {
+            f"Synthetic College {i:03d}": self._college(rng)
+            for i in range(colleges)
+        }
+        self.colleges = list(self.equivalencies)
+
+    def _major(self, rng: random.Random, campus: str) -> Dict:
+        required = []
+        for i in range(rng.randint(4, 14)):
+            codes = rng.sample(self.codes, rng.randint(1, 4))
+            if rng.random() < 0.15 and len(codes) > 1:
+                # A series or a pick-N group, like the richer real requirements
+                rule = {"all": codes[:2]} if rng.random() < 0.5 else {"choose": 2, "from": codes}
+                required.append({"name": f"Requirement {i + 1}", "rule": rule})
+            else:
+                required.append({"name": f"Requirement {i + 1}", "equivalent_codes": codes})
+        return {
+            "required_courses": required,
+            "igetc_areas": IGETC_AREAS,
+            "min_gpa": rng.choice((2.4, 2.8, 3.0, 3.2, 3.4)),
+            "min_units": 60,
+            "max_units": 90,
+            "notes": ["Synthetic requirements for benchmarking"],
+            "source_url": f"https://admissions.example.edu/{campus}/transfer",
+        }
+
+    def _college(self, rng: random.Random) -> Dict:
+        areas = list(IGETC_AREAS)
+        courses = {}
+        for code in rng.sample(self.codes, 300):
+            courses[code] = {
+                "uc_equivalent": code,
+                "units": rng.choice(UNITS),
+                "igetc": rng.sample(areas, rng.choice((0, 0, 1, 1, 2))),
+            }
+        return courses
+
+    def major_codes(self, campus: str, major: str) -> List[str]:
+        """Course codes a major's requirements mention"""
+        codes = []
+        for requirement in self.requirements[campus][major]["required_courses"]:
+            rule = requirement.get("rule")
+            if rule is None:
+                codes.extend(requirement["equivalent_codes"])
+            else:
+                codes.extend(rule.get("all") or rule.get("from"))
+        return codes
+
+
+def random_courses(
+    rng: random.Random,
+    offered: List[str],
+    required: List[str],
+    courses: int
+) -> List[Dict]:
+    """
+    Transcript courses: mostly from `offered` (what the college articulates),
+    some from `required` and a few codes no catalog knows
+    """
+    transcript = []
+    for i in range(courses):
+        roll = rng.random()
+        if roll < 0.6 and offered:
+            code = rng.choice(offered)
+        elif roll < 0.9 and required:
+            code = rng.choice(required)
+        else:
+            code = f"{rng.choice(SUBJECTS)} {rng.randint(100, 299)}"
+        transcript.append({
+            "course_code": code,
+            "course_name": f"Course {i + 1}",
+            "units": rng.choice(UNITS),
+            "grade": rng.choices(GRADES, GRADE_WEIGHTS)[0],
+            "semester": f"{rng.choice(('Fall', 'Winter', 'Spring'))} {2021 + i // 12}",
+        })
+    return transcript
+
+
+def synthetic_transcript(
+    rng: random.Random,
+    catalog: SyntheticCatalog,
+    courses: int,
+    college: str,
+    campus: str,
+    major: str
+) -> List[Dict]:
+    """A transcript of `courses` courses for a student at a synthetic college"""
+    return random_courses(
+        rng, list(catalog.equivalencies[college]), catalog.major_codes(campus, major), courses
+    )
+
+
+def synthetic_user(
+    rng: random.Random,
+    catalog: SyntheticCatalog,
+    email: str,
+    courses: int,
+    campus: Optional[str] = None
+) -> Dict:
+    """A user document with a target campus, major and transcript"""
+    campus = campus or rng.choice(list(catalog.requirements))
+    major = rng.choice(list(catalog.requirements[campus]))
+    college = rng.choice(catalog.colleges)
+    return {
+        "email": email,
+        "name": "Synthetic Student",
+        "major": major,
+        "community_college": college,
+        "created_at": "2024-01-01T00:00:00",
+        "transcript": synthetic_transcript(rng, catalog, courses, college, campus, major),
+        "target_uc": campus,
+        "target_major": major,
+        "verification_results": None,
+    }
@@ -0,0 +1,88 @@
+"""
+Cohort Engine Differential Test
+The vectorized cohort path must return exactly what run_full_verification
+returns for each transcript, on the bundled data and a synthetic catalog
+with rule-based requirements
+"""
+
+import random
+from typing import Dict, List
+
+import pytest
+
+from app.services.eligibility import EligibilityChecker
+from app.services.requirements_data import ASSIST_EQUIVALENCIES, UC_REQUIREMENTS
+from loadtest.synthetic import SyntheticCatalog, random_courses
+
+STUDENTS = 400
+UNKNOWN_COLLEGE = "Nowhere Community College"
+UNKNOWN_MAJOR = "Underwater Basket Weaving"
+
+
+def _unnormalize(rng: random.Random, code: str) -> str:
+    """Spellings of a code that normalize back to it ('math-1a', 'MATH1A', 'Math 01 a')"""
+    subject, _, number = code.partition(" ")
+    style = rng.randrange(4)
+    if style == 0:
+        return f"{subject.lower()}-{number.lower()}"
+    if style == 1:
+        return f"{subject}{number}"
+    if style == 2:
+        return f"{subject.title()} 0{number[:-1]} {number[-1:].lower()}".strip()
+    return code
+
+
+def _transcript(
+    rng: random.Random,
+    equivalencies: Dict,
+    college: str,
+    required: List[str]
+) -> List[Dict]:
+    offered = list(equivalencies.get(college, {}))
+    courses = random_courses(rng, offered, required, rng.randint(1, 15))
+    for course in courses:
+        if rng.random() < 0.2:
+            course["course_code"] = _unnormalize(rng, course["course_code"])
+        if rng.random() < 0.15:
+            # Taken elsewhere: another known college, the home college or one with no data
+            course["college"] = rng.choice(list(equivalencies) + [college, UNKNOWN_COLLEGE])
+    return courses
+
+
+def _check_cohorts(requirements: Dict, equivalencies: Dict, seed: int) -> None:
+    rng = random.Random(seed)
+    checker = EligibilityChecker(requirements, equivalencies)
+    colleges = list(equivalencies) + [UNKNOWN_COLLEGE]
+    for major in list(requirements) + [UNKNOWN_MAJOR]:
+        required = [code for codes in checker.index.requirement_codes.get(major, []) for code in codes]
+        homes = [rng.choice(colleges) for _ in range(STUDENTS // (len(requirements) + 1) + 1)]
+        transcripts = [_transcript(rng, equivalencies, home, required) for home in homes]
+
+        cohort = checker.run_cohort_verification(transcripts, homes, major, "UC Test")
+        scalar = [
+            checker.run_full_verification(courses, home, major, "UC Test")
+            for courses, home in zip(transcripts, homes)
+        ]
+        assert cohort == scalar, major
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_cohort_matches_scalar_on_bundled_data(seed):
+    _check_cohorts(UC_REQUIREMENTS["ucsc"], ASSIST_EQUIVALENCIES, seed)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_cohort_matches_scalar_on_synthetic_catalog(seed):
+    catalog = SyntheticCatalog(colleges=6, campuses=1, majors=12, seed=seed)
+    campus = next(iter(catalog.requirements))
+    _check_cohorts(catalog.requirements[campus], catalog.equivalencies, seed)
+
+
+def test_cohort_shares_one_college_string():
+    checker = EligibilityChecker(UC_REQUIREMENTS["ucsc"], ASSIST_EQUIVALENCIES)
+    rng = random.Random(7)
+    transcripts = [_transcript(rng, ASSIST_EQUIVALENCIES, "De Anza College", []) for _ in range(20)]
+    assert checker.run_cohort_verification(transcripts, "De Anza College", "Computer Science") == [
+        checker.run_full_verification(courses, "De Anza College", "Computer Science")
+        for courses in transcripts
+    ]
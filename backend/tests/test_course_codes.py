@@ -0,0 +1,93 @@
+"""
+Course Code Tests
+Spellings of a course code must normalize to one key, and "did you mean"
+suggestions must rank by similarity with ties broken in code order
+"""
+
+import random
+
+import pytest
+
+from app.services.course_codes import normalize_course_code
+from app.services.course_suggestions import CourseCodeIndex
+
+CATALOG = ["MATH 1A", "MATH 1B", "MATH 1C", "MATH 1D", "MATH 2A", "MATH 11", "PHYS 4A", "ENGL 1A", "CS 1"]
+
+
+# ===================== NORMALIZATION =====================
+
+@pytest.mark.parametrize("code", [
+    "MATH 1A", "math-1a", "MATH1A", "Math 01 a", "math-001a", "  math  1A ", "math 1 a", "MATH_1A",
+])
+def test_spellings_normalize_to_one_key(code):
+    assert normalize_course_code(code) == "MATH 1A"
+
+
+@pytest.mark.parametrize("code, key", [
+    ("cs001", "CS 1"),
+    ("MATH 10", "MATH 10"),
+    ("MATH 100", "MATH 100"),
+    ("", ""),
+    (None, ""),
+])
+def test_normalize_keeps_numbers_distinct(code, key):
+    assert normalize_course_code(code) == key
+
+
+def test_index_membership_uses_normalized_codes():
+    index = CourseCodeIndex(["math-1a", "MATH1A", "Phys 04 a"])
+    assert len(index) == 2
+    assert "Math 01 a" in index
+    assert "PHYS4A" in index
+    assert "MATH 1B" not in index
+
+
+# ===================== SUGGESTIONS =====================
+
+def test_suggestions_rank_best_first():
+    index = CourseCodeIndex(CATALOG)
+    assert index.suggest("PHYS 4") == ["PHYS 4A"]
+    assert index.suggest("ENGL1A") == ["ENGL 1A"]
+    assert index.suggest("zzzz") == []
+    assert index.suggest("") == []
+
+
+def test_ties_break_in_code_order():
+    # MATH 1A-1D are equally similar to MATH 1Z; the limit keeps the first in code order
+    index = CourseCodeIndex(CATALOG)
+    ranked = index.suggest("MATH 1Z", limit=10, min_similarity=0)
+    tied = [code for code in ranked if code in ("MATH 1A", "MATH 1B", "MATH 1C", "MATH 1D")]
+    assert tied == ["MATH 1A", "MATH 1B", "MATH 1C", "MATH 1D"]
+    limited = index.suggest("MATH 1Z", limit=3)
+    assert limited == ranked[:3]
+
+
+@pytest.mark.parametrize("query, limit, expected", [
+    ("BIO 7", 2, ["BIO 7", "BIO 7A"]),
+    ("BIO 25Q", 3, ["BIO 25", "BIO 25A", "BIO 25B"]),
+    ("MATH 13X", 2, ["MATH 13", "MATH 13A"]),
+    ("CHEM 1", 5, ["CHEM 1", "CHEM 10", "CHEM 11", "CHEM 12", "CHEM 13"]),
+])
+def test_ties_at_the_limit_keep_the_first_codes(query, limit, expected):
+    codes = [f"{subject} {n}{suffix}" for subject in ("BIO", "CHEM", "MATH")
+             for n in range(1, 30) for suffix in ("", "A", "B", "C", "L")]
+    assert CourseCodeIndex(codes).suggest(query, limit=limit) == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_suggestions_do_not_depend_on_catalog_order(seed):
+    rng = random.Random(seed)
+    codes = [f"BIO {n}{suffix}" for n in range(1, 30) for suffix in ("", "A", "B", "L")]
+    expected = CourseCodeIndex(sorted(codes))
+    rng.shuffle(codes)
+    index = CourseCodeIndex(codes)
+    for query in ("BIO 1C", "BIO 12", "bio-2x", "BIO 7L"):
+        for limit in (1, 3, 5):
+            assert index.suggest(query, limit=limit) == expected.suggest(query, limit=limit)
+
+
+def test_suggestions_skip_known_and_empty_codes():
+    index = CourseCodeIndex(CATALOG)
+    assert index.suggestions(["MATH 1A", "", "PHYS 4"]) == [
+        {"course_code": "PHYS 4", "suggestions": ["PHYS 4A"]}
+    ]
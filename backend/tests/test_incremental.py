@@ -0,0 +1,147 @@
+"""
+Incremental Verification State Tests
+A TranscriptAccumulator moved through random edits with apply() must equal
+one built from scratch for the final transcript, and persisted state must
+round-trip through to_dict()/load() unless it is stale
+"""
+
+import json
+import random
+from typing import Dict, List
+
+import pytest
+
+from app.services.incremental import STATE_FORMAT, TranscriptAccumulator
+from app.services.requirement_index import CampusRequirements
+from loadtest.synthetic import GRADES, SyntheticCatalog, UNITS, random_courses
+
+EDITS = 60
+
+
+@pytest.fixture(scope="module")
+def catalog() -> SyntheticCatalog:
+    return SyntheticCatalog(colleges=4, campuses=1, majors=8, seed=3)
+
+
+@pytest.fixture(scope="module")
+def campuses(catalog) -> CampusRequirements:
+    return CampusRequirements(catalog.requirements, catalog.equivalencies, catalog.campus_names)
+
+
+def _edit(
+    rng: random.Random,
+    catalog: SyntheticCatalog,
+    required: List[str],
+    courses: List[Dict]
+) -> List[Dict]:
+    """A copy of the transcript with one random edit applied"""
+    courses = [dict(course) for course in courses]
+    offered = list(catalog.equivalencies[rng.choice(catalog.colleges)])
+    kind = rng.randrange(7)
+    if kind == 0 or not courses:
+        courses.extend(random_courses(rng, offered, required, rng.randint(1, 4)))
+    elif kind == 1:
+        del courses[rng.randrange(len(courses))]
+    elif kind == 2:
+        # Retaking a course: the same code twice
+        courses.append(dict(rng.choice(courses)))
+    elif kind == 3:
+        course = rng.choice(courses)
+        course["grade"] = rng.choice(GRADES + ("IP", ""))
+        course["units"] = rng.choice(UNITS)
+    elif kind == 4:
+        # Taken elsewhere, or moved back to the home college
+        rng.choice(courses)["college"] = rng.choice(catalog.colleges + [None])
+    elif kind == 5:
+        rng.choice(courses)["course_code"] = rng.choice(offered + required)
+    else:
+        courses = [] if rng.random() < 0.5 else random_courses(rng, offered, required, rng.randint(1, 10))
+    rng.shuffle(courses)
+    return courses
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_apply_matches_rebuild(catalog, campuses, seed):
+    rng = random.Random(seed)
+    campus = next(iter(catalog.requirements))
+    index = campuses.indexes[campus]
+    major = rng.choice(list(catalog.requirements[campus]))
+    college = rng.choice(catalog.colleges)
+    required = catalog.major_codes(campus, major)
+
+    courses: List[Dict] = []
+    state = TranscriptAccumulator.from_transcript(courses, index, college, major)
+    for _ in range(EDITS):
+        edited = _edit(rng, catalog, required, courses)
+        state.apply(courses, edited)
+        courses = edited
+
+        rebuilt = TranscriptAccumulator.from_transcript(courses, index, college, major)
+        assert state.to_dict(courses) == rebuilt.to_dict(courses)
+        assert state.gpa == rebuilt.gpa
+        assert state.total_units == rebuilt.total_units
+        assert state.igetc_areas() == rebuilt.igetc_areas()
+
+        # Persisting and restoring between edits changes nothing
+        state = TranscriptAccumulator.load(state.to_dict(courses), index, college, major, courses)
+        assert state is not None
+        assert state.to_dict(courses) == rebuilt.to_dict(courses)
+
+
+def test_apply_counts_changes(catalog, campuses):
+    campus = next(iter(catalog.requirements))
+    major = next(iter(catalog.requirements[campus]))
+    college = catalog.colleges[0]
+    courses = random_courses(random.Random(0), list(catalog.equivalencies[college]), [], 5)
+    state = TranscriptAccumulator.from_transcript(courses, campuses.indexes[campus], college, major)
+    assert state.apply(courses, list(reversed(courses))) == 0
+    assert state.apply(courses, courses[1:]) == 1
+
+
+def test_round_trip_is_json_safe(catalog, campuses):
+    campus = next(iter(catalog.requirements))
+    index = campuses.indexes[campus]
+    major = next(iter(catalog.requirements[campus]))
+    college = catalog.colleges[1]
+    offered = list(catalog.equivalencies[college])
+    courses = random_courses(random.Random(1), offered, catalog.major_codes(campus, major), 25)
+    state = TranscriptAccumulator.from_transcript(courses, index, college, major)
+    data = json.loads(json.dumps(state.to_dict(courses)))
+    state = TranscriptAccumulator.load(data, index, college, major, courses)
+    assert state is not None
+    assert state.to_dict(courses) == data
+
+
+@pytest.mark.parametrize("stale", ["format", "transcript", "version", "college", "major", "missing"])
+def test_stale_state_is_rebuilt(catalog, campuses, stale):
+    campus = next(iter(catalog.requirements))
+    index = campuses.indexes[campus]
+    major, other_major = list(catalog.requirements[campus])[:2]
+    college, other_college = catalog.colleges[:2]
+    rng = random.Random(2)
+    offered = list(catalog.equivalencies[college])
+    courses = random_courses(rng, offered, catalog.major_codes(campus, major), 12)
+    data = TranscriptAccumulator.from_transcript(courses, index, college, major).to_dict(courses)
+
+    if stale == "format":
+        data["format"] = STATE_FORMAT - 1
+        # Older layouts stored masks as integers
+        data["matches"] = [int(mask, 16) for mask in data["matches"]]
+    elif stale == "transcript":
+        courses = courses + [dict(courses[0], grade="F")]
+    elif stale == "version":
+        data["version"] = "0" * len(data["version"])
+    elif stale == "college":
+        college = other_college
+    elif stale == "major":
+        major = other_major
+    else:
+        data = None
+
+    assert TranscriptAccumulator.load(data, index, college, major, courses) is None
+    # Callers then rebuild, and the rebuilt state loads
+    rebuilt = TranscriptAccumulator.from_transcript(courses, index, college, major).to_dict(courses)
+    assert rebuilt["format"] == STATE_FORMAT
+    restored = TranscriptAccumulator.load(rebuilt, index, college, major, courses)
+    assert restored is not None
+    assert restored.to_dict(courses) == rebuilt
@@ -0,0 +1,68 @@
+"""
+Reference Catalog Filter Tests
+Campus filters accept a campus id, name or short name, return an empty list
+for a listed campus without majors and reject campuses no catalog lists
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.reference_data import (
+    CatalogFilterError,
+    UnknownCampusError,
+    campus_entries,
+    filter_catalog,
+    load_catalog,
+)
+
+
+@pytest.mark.parametrize("campus", ["ucsc", "UCSC", "Santa Cruz", " uc santa cruz "])
+def test_campus_filter_spellings(campus):
+    filtered = filter_catalog("uc_majors", campus)
+    assert filtered["totalMajors"] == len(filtered["majors"]) > 0
+    assert all("Santa Cruz" in entry["campuses"] for entry in filtered["majors"])
+    assert filtered == filter_catalog("uc_majors", "ucsc")
+
+
+def test_listed_campus_without_majors():
+    offering = campus_entries("csu_majors").values()
+    campus = next(c for c in load_catalog("csu_campuses")["campuses"] if c not in offering)
+    filtered = filter_catalog("csu_majors", campus["id"])
+    assert filtered["majors"] == []
+    assert filtered["totalMajors"] == 0
+
+
+@pytest.mark.parametrize("campus", ["nowhere", "Santa Cruz College", "csula-north"])
+def test_unknown_campus(campus):
+    with pytest.raises(UnknownCampusError):
+        filter_catalog("uc_majors", campus)
+
+
+def test_unsupported_filters():
+    with pytest.raises(CatalogFilterError):
+        filter_catalog("community_colleges", campus="ucsc")
+    with pytest.raises(CatalogFilterError):
+        filter_catalog("csu_majors", category="engineering")
+    with pytest.raises(KeyError):
+        filter_catalog("unknown_catalog")
+
+
+def test_catalog_endpoint_status_codes():
+    httpx = pytest.importorskip("httpx")
+    from app import main
+
+    async def statuses():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return [
+                (await http.get(path)).status_code
+                for path in (
+                    "/api/catalogs/uc-majors?campus=ucsc",
+                    "/api/catalogs/uc-majors?campus=nowhere",
+                    "/api/catalogs/community-colleges?campus=ucsc",
+                    "/api/catalogs/nothing",
+                )
+            ]
+
+    assert asyncio.run(statuses()) == [200, 404, 400, 404]
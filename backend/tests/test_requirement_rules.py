@@ -0,0 +1,175 @@
+"""
+Requirement Rule Tests
+Compiled plans must evaluate nested all/any/choose groups, choose bounds and
+unit minimums as the rule language describes, label matched courses in
+listed order, and reject malformed rules with RuleError
+"""
+
+from typing import Dict, Iterable
+
+import pytest
+
+from app.services.requirement_rules import (
+    RuleError,
+    compile_requirement,
+    compile_rule,
+    course_units,
+    describe_rule,
+)
+
+
+def _present(plan, codes: Iterable[str]) -> int:
+    """Presence mask of a plan for the given normalized codes"""
+    held = set(codes)
+    return sum(1 << rank for rank, code in enumerate(plan.codes) if code in held)
+
+
+def _units(courses: Dict[str, float]) -> Dict[str, int]:
+    return course_units([{"course_code": code, "units": units} for code, units in courses.items()])
+
+
+# ===================== NESTED GROUPS =====================
+
+NESTED = {"all": ["MATH 1A", {"any": ["PHYS 4A", "PHYS 5A"]}, {"all": ["CHEM 1A", "CHEM 1B"]}]}
+
+
+@pytest.mark.parametrize("held, expected", [
+    (["MATH 1A", "PHYS 4A", "CHEM 1A", "CHEM 1B"], True),
+    (["MATH 1A", "PHYS 5A", "CHEM 1A", "CHEM 1B"], True),
+    (["MATH 1A", "PHYS 4A", "PHYS 5A", "CHEM 1A", "CHEM 1B"], True),
+    (["MATH 1A", "CHEM 1A", "CHEM 1B"], False),
+    (["MATH 1A", "PHYS 4A", "CHEM 1A"], False),
+    (["PHYS 4A", "CHEM 1A", "CHEM 1B"], False),
+    ([], False),
+])
+def test_nested_all_any(held, expected):
+    plan = compile_rule(NESTED)
+    assert plan.satisfied(_present(plan, held)) is expected
+
+
+def test_any_of_alls():
+    plan = compile_rule({"any": [{"all": ["MATH 1A", "MATH 1B"]}, {"all": ["MATH 3A", "MATH 3B"]}]})
+    assert plan.satisfied(_present(plan, ["MATH 3A", "MATH 3B"]))
+    assert not plan.satisfied(_present(plan, ["MATH 1A", "MATH 3B"]))
+
+
+def test_repeated_code_counts_once():
+    plan = compile_rule({"all": ["MATH 1A", "math-1a"]})
+    assert plan.codes == ["MATH 1A"]
+    assert plan.satisfied(_present(plan, ["MATH 1A"]))
+
+
+# ===================== CHOOSE =====================
+
+def test_choose_counts_codes_and_groups():
+    plan = compile_rule({"choose": 2, "from": ["BIO 1", "BIO 2", {"all": ["CHEM 1A", "CHEM 1B"]}]})
+    assert plan.satisfied(_present(plan, ["BIO 1", "BIO 2"]))
+    assert plan.satisfied(_present(plan, ["BIO 1", "CHEM 1A", "CHEM 1B"]))
+    assert not plan.satisfied(_present(plan, ["BIO 1", "CHEM 1A"]))
+
+
+def test_choose_all_items():
+    plan = compile_rule({"choose": 3, "from": ["BIO 1", "BIO 2", "BIO 3"]})
+    assert plan.satisfied(_present(plan, ["BIO 1", "BIO 2", "BIO 3"]))
+    assert not plan.satisfied(_present(plan, ["BIO 1", "BIO 2"]))
+
+
+@pytest.mark.parametrize("choose", [0, -1, 4, "2", None])
+def test_choose_out_of_bounds(choose):
+    with pytest.raises(RuleError):
+        compile_rule({"choose": choose, "from": ["BIO 1", "BIO 2", "BIO 3"]})
+
+
+def test_choose_bound_counts_repeated_codes_once():
+    with pytest.raises(RuleError):
+        compile_rule({"choose": 2, "from": ["BIO 1", "bio-1"]})
+
+
+# ===================== UNIT MINIMUMS =====================
+
+def test_min_units():
+    plan = compile_rule({"choose": 1, "from": ["PHYS 4A", "PHYS 5A"], "min_units": 5})
+    assert plan.needs_units
+    present = _present(plan, ["PHYS 4A"])
+    assert plan.satisfied(present, _units({"PHYS 4A": 5}))
+    assert not plan.satisfied(present, _units({"PHYS 4A": 4}))
+    assert not plan.satisfied(present)
+
+
+def test_min_units_sum_in_centi_units():
+    # 0.7 + 0.1 is 0.7999999999999999 as floats; in centi-units it is exactly 80
+    plan = compile_rule({"all": ["PE 1", "PE 2"], "min_units": 0.8})
+    units = _units({"PE 1": 0.7, "PE 2": 0.1})
+    assert units == {"PE 1": 70, "PE 2": 10}
+    assert plan.satisfied(_present(plan, ["PE 1", "PE 2"]), units)
+
+
+def test_min_units_rounds_to_centi_units():
+    plan = compile_rule({"all": ["PE 1"], "min_units": 1.004})
+    assert plan.steps[-1][4] == 100
+    assert plan.satisfied(_present(plan, ["PE 1"]), _units({"PE 1": 0.996}))
+
+
+def test_min_units_counts_only_the_group():
+    rule = {"all": ["MATH 1A", {"any": ["PHYS 4A", "PHYS 5A"], "min_units": 8}]}
+    plan = compile_rule(rule)
+    held = _present(plan, ["MATH 1A", "PHYS 4A", "PHYS 5A"])
+    assert plan.satisfied(held, _units({"MATH 1A": 5, "PHYS 4A": 4, "PHYS 5A": 4}))
+    assert not plan.satisfied(held, _units({"MATH 1A": 5, "PHYS 4A": 4, "PHYS 5A": 3.5}))
+
+
+def test_units_accumulate_across_repeats():
+    courses = [{"course_code": "PE 1", "units": 0.5}, {"course_code": "pe-1", "units": 0.5}]
+    assert course_units(courses) == {"PE 1": 100}
+
+
+# ===================== MATCHED LABELS =====================
+
+def test_matched_first_listed_alternative():
+    plan = compile_requirement({"name": "Calculus", "equivalent_codes": ["MATH 3A", "MATH 1A"]})
+    assert plan.matched(_present(plan, ["MATH 1A", "MATH 3A"])) == "MATH 3A"
+    assert plan.matched(_present(plan, ["MATH 1A"])) == "MATH 1A"
+    assert plan.matched(0) is None
+
+
+def test_matched_rule_lists_courses_in_order():
+    plan = compile_rule(NESTED)
+    held = _present(plan, ["CHEM 1B", "PHYS 5A", "MATH 1A"])
+    assert plan.matched(held) == "MATH 1A, PHYS 5A, CHEM 1B"
+
+
+def test_matched_keeps_labels_as_written():
+    plan = compile_rule({"any": ["Math 1A", "phys-4a"]})
+    assert plan.matched(_present(plan, ["PHYS 4A"])) == "phys-4a"
+
+
+def test_describe_rule():
+    assert describe_rule(NESTED) == "MATH 1A and (PHYS 4A or PHYS 5A) and (CHEM 1A and CHEM 1B)"
+    rule = {"choose": 2, "from": ["BIO 1", "BIO 2", "BIO 3"], "min_units": 7.5}
+    assert describe_rule(rule) == "2 of (BIO 1, BIO 2, BIO 3), at least 7.5 units"
+
+
+# ===================== MALFORMED RULES =====================
+
+@pytest.mark.parametrize("rule", [
+    42,
+    None,
+    ["MATH 1A"],
+    {},
+    {"all": []},
+    {"any": "MATH 1A"},
+    {"all": ["MATH 1A"], "any": ["MATH 1B"]},
+    {"choose": 1},
+    {"all": [""]},
+    {"all": ["MATH 1A", 7]},
+    {"all": ["MATH 1A", {"any": []}]},
+    {"all": ["MATH 1A"], "min_units": "lots"},
+])
+def test_malformed_rules(rule):
+    with pytest.raises(RuleError):
+        compile_rule(rule)
+
+
+def test_malformed_requirement():
+    with pytest.raises(RuleError):
+        compile_requirement({"name": "Broken", "rule": {"any": ["MATH 1A"], "choose": 1}})
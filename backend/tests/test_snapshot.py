@@ -0,0 +1,66 @@
+"""
+Reference Snapshot Parity Test
+Verification backed by a memory-mapped snapshot must return exactly what
+the dict-backed CampusRequirements returns for the same catalog
+"""
+
+import random
+
+import pytest
+
+from app.services.reference_data import CATALOG_FILES, load_catalog
+from app.services.requirement_index import CampusRequirements
+from app.services.snapshot import ReferenceSnapshot, build_snapshot
+from app.services.verification import verify_all_campuses, verify_user_document
+from loadtest.synthetic import SyntheticCatalog, synthetic_user
+
+USERS = 120
+
+
+@pytest.fixture(scope="module")
+def catalog() -> SyntheticCatalog:
+    return SyntheticCatalog(colleges=8, campuses=3, majors=15, seed=5)
+
+
+@pytest.fixture(scope="module")
+def backends(catalog, tmp_path_factory):
+    """The dict-backed and the snapshot-backed campus requirements"""
+    path = str(tmp_path_factory.mktemp("snapshot") / "reference.snapshot")
+    build_snapshot(
+        path, catalog.requirements, catalog.equivalencies, catalog.campus_names,
+        {name: load_catalog(name) for name in CATALOG_FILES},
+    )
+    campuses = CampusRequirements(catalog.requirements, catalog.equivalencies, catalog.campus_names)
+    return campuses, ReferenceSnapshot(path).campus_requirements()
+
+
+def _users(catalog: SyntheticCatalog, seed: int):
+    rng = random.Random(seed)
+    for i in range(USERS):
+        user = synthetic_user(rng, catalog, f"s{i}@example.edu", rng.randint(1, 40))
+        for course in user["transcript"]:
+            if rng.random() < 0.15:
+                # Taken at another college, or one the catalog does not know
+                course["college"] = rng.choice(catalog.colleges + ["Nowhere Community College"])
+        yield user
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_verify_user_document_parity(catalog, backends, seed):
+    campuses, snapshot = backends
+    for user in _users(catalog, seed):
+        assert verify_user_document(user, snapshot) == verify_user_document(user, campuses), user["email"]
+
+
+def test_verify_all_campuses_parity(catalog, backends):
+    campuses, snapshot = backends
+    for user in _users(catalog, 2):
+        assert verify_all_campuses(user, snapshot) == verify_all_campuses(user, campuses), user["email"]
+
+
+def test_snapshot_data_parity(catalog, backends):
+    campuses, snapshot = backends
+    assert snapshot.version == campuses.version
+    for campus, requirements in catalog.requirements.items():
+        assert snapshot.requirements[campus] == requirements
+        assert snapshot.name(campus) == campuses.name(campus)
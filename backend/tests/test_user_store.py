@@ -0,0 +1,167 @@
+"""
+SQL User Store Tests
+SQLUserStore must round-trip user documents, report missing users the way
+the UserStore interface describes, and leave fields a partial update does
+not name untouched
+"""
+
+import asyncio
+
+import pytest
+
+from app.db import sql_store
+from app.db.sql_store import SQLUserStore
+
+EMAIL = "student@example.edu"
+
+TRANSCRIPT = [
+    {"course_code": "MATH 1A", "course_name": "Calculus I", "units": 5.0, "grade": "A", "semester": "Fall 2023"},
+    {"course_code": "ENGL 1A", "course_name": "Composition", "units": 4.0, "grade": "B+", "semester": "Fall 2023"},
+    {
+        "course_code": "PHYS 4A", "course_name": "Mechanics", "units": 5.0, "grade": "B",
+        "semester": "Spring 2024", "college": "Foothill College",
+    },
+]
+
+RESULT = {
+    "eligibility_status": "conditional",
+    "eligibility_message": "Some requirements are still in progress",
+    "summary": {"total_units": 14.0, "gpa": 3.5},
+    "major_requirements": {"completed": [], "missing": [{"name": "Calculus II"}]},
+    "igetc_status": {"1A": {"name": "English Composition", "required": True, "completed": True}},
+    "risks": [],
+    "notes": ["Check with a counselor"],
+    "sources": {"assist_org": "https://assist.org"},
+    "disclaimer": "Not official advice",
+}
+
+
+def _user(email: str = EMAIL, **fields):
+    user = {
+        "email": email,
+        "name": "Test Student",
+        "major": "Computer Science",
+        "community_college": "De Anza College",
+        "created_at": "2024-01-01T00:00:00",
+        "transcript": [dict(course) for course in TRANSCRIPT],
+        "target_uc": "ucsc",
+        "target_major": "Computer Science",
+        "verification_results": None,
+    }
+    user.update(fields)
+    return user
+
+
+@pytest.fixture
+def store():
+    store = SQLUserStore.in_memory()
+    yield store
+    store.shutdown()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+# ===================== CREATE AND GET =====================
+
+def test_create_and_get(store):
+    run(store.create_user(EMAIL, _user()))
+    assert run(store.get_user(EMAIL)) == _user()
+
+
+def test_get_missing_user(store):
+    assert run(store.get_user("nobody@example.edu")) is None
+    run(store.create_user(EMAIL, _user()))
+    assert run(store.get_user("nobody@example.edu")) is None
+
+
+def test_create_overwrites(store):
+    run(store.create_user(EMAIL, _user(verification_results=RESULT)))
+    run(store.create_user(EMAIL, _user(name="Renamed", transcript=[], verification_results=None)))
+    assert run(store.get_user(EMAIL)) == _user(name="Renamed", transcript=[])
+
+
+def test_transcript_keeps_order_and_optional_fields(store):
+    run(store.create_user(EMAIL, _user(transcript=list(reversed(TRANSCRIPT)))))
+    transcript = run(store.get_user(EMAIL))["transcript"]
+    assert transcript == list(reversed(TRANSCRIPT))
+    assert "college" not in transcript[1]
+
+
+def test_get_users(store, monkeypatch):
+    # Small IN chunks so the lookup spans several queries
+    monkeypatch.setattr(sql_store, "SQL_IN_CHUNK", 2)
+    emails = [f"s{i}@example.edu" for i in range(5)]
+    for email in emails:
+        run(store.create_user(email, _user(email)))
+    users = run(store.get_users(emails + ["nobody@example.edu"]))
+    assert set(users) == set(emails)
+    assert all(users[email] == _user(email) for email in emails)
+    assert run(store.get_users([])) == {}
+
+
+# ===================== UPDATES =====================
+
+def test_update_profile_keeps_other_fields(store):
+    run(store.create_user(EMAIL, _user(verification_results=RESULT)))
+    run(store.update_user(EMAIL, {"target_uc": "ucla", "target_major": "Mathematics"}))
+    assert run(store.get_user(EMAIL)) == _user(
+        target_uc="ucla", target_major="Mathematics", verification_results=RESULT
+    )
+
+
+def test_update_transcript_keeps_other_fields(store):
+    run(store.create_user(EMAIL, _user(verification_results=RESULT)))
+    run(store.update_user(EMAIL, {"transcript": TRANSCRIPT[:1]}))
+    assert run(store.get_user(EMAIL)) == _user(transcript=TRANSCRIPT[:1], verification_results=RESULT)
+
+
+def test_update_results_keeps_transcript(store):
+    run(store.create_user(EMAIL, _user()))
+    state = {"format": 5, "matches": ["1f", "0"], "igetc": {"1A": 1}}
+    run(store.update_user(EMAIL, {
+        "verification_results": dict(RESULT, course_suggestions=[{"code": "MATH 1B"}]),
+        "verification_key": "abc123",
+        "verification_state": state,
+    }))
+    user = run(store.get_user(EMAIL))
+    assert user["transcript"] == TRANSCRIPT
+    assert user["verification_results"] == dict(RESULT, course_suggestions=[{"code": "MATH 1B"}])
+    assert user["verification_key"] == "abc123"
+    assert user["verification_state"] == state
+
+    # Clearing the results and state leaves the profile in place
+    run(store.update_user(EMAIL, {
+        "verification_results": None, "verification_key": None, "verification_state": None,
+    }))
+    assert run(store.get_user(EMAIL)) == _user()
+
+
+def test_update_missing_user(store):
+    with pytest.raises(KeyError):
+        run(store.update_user("nobody@example.edu", {"name": "Ghost"}))
+    assert run(store.get_user("nobody@example.edu")) is None
+
+
+def test_update_unsupported_field(store):
+    run(store.create_user(EMAIL, _user()))
+    with pytest.raises(ValueError):
+        run(store.update_user(EMAIL, {"favorite_color": "blue"}))
+    assert run(store.get_user(EMAIL)) == _user()
+
+
+def test_update_users_skips_missing(store):
+    emails = ["a@example.edu", "b@example.edu"]
+    for email in emails:
+        run(store.create_user(email, _user(email, verification_results=RESULT)))
+    run(store.update_users({
+        "a@example.edu": {"transcript": []},
+        "b@example.edu": {"name": "Renamed"},
+        "nobody@example.edu": {"name": "Ghost"},
+    }))
+    users = run(store.get_users(emails + ["nobody@example.edu"]))
+    assert users == {
+        "a@example.edu": _user("a@example.edu", transcript=[], verification_results=RESULT),
+        "b@example.edu": _user("b@example.edu", name="Renamed", verification_results=RESULT),
+    }